@@ -97,6 +97,16 @@ def _decode_pubsub_event(raw_data, job_id: str) -> dict:
     return {"job_id": job_id}
 
 
+def _drain_pubsub(pubsub, wait_seconds: float = 1.0, max_messages: int = 500) -> list:
+    messages = []
+    message = pubsub.get_message(ignore_subscribe_messages=True, timeout=wait_seconds)
+    while message is not None and len(messages) < max_messages:
+        if message.get("type") == "message":
+            messages.append(message)
+        message = pubsub.get_message(ignore_subscribe_messages=True, timeout=0)
+    return messages
+
+
 async def _job_events_stream(request: Request, job_id: str, user_id: str):
     channel = f"job:{job_id}"
     pubsub = get_redis().pubsub()
@@ -120,12 +130,11 @@ async def _job_events_stream(request: Request, job_id: str, user_id: str):
             if await request.is_disconnected():
                 break
 
-            message = await asyncio.to_thread(
-                lambda: pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            )
-            if message and message.get("type") == "message":
+            # Drain everything already buffered: streamed replies publish many small delta events.
+            messages = await asyncio.to_thread(_drain_pubsub, pubsub)
+            for message in messages:
                 payload = _decode_pubsub_event(message.get("data"), job_id)
-                yield _format_sse("progress", payload)
+                yield _format_sse("delta" if "delta" in payload else "progress", payload)
 
             snapshot = await asyncio.to_thread(_read_job_payload, job_id, user_id)
             status = snapshot.get("status")
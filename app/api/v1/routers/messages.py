@@ -1,15 +1,15 @@
 from datetime import datetime
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from rq import Queue
 
 from app.domain.models import InternalMessageRequest, JobSubmissionResponse, MessageRequest
-from app.core.config import API_BASE_PATH
+from app.core.config import AGENT_NAME, API_BASE_PATH
 from app.core.redis_queue import get_queue
 from app.services.auth import _ratelimit, auth_guard, identity
-from app.services.database import ensure_user_and_profile, get_conversation
+from app.services.database import ensure_user_and_profile, get_conversation_page
 from app.services.progress import publish_job_event
 from app.tasks import generate_reply_task
 
@@ -47,28 +47,35 @@ async def submit_message(request: MessageRequest, ident = Depends(identity)):
     return response
     
 @router.get("/conversation")
-async def get_user_conversation(ident = Depends(identity)):
+async def get_user_conversation(
+    ident = Depends(identity),
+    limit: int = Query(50, ge=1, le=200),
+    before: str | None = Query(None, description="next_cursor from the previous page"),
+):
+    """
+    The user's conversation with the agent, newest page first (messages oldest first within a page).
+    Pass `next_cursor` back as `before` for older messages; it is null on the oldest page.
+    """
     user_id, token_username, _sid = ident
     username = token_username
         
     # Ensure the identity + perspective exists (idempotent)
     if username:
         await ensure_user_and_profile(user_id, username)
-        
-    doc = await get_conversation(user_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="conversation_not_found")
-    
-    # make a copy, expose id as string, drop Mongo's _id key (optional but common)
-    doc = dict(doc)
-    if "_id" in doc:
-        doc["id"] = str(doc.pop("_id"))
+
+    if before and not ObjectId.is_valid(before):
+        raise HTTPException(status_code=400, detail="invalid_cursor")
+
+    messages, next_cursor = await get_conversation_page(user_id, limit=limit, before_id=before)
+
+    # expose ids as strings, drop Mongo's _id key (optional but common)
+    messages = [{**{k: v for k, v in m.items() if k != "_id"}, "id": str(m["_id"])} for m in messages]
 
     payload = jsonable_encoder(
-        doc,
+        {"user_id": user_id, "agent_name": AGENT_NAME, "messages": messages},
         custom_encoder={
             ObjectId: str,
             datetime: lambda d: d.isoformat()
         },
     )
-    return {"conversation": payload}
+    return {"conversation": payload, "next_cursor": next_cursor}
@@ -4,6 +4,17 @@ from fastapi import APIRouter, HTTPException
 from rq import Queue, Worker
 
 from app.core.redis_queue import get_redis
+from app.services.agent_state import agent_state_stats
+from app.services.emotion_buffer import buffer_stats
+from app.services.fake_llm import FAKE_FAST_MODEL, FAKE_QUALITY_MODEL
+from app.services.llm_breaker import breaker_stats
+from app.services.llm_cache import cache_stats
+from app.services.llm_capabilities import capability_stats
+from app.services.llm_client import llm_pool_settings
+from app.services.llm_latency import latency_stats
+from app.services.llm_limiter import limiter_stats
+from app.services.llm_singleflight import singleflight_stats
+from app.services.llm_usage import prompt_cache_stats, usage_stats
 from app.core.config import (
     API_BASE_PATH,
     API_MAJOR_VERSION,
@@ -12,6 +23,11 @@ from app.core.config import (
     API_VERSION,
     GPT_FAST,
     GPT_QUALITY,
+    LLM_FAKE_FAILURE_RATE,
+    LLM_FAKE_FAST_LATENCY_MS,
+    LLM_FAKE_LATENCY_SIGMA,
+    LLM_FAKE_QUALITY_LATENCY_MS,
+    LLM_FAKE_SEED,
     LLM_MODE,
     OLLAMA_BASE_URL,
     OLLAMA_FAST_MODEL,
@@ -48,8 +64,26 @@ async def llm_status():
     """
     Lightweight LLM provider diagnostics without exposing secrets.
     """
-    if LLM_MODE == "local":
-        return {
+    if LLM_MODE == "fake":
+        status = {
+            "mode": "fake",
+            "provider": "fake",
+            "base_url": None,
+            "models": {
+                "fast": FAKE_FAST_MODEL,
+                "quality": FAKE_QUALITY_MODEL,
+            },
+            "configured": True,
+            "fake": {
+                "fast_latency_ms": LLM_FAKE_FAST_LATENCY_MS,
+                "quality_latency_ms": LLM_FAKE_QUALITY_LATENCY_MS,
+                "latency_sigma": LLM_FAKE_LATENCY_SIGMA,
+                "failure_rate": LLM_FAKE_FAILURE_RATE,
+                "seed": LLM_FAKE_SEED,
+            },
+        }
+    elif LLM_MODE == "local":
+        status = {
             "mode": "local",
             "provider": "ollama",
             "base_url": OLLAMA_BASE_URL,
@@ -59,17 +93,54 @@ async def llm_status():
             },
             "configured": bool(OLLAMA_FAST_MODEL and OLLAMA_QUALITY_MODEL),
         }
+    else:
+        status = {
+            "mode": "hosted",
+            "provider": "openai",
+            "base_url": None,
+            "models": {
+                "fast": GPT_FAST,
+                "quality": GPT_QUALITY,
+            },
+            "configured": bool(OPENAI_KEY and GPT_FAST and GPT_QUALITY),
+        }
 
-    return {
-        "mode": "hosted",
-        "provider": "openai",
-        "base_url": None,
-        "models": {
-            "fast": GPT_FAST,
-            "quality": GPT_QUALITY,
-        },
-        "configured": bool(OPENAI_KEY and GPT_FAST and GPT_QUALITY),
-    }
+    status["http_pool"] = llm_pool_settings()
+    status["admission"] = await asyncio.to_thread(limiter_stats)
+    status["latency"] = await asyncio.to_thread(latency_stats)
+    status["breakers"] = await asyncio.to_thread(breaker_stats)
+    status["singleflight"] = await asyncio.to_thread(singleflight_stats)
+    status["prompt_cache"] = await asyncio.to_thread(prompt_cache_stats)
+    status["local_structured"] = await asyncio.to_thread(capability_stats)
+    return status
+
+
+@router.get("/llm/cache")
+async def llm_cache_status():
+    """
+    LLM response cache configuration and hit/miss counters (this process + all workers via Redis).
+    """
+    return await asyncio.to_thread(cache_stats)
+
+
+@router.get("/agent/cache")
+async def agent_cache_status():
+    """
+    Agent-state cache (grab_self) hit/miss and write-through counters (this process + all workers via
+    Redis), plus this process's write-behind emotion buffer.
+    """
+    status = await asyncio.to_thread(agent_state_stats)
+    status["emotion_write_behind"] = buffer_stats()
+    return status
+
+
+@router.get("/usage")
+async def llm_usage_status(job_id: str | None = None, user_id: str | None = None):
+    """
+    LLM token usage, latency, and cost per pipeline stage (most expensive first), optionally
+    broken down for one job or user.
+    """
+    return await asyncio.to_thread(usage_stats, job_id, user_id)
 
 
 def _queue_snapshot() -> dict:
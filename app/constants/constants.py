@@ -987,6 +987,8 @@ BASE_SENTIMENT_MATRIX = {
 
 CONVERSATION_COLLECTION = "conversation"
 
+CONVERSATION_MESSAGE_COLLECTION = "conversation_message"
+
 AGENT_LITE_COLLECTION = "agent_lite"
 
 AGENT_RICH_COLLECTION = "agent"
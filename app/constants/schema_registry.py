@@ -0,0 +1,119 @@
+import functools
+import hashlib
+import json
+from typing import Any, Callable, Dict, Optional
+
+# Schema factories decorated with @registered_schema build their schema once per process, freeze
+# it, and precompute its serialized forms. The request path (schema guard / retry prompts), the
+# response cache (request fingerprints) and the compiled validators all key off the same object.
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only; copy.deepcopy() it to get a mutable schema")
+
+
+class FrozenDict(dict):
+    """A dict that rejects mutation. Still a dict for isinstance checks, json.dumps and the SDK."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[str, Any]:
+        return thaw(self)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class FrozenList(list):
+    """A list that rejects mutation (see FrozenDict)."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = clear = extend = insert = pop = remove = reverse = sort = _readonly
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> list:
+        return thaw(self)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value  # sub-schemas shared between registered schemas are frozen already
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+def schema_root(schema: Dict[str, Any]) -> Dict[str, Any]:
+    if schema.get("type") == "json_schema":
+        return schema.get("json_schema", {}).get("schema", {})
+    return schema
+
+
+class SchemaEntry:
+    """A schema with its name, the JSON of its body (as shown to the model) and a content hash."""
+
+    __slots__ = ("schema", "name", "body_json", "digest")
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self.name = str((schema.get("json_schema") or {}).get("name") or "response")
+        self.body_json = json.dumps(schema_root(schema))
+        canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        self.digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# Keyed by id() of the frozen schema; entries keep their schema alive, so ids stay valid.
+_entries: Dict[int, SchemaEntry] = {}
+_registry: Dict[str, SchemaEntry] = {}  # factory name -> entry
+
+
+def registered_schema(factory: Callable[[], Dict[str, Any]]) -> Callable[[], Dict[str, Any]]:
+    """Decorator for zero-argument schema factories: build once (lazily), freeze, and register."""
+    built: Optional[Dict[str, Any]] = None
+
+    @functools.wraps(factory)
+    def get_schema() -> Dict[str, Any]:
+        nonlocal built
+        if built is None:
+            schema = freeze(factory())
+            entry = SchemaEntry(schema)
+            _entries[id(schema)] = entry
+            _registry[factory.__name__] = entry
+            built = schema
+        return built
+
+    return get_schema
+
+
+def schema_entry(schema: Dict[str, Any]) -> SchemaEntry:
+    """Cached entry for a registered schema; ad-hoc schemas get a fresh (uncached) entry."""
+    entry = _entries.get(id(schema))
+    if entry is not None and entry.schema is schema:
+        return entry
+    return SchemaEntry(schema)
+
+
+def registered_schemas() -> Dict[str, SchemaEntry]:
+    """The schemas built so far, by factory name."""
+    return dict(_registry)
@@ -1,6 +1,11 @@
 
 from app.constants.constants import IGNORE_CHOICE, MAX_EMOTION_VALUE, MAX_PERSONALITY_VALUE, MAX_SENTIMENT_VALUE, MIN_EMOTION_VALUE, MIN_PERSONALITY_VALUE, MIN_SENTIMENT_VALUE, RESPOND_CHOICE
+from app.constants.schema_registry import registered_schema
 
+# Schema factories are registered: each builds its schema once, frozen, with its JSON and hash
+# cached (see app.constants.schema_registry). deepcopy a schema to get a mutable version.
+
+@registered_schema
 def get_personality_status_schema():
 
     return {
@@ -356,6 +361,7 @@ def get_personality_status_schema():
         },
     }
 
+@registered_schema
 def get_emotion_status_schema():
 
     return {
@@ -651,6 +657,7 @@ def get_emotion_status_schema():
         },
     }
     
+@registered_schema
 def get_message_perception_schema():
     return {
         "type": "json_schema",
@@ -686,6 +693,7 @@ def get_message_perception_schema():
         }
     }
     
+@registered_schema
 def get_initiate_messages_schema():
     return {
         "type": "json_schema",
@@ -738,6 +746,7 @@ def get_initiate_messages_schema():
         }
     }
 
+@registered_schema
 def get_summary_schema():
     return {
         "type": "json_schema",
@@ -756,6 +765,7 @@ def get_summary_schema():
         }
     }
 
+@registered_schema
 def get_extrinsic_relationship_schema():
     return {
         "type": "json_schema",
@@ -774,6 +784,7 @@ def get_extrinsic_relationship_schema():
         }
     }
     
+@registered_schema
 def get_response_schema():
     return {
         "type": "json_schema",
@@ -825,6 +836,7 @@ def get_response_schema():
         }
     }
 
+@registered_schema
 def get_identity_schema():
     return {
         "type": "json_schema",
@@ -843,6 +855,7 @@ def get_identity_schema():
         }
     }
 
+@registered_schema
 def get_sentiment_status_schema():
     
     return {
@@ -1462,6 +1475,7 @@ def get_sentiment_status_schema():
         }
     }
 
+@registered_schema
 def get_activity_schema():
     return {
         "type": "json_schema",
@@ -1484,6 +1498,7 @@ def get_activity_schema():
         },
     }
 
+@registered_schema
 def get_item_schema():
     return {
         "type": "json_schema",
@@ -1502,6 +1517,7 @@ def get_item_schema():
         },
     }
 
+@registered_schema
 def get_reason_schema():
     return {
         "type": "json_schema",
@@ -1520,6 +1536,7 @@ def get_reason_schema():
         },
     }
 
+@registered_schema
 def get_category_schema():
     return {
         "type": "json_schema",
@@ -1541,6 +1558,7 @@ def get_category_schema():
         },
     }
 
+@registered_schema
 def get_is_thinking_schema():
     return {
         "type": "json_schema",
@@ -1559,6 +1577,7 @@ def get_is_thinking_schema():
         },
     }
 
+@registered_schema
 def get_thought_schema():
     return {
         "type": "json_schema",
@@ -1584,6 +1603,7 @@ def get_thought_schema():
         },
     }
     
+@registered_schema
 def get_expression_schema():
     return {
         "type": "json_schema",
@@ -1602,6 +1622,7 @@ def get_expression_schema():
         },
     }
 
+@registered_schema
 def get_is_action_schema():
     return {
         "type": "json_schema",
@@ -1620,6 +1641,7 @@ def get_is_action_schema():
         },
     }
 
+@registered_schema
 def implicitly_addressed_schema():
     return {
         "type": "json_schema",
@@ -1638,6 +1660,7 @@ def implicitly_addressed_schema():
         },
     }
     
+@registered_schema
 def is_memory_schema():
     return {
         "type": "json_schema",
@@ -1656,6 +1679,7 @@ def is_memory_schema():
         },
     }
         
+@registered_schema
 def get_personality_delta_schema():
     return {
         "type": "json_schema",
@@ -1676,6 +1700,7 @@ def get_personality_delta_schema():
         }
     }
     
+@registered_schema
 def get_personality_status_schema_lite():
     return {
         "type": "json_schema",
@@ -1790,6 +1815,7 @@ def get_personality_status_schema_lite():
         },
     }
 
+@registered_schema
 def get_emotion_status_schema_lite():
     return {
         "type": "json_schema",
@@ -1884,6 +1910,7 @@ def get_emotion_status_schema_lite():
         },
     }
 
+@registered_schema
 def get_sentiment_status_schema_lite():
     return {
         "type": "json_schema",
@@ -2042,6 +2069,7 @@ def get_sentiment_status_schema_lite():
         }
     }
 
+@registered_schema
 def get_emotion_delta_schema_lite():
     return {
         "type": "json_schema",
@@ -2062,6 +2090,7 @@ def get_emotion_delta_schema_lite():
         }
     }
     
+@registered_schema
 def get_personality_emotion_delta_schema_lite():
     return {
         "type": "json_schema",
@@ -2098,6 +2127,30 @@ def get_personality_emotion_delta_schema_lite():
         }
     }
     
+@registered_schema
+def get_personality_emotion_perception_schema_lite():
+    """
+    Combined personality/emotion deltas + message perception, for a single fast-model call.
+    Reuses the shapes of get_personality_emotion_delta_schema_lite() and get_message_perception_schema().
+    """
+    deltas = get_personality_emotion_delta_schema_lite()["json_schema"]["schema"]
+    perception = get_message_perception_schema()["json_schema"]["schema"]
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "personality_emotion_perception",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    **deltas["properties"],
+                    "perception": perception,
+                },
+                "required": ["personality_deltas", "emotion_deltas", "perception"]
+            }
+        }
+    }
+    
+@registered_schema
 def post_processing_schema():
     return {
         "type": "json_schema",
@@ -2137,6 +2190,7 @@ def post_processing_schema():
         },
     }
     
+@registered_schema
 def get_memory_schema_lite():
     """
     Structured output for *creating one episodic memory*.
@@ -2201,6 +2255,29 @@ def get_memory_schema_lite():
         }
     }
     
+@registered_schema
+def get_post_processing_combined_schema():
+    """
+    Combined post-processing for a single call: user/identity refresh, episodic memory, and thought.
+    Reuses the shapes of post_processing_schema(), get_memory_schema_lite(), and get_thought_schema().
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "post_processing_combined",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "refresh": post_processing_schema()["json_schema"]["schema"],
+                    "memory": get_memory_schema_lite()["json_schema"]["schema"],
+                    "thought": get_thought_schema()["json_schema"]["schema"],
+                },
+                "required": ["refresh", "memory", "thought"]
+            }
+        }
+    }
+    
+@registered_schema
 def get_message_appropriate_schema():
     return {
         "type": "json_schema",
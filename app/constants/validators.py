@@ -1798,6 +1798,51 @@ CONVERSATION_VALIDATOR = {
     }
   }
 
+CONVERSATION_MESSAGE_VALIDATOR = {
+  "$jsonSchema": {
+    "bsonType": "object",
+    "required": ["user_id", "agent_name", "message", "purpose", "tone", "timestamp", "sender_id", "sender_username", "from_agent"],
+    "properties": {
+        "user_id": {
+            "bsonType": "string",
+            "description": "User_id is required and must be a string"
+        },
+        "agent_name": {
+            "bsonType": "string",
+            "description": "Agent name is required and must be a string"
+        },
+        "message": {
+            "bsonType": "string",
+            "description": "Message content is required and must be a string"
+        },
+        "purpose": {
+            "bsonType": "string",
+            "description": "Purpose is required and must be a string"
+        },
+        "tone": {
+            "bsonType": "string",
+            "description": "Tone is required and must be a string"
+        },
+        "timestamp": {
+            "bsonType": "date",
+            "description": "Timestamp must be a valid ISO date"
+        },
+        "sender_id": {
+            "bsonType": "string",
+            "description": "Sender ID is required and must be a string"
+        },
+        "sender_username": {
+            "bsonType": "string",
+            "description": "Sender username is required and must be a string"
+        },
+        "from_agent": {
+            "bsonType": "bool",
+            "description": "from_agent is required and must be a boolean"
+        }
+    }
+  }
+}
+
 MESSAGES_VALIDATOR = {
   "$jsonSchema": {
     "bsonType": "object",
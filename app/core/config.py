@@ -23,8 +23,8 @@ GPT_QUALITY = os.getenv('GPT_QUALITY_MODEL')
 
 # LLM provider mode
 LLM_MODE = os.getenv("LLM_MODE", "hosted").strip().lower()
-if LLM_MODE not in {"hosted", "local"}:
-    raise RuntimeError("LLM_MODE must be either 'hosted' or 'local'.")
+if LLM_MODE not in {"hosted", "local", "fake"}:
+    raise RuntimeError("LLM_MODE must be 'hosted', 'local', or 'fake'.")
 
 # Ollama (OpenAI-compatible API)
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434/v1").rstrip("/")
@@ -32,8 +32,146 @@ OLLAMA_API_KEY = os.getenv("OLLAMA_API_KEY", "ollama")
 OLLAMA_FAST_MODEL = os.getenv("OLLAMA_FAST_MODEL")
 OLLAMA_QUALITY_MODEL = os.getenv("OLLAMA_QUALITY_MODEL")
 
+# Fake provider (LLM_MODE=fake): in-process, schema-valid random answers for load testing without
+# an LLM. Latency is lognormal around the per-model median; a share of requests fails with HTTP 500.
+LLM_FAKE_FAST_LATENCY_MS = float(os.getenv("LLM_FAKE_FAST_LATENCY_MS", 300))
+LLM_FAKE_QUALITY_LATENCY_MS = float(os.getenv("LLM_FAKE_QUALITY_LATENCY_MS", 1200))
+LLM_FAKE_LATENCY_SIGMA = float(os.getenv("LLM_FAKE_LATENCY_SIGMA", 0.35))
+LLM_FAKE_FAILURE_RATE = float(os.getenv("LLM_FAKE_FAILURE_RATE", 0.0))
+LLM_FAKE_SEED = int(os.getenv("LLM_FAKE_SEED")) if os.getenv("LLM_FAKE_SEED") else None
+
+# Shared LLM HTTP connection pool (one per process, reused across calls)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 100))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 20))
+LLM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", 60))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 120))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", 5))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _parse_int_map(raw: str | None) -> dict[str, int]:
+    # "name=60,other=0" -> {"name": 60, "other": 0}; malformed pairs are ignored.
+    parsed: dict[str, int] = {}
+    for pair in (raw or "").split(","):
+        key, sep, value = pair.partition("=")
+        if sep and key.strip() and value.strip().lstrip("-").isdigit():
+            parsed[key.strip()] = int(value.strip())
+    return parsed
+
+
+def _parse_price_map(raw: str | None) -> dict[str, tuple[float, float, float]]:
+    # "model=prompt/completion[/cached]" USD per 1M tokens, comma-separated; cached defaults to
+    # the prompt price. Malformed entries are ignored.
+    parsed: dict[str, tuple[float, float, float]] = {}
+    for pair in (raw or "").split(","):
+        key, sep, value = pair.partition("=")
+        try:
+            prices = [float(part) for part in value.split("/")]
+        except ValueError:
+            continue
+        if sep and key.strip() and len(prices) in (2, 3):
+            parsed[key.strip()] = (prices[0], prices[1], prices[2] if len(prices) == 3 else prices[0])
+    return parsed
+
+
+# LLM usage accounting per pipeline stage, job and user (aggregated in Redis, GET /v1/meta/usage).
+# Per-job and per-user breakdowns expire after LLM_USAGE_TTL_SECONDS; stage totals are kept.
+LLM_MODEL_PRICES = _parse_price_map(os.getenv("LLM_MODEL_PRICES"))
+LLM_USAGE_TTL_SECONDS = int(os.getenv("LLM_USAGE_TTL_SECONDS", 7 * 24 * 3600))
+
+# LLM response cache (keyed by model + messages + schema)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"}
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 300))
+LLM_CACHE_SCHEMA_TTLS = _parse_int_map(os.getenv("LLM_CACHE_SCHEMA_TTLS"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 512))
+LLM_CACHE_REDIS = os.getenv("LLM_CACHE_REDIS", "true").strip().lower() in {"1", "true", "yes", "on"}
+
+# Single-flight: concurrent identical LLM requests share one upstream call
+LLM_SINGLEFLIGHT_ENABLED = os.getenv("LLM_SINGLEFLIGHT_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+LLM_SINGLEFLIGHT_REDIS = os.getenv("LLM_SINGLEFLIGHT_REDIS", "false").strip().lower() in {"1", "true", "yes", "on"}
+LLM_SINGLEFLIGHT_LEASE_SECONDS = int(os.getenv("LLM_SINGLEFLIGHT_LEASE_SECONDS", 120))
+
+# LLM admission control, per model name. Excess calls wait in line instead of failing.
+#   LLM_MAX_CONCURRENCY        - in-flight requests per model in this process (0 = unlimited)
+#   LLM_RATE_LIMIT_RPM         - requests/minute per model across all processes (Redis token bucket, 0 = off)
+#   LLM_MODEL_CONCURRENCY / LLM_MODEL_RATE_LIMITS - per-model overrides, e.g. "qwen2.5:14b=2,gpt-5-mini=8"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_MODEL_CONCURRENCY = _parse_int_map(os.getenv("LLM_MODEL_CONCURRENCY"))
+LLM_RATE_LIMIT_RPM = int(os.getenv("LLM_RATE_LIMIT_RPM", 0))
+LLM_MODEL_RATE_LIMITS = _parse_int_map(os.getenv("LLM_MODEL_RATE_LIMITS"))
+LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", 5))
+
+# Hedged LLM requests (opt-in per call site via structured_query(..., hedge=True)).
+# If the primary hasn't answered by the model's recent LLM_HEDGE_PERCENTILE latency
+# (floored at LLM_HEDGE_MIN_DELAY_MS), a backup request is sent and the first valid result wins.
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"}
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+LLM_HEDGE_MIN_DELAY_MS = int(os.getenv("LLM_HEDGE_MIN_DELAY_MS", 1000))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+LLM_HEDGE_BACKUP = os.getenv("LLM_HEDGE_BACKUP", "fast").strip().lower()
+if LLM_HEDGE_BACKUP not in {"same", "fast"}:
+    raise RuntimeError("LLM_HEDGE_BACKUP must be either 'same' or 'fast'.")
+
+# Circuit breaker per provider mode + model. A breaker opens when, over its last
+# LLM_BREAKER_WINDOW calls (min LLM_BREAKER_MIN_CALLS), the share of provider errors or calls
+# slower than LLM_BREAKER_SLOW_CALL_SECONDS reaches LLM_BREAKER_FAILURE_RATE. While open, calls
+# fail fast; after LLM_BREAKER_OPEN_SECONDS one half-open probe decides whether it closes again.
+# With LLM_FAILOVER_ENABLED, calls route to the other mode (hosted <-> local) while it is open.
+LLM_BREAKER_ENABLED = os.getenv("LLM_BREAKER_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", 20))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", 5))
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", 0.5))
+LLM_BREAKER_SLOW_CALL_SECONDS = float(os.getenv("LLM_BREAKER_SLOW_CALL_SECONDS", 60))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", 30))
+LLM_FAILOVER_ENABLED = os.getenv("LLM_FAILOVER_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"}
+
+# Stream the response-generation completion and publish reply text chunks as `delta` job events
+# (GET /v1/jobs/{job_id}/events). Streamed calls are never hedged.
+LLM_STREAM_RESPONSES = os.getenv("LLM_STREAM_RESPONSES", "true").strip().lower() in {"1", "true", "yes", "on"}
+
+# How local-mode structured calls constrain the model's output:
+#   auto        - try json_schema, fall back to json_object when the endpoint rejects the format; the
+#                 first format a model's endpoint accepts is remembered per model (shared via Redis)
+#                 for LOCAL_STRUCTURED_OUTPUT_MEMORY_SECONDS instead of re-probed every call
+#   json_schema - response_format=json_schema (Ollama >= 0.5 turns it into a decoding grammar)
+#   grammar     - the schema converted to a GBNF grammar, sent as `grammar` (llama.cpp server)
+#   json_object - plain JSON mode; the schema is only described in the prompt
+LOCAL_STRUCTURED_OUTPUT = os.getenv("LOCAL_STRUCTURED_OUTPUT", "auto").strip().lower()
+if LOCAL_STRUCTURED_OUTPUT not in {"auto", "json_schema", "grammar", "json_object"}:
+    raise RuntimeError("LOCAL_STRUCTURED_OUTPUT must be 'auto', 'json_schema', 'grammar', or 'json_object'.")
+
+# How long a model's accepted output format is remembered before it is probed again
+LOCAL_STRUCTURED_OUTPUT_MEMORY_SECONDS = float(os.getenv("LOCAL_STRUCTURED_OUTPUT_MEMORY_SECONDS", 3600))
+
 LITE_MODE = os.getenv("MODE") == "lite"
 
+# Prompt context budgets, in estimated tokens per section (0 = unlimited).
+# Token counts use tiktoken when installed, otherwise len(text) / PROMPT_CHARS_PER_TOKEN.
+PROMPT_CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", 4.0))
+PROMPT_HISTORY_TOKEN_BUDGET = int(os.getenv("PROMPT_HISTORY_TOKEN_BUDGET", 800))
+PROMPT_MESSAGE_TOKEN_CAP = int(os.getenv("PROMPT_MESSAGE_TOKEN_CAP", 200))
+PROMPT_MEMORY_TOKEN_BUDGET = int(os.getenv("PROMPT_MEMORY_TOKEN_BUDGET", 300))
+PROMPT_TEXT_TOKEN_BUDGET = int(os.getenv("PROMPT_TEXT_TOKEN_BUDGET", 400))
+
+# How generate_response runs the personality/emotion-delta and perception steps:
+#   sequential - deltas first, perception sees the post-delta state (original behavior)
+#   concurrent - both fast-model calls in parallel, perception sees the pre-delta state
+#   combined   - one fast-model call returning deltas + perception
+DELTA_PERCEPTION_MODE = os.getenv("DELTA_PERCEPTION_MODE", "sequential").strip().lower()
+if DELTA_PERCEPTION_MODE not in {"sequential", "concurrent", "combined"}:
+    raise RuntimeError("DELTA_PERCEPTION_MODE must be 'sequential', 'concurrent', or 'combined'.")
+
+# How post_processing runs its three LLM steps:
+#   combined   - one fast-model call returning the user/identity refresh, episodic memory, and thought
+#   sequential - three calls, each seeing the previous step's output (original behavior)
+POST_PROCESSING_MODE = os.getenv("POST_PROCESSING_MODE", "combined").strip().lower()
+if POST_PROCESSING_MODE not in {"sequential", "combined"}:
+    raise RuntimeError("POST_PROCESSING_MODE must be 'sequential' or 'combined'.")
+
+# Opt-in: skip the response call for group messages that neither mention nor implicitly address
+# the agent (by default the response model still decides whether to reply)
+IGNORE_UNADDRESSED_GROUP_MESSAGES = os.getenv("IGNORE_UNADDRESSED_GROUP_MESSAGES", "false").strip().lower() in {"1", "true", "yes", "on"}
+
 # Mongo runtime mode
 MONGO_MODE = os.getenv("MONGO_MODE", "hosted").strip().lower()
 if MONGO_MODE not in {"hosted", "local"}:
@@ -53,6 +191,14 @@ DEVELOPER_EMAIL = os.getenv("DEVELOPER_EMAIL")
 
 DATABASE_NAME = os.getenv("DATABASE_NAME")
 
+# Explain the hot Mongo queries at API startup and warn on collection scans / in-memory sorts
+DB_QUERY_PLAN_CHECK = os.getenv("DB_QUERY_PLAN_CHECK", "true").strip().lower() in {"1", "true", "yes", "on"}
+
+# In-process cache of the agent document (grab_self). Writes go through the cache; other processes
+# notice them via a version counter in Redis. The TTL only bounds staleness for edits made outside the app.
+AGENT_STATE_CACHE_ENABLED = os.getenv("AGENT_STATE_CACHE_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+AGENT_STATE_CACHE_TTL_SECONDS = int(os.getenv("AGENT_STATE_CACHE_TTL_SECONDS", 300))
+
 WINDOWS_ENV = os.getenv("ENVIRONMENT") == 'windows'
 
 # Optional Argon2 pepper (extra secret in env)
@@ -85,6 +231,9 @@ REDIS_TLS_INSECURE_SKIP_VERIFY = os.getenv("REDIS_TLS_INSECURE_SKIP_VERIFY", "fa
 EMOTIONAL_DECAY_RATE = int(os.getenv("EMOTIONAL_DECAY_RATE_SECONDS", 240))
 THINKING_RATE = int(os.getenv("THINKING_RATE_SECONDS", 900))
 
+# Agent emotion updates are buffered this long and written as one field-level $set (0 = write immediately)
+EMOTION_WRITE_BEHIND_SECONDS = float(os.getenv("EMOTION_WRITE_BEHIND_SECONDS", 2.0))
+
 # Message Retention
 CONVERSATION_MESSAGE_RETENTION_COUNT = 10
 MESSAGE_HISTORY_COUNT = 10
@@ -101,6 +250,8 @@ DEBUG_MODE = os.getenv("DEBUG_MODE", "true").strip().lower() in {"1", "true", "y
 
 
 def validate_llm_configuration() -> None:
+    if LLM_MODE == "fake":
+        return
     if LLM_MODE == "local":
         missing = [
             key
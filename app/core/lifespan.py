@@ -4,9 +4,11 @@ import asyncio
 from fastapi import FastAPI
 
 import app.services.database as database_service
-from app.core.config import validate_llm_configuration, validate_security_configuration
+from app.core.config import DB_QUERY_PLAN_CHECK, validate_llm_configuration, validate_security_configuration
+from app.services import agent_state
 from app.services.emotion_decay import emotion_decay_loop
 from app.services.expressions import refresh_expressions_cache
+from app.services.llm_client import close_llm_clients
 from app.services.thinking import periodic_thinking
 
 @asynccontextmanager
@@ -16,6 +18,8 @@ async def app_lifespan(app: FastAPI):
 
     print("Initializing database...")
     await database_service.init_db()
+    if DB_QUERY_PLAN_CHECK:
+        await database_service.check_query_plans()
 
     print("Starting emotional decay...")
     decay_task = asyncio.create_task(emotion_decay_loop())
@@ -29,10 +33,6 @@ async def app_lifespan(app: FastAPI):
     try:
         yield
     finally:
-        if database_service._db_client:
-            database_service._db_client.close()
-            print("Database connection closed.")
-
         decay_task.cancel()
         thinking_task.cancel()
         with suppress(asyncio.CancelledError):
@@ -41,3 +41,13 @@ async def app_lifespan(app: FastAPI):
             await thinking_task
 
         print("Emotion decay loop stopped.")
+
+        # Write-behind emotion updates still buffered; needs the DB client, so before closing it.
+        await database_service.flush_agent_emotions()
+        await asyncio.to_thread(agent_state.flush, True)
+        if database_service._db_client:
+            database_service._db_client.close()
+            print("Database connection closed.")
+
+        await close_llm_clients()
+        print("LLM client connections closed.")
@@ -1,4 +1,4 @@
-from typing import Any, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 MessageType = Literal["dm", "group"]
@@ -33,3 +33,4 @@ class GenerateReplyTaskResponse(BaseModel):
     message_response: MessageResponse
     user_id: str
     queries: List[Any]
+    timings: Dict[str, float] = Field(default_factory=dict)
@@ -0,0 +1,78 @@
+"""
+Copy conversation messages from the legacy embedded `conversation.messages` arrays into the
+`conversation_message` collection (one document per message), which the API reads from.
+
+Run from the repo root, with the same environment as the API, before deploying:
+    python -m app.migrations.conversation_messages --dry-run
+    python -m app.migrations.conversation_messages [--clear-legacy]
+
+Safe to re-run: migrated conversations are marked with `migrated_at` and skipped, and a
+conversation interrupted mid-copy is copied again from scratch. --clear-legacy empties each
+migrated `messages` array to reclaim space; the legacy documents themselves are kept.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+
+import app.services.database as database_service
+from app.constants.constants import CONVERSATION_COLLECTION, CONVERSATION_MESSAGE_COLLECTION
+from app.services.database import _normalize_message_for_storage, get_database
+
+
+async def migrate(dry_run: bool, clear_legacy: bool, batch_size: int) -> dict:
+    db = await get_database()
+    legacy = db[CONVERSATION_COLLECTION]
+    target = db[CONVERSATION_MESSAGE_COLLECTION]
+    counts = {"conversations": 0, "messages": 0, "resumed": 0}
+
+    async for convo in legacy.find({"migrated_at": {"$exists": False}}):
+        docs = [
+            {
+                **_normalize_message_for_storage(message),
+                "user_id": convo["user_id"],
+                "agent_name": convo["agent_name"],
+                "legacy_conversation_id": convo["_id"],
+            }
+            for message in convo.get("messages") or []
+        ]
+        for doc in docs:
+            doc.pop("_id", None)
+        counts["conversations"] += 1
+        counts["messages"] += len(docs)
+        if dry_run:
+            continue
+
+        if convo.get("migration_started_at"):
+            # A previous run stopped part-way through this conversation.
+            await target.delete_many({"legacy_conversation_id": convo["_id"]})
+            counts["resumed"] += 1
+        await legacy.update_one({"_id": convo["_id"]}, {"$set": {"migration_started_at": datetime.now(timezone.utc)}})
+
+        for start in range(0, len(docs), batch_size):
+            await target.insert_many(docs[start : start + batch_size], ordered=True)
+
+        done = {"migrated_at": datetime.now(timezone.utc)}
+        if clear_legacy:
+            done["messages"] = []
+        await legacy.update_one({"_id": convo["_id"]}, {"$set": done, "$unset": {"migration_started_at": ""}})
+
+    return counts
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        counts = await migrate(args.dry_run, args.clear_legacy, args.batch_size)
+    finally:
+        if database_service._db_client:
+            database_service._db_client.close()
+    verb = "Would migrate" if args.dry_run else "Migrated"
+    print(f"{verb} {counts['messages']} messages from {counts['conversations']} conversations"
+          f" ({counts['resumed']} resumed).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="count what would be migrated without writing")
+    parser.add_argument("--clear-legacy", action="store_true", help="empty migrated legacy `messages` arrays")
+    parser.add_argument("--batch-size", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,241 @@
+import asyncio
+import copy
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import AGENT_STATE_CACHE_ENABLED, AGENT_STATE_CACHE_TTL_SECONDS
+from app.core.redis_queue import get_redis
+
+_REDIS_VERSION_KEY = "agent_state:version"
+_REDIS_STATS_KEY = "agent_state:stats"
+_STATS_FLUSH_EVERY = 50
+_STATS_FLUSH_SECONDS = 60.0
+
+# ---- The agent document as of `_version` (the Redis counter value when it was read or last written).
+# Every app write bumps the counter, so a matching version means no other process has written since.
+_doc: Optional[Dict[str, Any]] = None
+_version: Optional[int] = None
+_loaded_at: float = 0.0
+# Whether this process keeps a copy at all. Off in forked RQ job processes (see disable_local_cache):
+# they exit after one job, so a copy would never be hit there.
+_local: bool = AGENT_STATE_CACHE_ENABLED
+_stats: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "write_through": 0,
+    "invalidations": 0,
+}
+# Counter increments not yet added to the Redis aggregate; written in batches, not per lookup.
+_unflushed: Dict[str, int] = {}
+_flushed_at: float = time.monotonic()
+# Set by writes in a process without a local copy, or whose version bump failed: the shared version
+# is bumped once, by flush() or the next lookup().
+_bump_pending: bool = False
+
+
+def disable_local_cache() -> None:
+    """
+    Stop caching the agent document in this process (and processes forked from it). Writes still
+    bump the shared version, once per flush(), so processes that do cache re-read.
+    """
+    global _local
+    _local = False
+    _drop()
+
+
+def _count(stat: str) -> None:
+    _stats[stat] += 1
+    _unflushed[stat] = _unflushed.get(stat, 0) + 1
+
+
+def _take_unflushed() -> Dict[str, int]:
+    global _flushed_at
+    pending = dict(_unflushed)
+    _unflushed.clear()
+    _flushed_at = time.monotonic()
+    return pending
+
+
+def _restore_unflushed(pending: Dict[str, int]) -> None:
+    for stat, amount in pending.items():
+        _unflushed[stat] = _unflushed.get(stat, 0) + amount
+
+
+def _stats_due() -> bool:
+    return bool(_unflushed) and (
+        sum(_unflushed.values()) >= _STATS_FLUSH_EVERY or time.monotonic() - _flushed_at >= _STATS_FLUSH_SECONDS
+    )
+
+
+def _read_version(stats: Dict[str, int], bump: bool = False) -> int:
+    # One round trip: the version check, plus a pending version bump and the batched counters when due.
+    pipe = get_redis().pipeline(transaction=False)
+    if bump:
+        pipe.incr(_REDIS_VERSION_KEY)
+    pipe.get(_REDIS_VERSION_KEY)
+    for stat, amount in stats.items():
+        pipe.hincrby(_REDIS_STATS_KEY, stat, amount)
+    raw = pipe.execute()[1 if bump else 0]
+    return int(raw) if raw is not None else 0
+
+
+def flush(force: bool = False) -> None:
+    """
+    Send the pending version bump (writes made without a local copy, or whose bump failed) and,
+    when due or `force`d, this process's counters to Redis in one round trip. Blocking; call via
+    asyncio.to_thread from async code. Called at job end and on shutdown.
+    """
+    global _bump_pending
+    bump = _bump_pending
+    stats = _take_unflushed() if force or _stats_due() else {}
+    if not bump and not stats:
+        return
+    _bump_pending = False
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        if bump:
+            pipe.incr(_REDIS_VERSION_KEY)
+        for stat, amount in stats.items():
+            pipe.hincrby(_REDIS_STATS_KEY, stat, amount)
+        pipe.execute()
+    except Exception:
+        _bump_pending = _bump_pending or bump
+        _restore_unflushed(stats)
+
+
+def _drop() -> None:
+    global _doc, _version
+    _doc = None
+    _version = None
+
+
+async def lookup() -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+    """
+    The cached agent document (a fresh copy; callers mutate it) or None, plus the current shared
+    version to pass to `store` after a miss. Redis failures bypass the cache.
+    """
+    global _bump_pending
+    if not AGENT_STATE_CACHE_ENABLED or not _local:
+        return None, None
+    batch = _take_unflushed() if _stats_due() else {}
+    bump, _bump_pending = _bump_pending, False
+    try:
+        version = await asyncio.to_thread(_read_version, batch, bump)
+    except Exception:
+        _restore_unflushed(batch)
+        _bump_pending = _bump_pending or bump
+        version = None
+
+    fresh = time.monotonic() - _loaded_at < AGENT_STATE_CACHE_TTL_SECONDS
+    if _doc is not None and version is not None and version == _version and fresh:
+        _count("hits")
+        return copy.deepcopy(_doc), version
+    _count("misses")
+    return None, version
+
+
+def store(doc: Dict[str, Any], version: Optional[int]) -> None:
+    """Cache `doc`, read from Mongo after `lookup` returned `version`."""
+    global _doc, _version, _loaded_at
+    if not AGENT_STATE_CACHE_ENABLED or not _local or version is None or not doc:
+        return
+    _doc = copy.deepcopy(doc)
+    _version = version
+    _loaded_at = time.monotonic()
+
+
+async def _bump_version() -> Optional[int]:
+    try:
+        return await asyncio.to_thread(lambda: int(get_redis().incr(_REDIS_VERSION_KEY)))
+    except Exception:
+        return None
+
+
+async def write_through(
+    set_fields: Optional[Dict[str, Any]] = None,
+    add_to_set: Optional[Dict[str, List[Any]]] = None,
+) -> None:
+    """
+    Mirror a Mongo update of the agent document ($set, including dotted paths, / $addToSet) into
+    the cache and bump the shared version so other processes re-read. Call after the Mongo write
+    succeeded. The cache is patched without yielding to the event loop once the version is bumped.
+    """
+    global _version, _bump_pending
+    if not AGENT_STATE_CACHE_ENABLED:
+        return
+    if not _local:
+        # Nothing to patch here; other processes learn of the write when flush() bumps the version.
+        _bump_pending = True
+        return
+    version = await _bump_version()
+    if version is None:
+        # The Mongo write applied; other processes still learn of it via the next flush() or lookup().
+        _bump_pending = True
+
+    # Only patch if nothing else was written since our copy was read; otherwise re-read next time.
+    if _doc is None or version is None or _version != version - 1:
+        if _doc is not None:
+            _drop()
+            _count("invalidations")
+        return
+
+    for field, value in (set_fields or {}).items():
+        # Dotted paths ("emotional_status.emotions.joy.value") set one nested field, as in Mongo.
+        *parents, leaf = field.split(".")
+        target = _doc
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = copy.deepcopy(value)
+    for field, values in (add_to_set or {}).items():
+        current = _doc.setdefault(field, [])
+        current.extend(v for v in dict.fromkeys(values) if v not in current)
+    _version = version
+    _count("write_through")
+
+
+async def invalidate() -> None:
+    """Drop this process's copy and bump the shared version, e.g. after a write with an unknown outcome."""
+    global _bump_pending
+    if not AGENT_STATE_CACHE_ENABLED:
+        return
+    if _doc is not None:
+        _drop()
+        _count("invalidations")
+    if await _bump_version() is None:
+        _bump_pending = True
+
+
+def _hit_rate(hits: int, misses: int) -> Optional[float]:
+    total = hits + misses
+    return round(hits / total, 4) if total else None
+
+
+def agent_state_stats() -> Dict[str, Any]:
+    """
+    Agent-state cache counters (this process + all processes via Redis).
+    Blocking (Redis read); call via asyncio.to_thread from async code.
+    """
+    flush(force=True)
+    local: Dict[str, Any] = dict(_stats)
+    local["cached"] = _doc is not None
+    local["version"] = _version
+    local["hit_rate"] = _hit_rate(local["hits"], local["misses"])
+
+    cluster: Optional[Dict[str, Any]] = None
+    try:
+        conn = get_redis()
+        raw = conn.hgetall(_REDIS_STATS_KEY) or {}
+        cluster = {(k.decode() if isinstance(k, bytes) else str(k)): int(v) for k, v in raw.items()}
+        cluster["hit_rate"] = _hit_rate(cluster.get("hits", 0), cluster.get("misses", 0))
+        raw_version = conn.get(_REDIS_VERSION_KEY)
+        cluster["version"] = int(raw_version) if raw_version is not None else 0
+    except Exception:
+        cluster = None
+
+    return {
+        "enabled": AGENT_STATE_CACHE_ENABLED,
+        "local_cache": _local,
+        "ttl_seconds": AGENT_STATE_CACHE_TTL_SECONDS,
+        "process": local,
+        "cluster": cluster,
+    }
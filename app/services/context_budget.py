@@ -0,0 +1,147 @@
+from datetime import datetime
+from typing import Any, List, Optional
+
+from app.core.config import (
+    PROMPT_CHARS_PER_TOKEN,
+    PROMPT_HISTORY_TOKEN_BUDGET,
+    PROMPT_MEMORY_TOKEN_BUDGET,
+    PROMPT_MESSAGE_TOKEN_CAP,
+    PROMPT_TEXT_TOKEN_BUDGET,
+)
+
+# ---- Token-budgeted rendering of the variable-size prompt sections
+# (message history, memory, thoughts, free-text summaries). Each section is
+# rendered compactly and cut to its own budget, newest content kept first,
+# so prompt size stays bounded as conversations and memories grow.
+
+_ELLIPSIS = "…"
+_encoder: Any = None
+_encoder_loaded: bool = False
+
+
+def _get_encoder() -> Any:
+    # tiktoken is optional; without it we fall back to the chars-per-token heuristic.
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = None
+    return _encoder
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return int(len(text) / PROMPT_CHARS_PER_TOKEN + 0.999)
+
+
+def fit_text(text: Any, budget: int = PROMPT_TEXT_TOKEN_BUDGET) -> str:
+    """Return `text` cut to about `budget` tokens (0 = unlimited), marking the cut with an ellipsis."""
+    text = "" if text is None else str(text)
+    if budget <= 0 or estimate_tokens(text) <= budget:
+        return text
+
+    encoder = _get_encoder()
+    if encoder is not None:
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:budget]).rstrip() + _ELLIPSIS
+    return text[: max(0, int(budget * PROMPT_CHARS_PER_TOKEN) - 1)].rstrip() + _ELLIPSIS
+
+
+def _fit_items(lines: List[str], budget: int, noun: str, separator: str = " | ") -> str:
+    """Keep the newest lines (last in `lines`) that fit `budget`, noting how many older ones were dropped."""
+    if budget <= 0:
+        return separator.join(lines)
+
+    kept: List[str] = []
+    used = 0
+    for line in reversed(lines):
+        cost = estimate_tokens(line) + 1
+        if kept and used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    kept.reverse()
+
+    omitted = len(lines) - len(kept)
+    if omitted:
+        kept.insert(0, f"({omitted} earlier {noun} omitted)")
+    return separator.join(kept)
+
+
+def _timestamp_key(item: Any) -> Optional[datetime]:
+    ts = item.get("timestamp") if isinstance(item, dict) else None
+    if isinstance(ts, datetime):
+        return ts.replace(tzinfo=None)
+    return None
+
+
+def _format_timestamp(ts: Any) -> str:
+    if isinstance(ts, datetime):
+        return ts.strftime("%Y-%m-%d %H:%M")
+    return str(ts) if ts else ""
+
+
+def render_message(message: Any, cap: int = PROMPT_MESSAGE_TOKEN_CAP) -> str:
+    """One history entry as `[time] sender (tone): text`; non-dict entries are rendered as-is."""
+    if not isinstance(message, dict):
+        return fit_text(message, cap)
+
+    sender = message.get("sender_username") or message.get("sender_id") or "unknown"
+    tone = message.get("tone")
+    when = _format_timestamp(message.get("timestamp"))
+    prefix = f"[{when}] " if when else ""
+    suffix = f" ({tone})" if tone else ""
+    return f"{prefix}{sender}{suffix}: {fit_text(str(message.get('message') or '').strip(), cap)}"
+
+
+def render_history(messages: Any, budget: int = PROMPT_HISTORY_TOKEN_BUDGET) -> str:
+    """
+    Render a list of message documents oldest-to-newest within `budget` tokens, dropping the oldest first.
+    Lists sorted either way are accepted (message memory is fetched newest-first). Strings pass through fit_text.
+    """
+    if not isinstance(messages, (list, tuple)):
+        return fit_text(messages, budget)
+    if not messages:
+        return "[]"
+
+    items = list(messages)
+    keys = [_timestamp_key(m) for m in items]
+    if all(k is not None for k in keys):
+        items = [m for _, m in sorted(zip(keys, items), key=lambda pair: pair[0])]
+
+    return _fit_items([render_message(m) for m in items], budget, "messages")
+
+
+def render_memory(memory: Any, budget: int = PROMPT_MEMORY_TOKEN_BUDGET) -> str:
+    """Render one memory document (or a list of them) as `event - thoughts (significance; tags)`."""
+    if not memory:
+        return "none"
+
+    def _one(mem: Any) -> str:
+        if not isinstance(mem, dict):
+            return str(mem)
+        tags = ", ".join(t for t in (mem.get("tags") or []) if t)
+        meta = "; ".join(part for part in (mem.get("significance"), tags) if part)
+        line = f"{mem.get('event', '')} - {mem.get('thoughts', '')}".strip(" -")
+        return f"{line} ({meta})" if meta else line
+
+    memories = memory if isinstance(memory, (list, tuple)) else [memory]
+    return _fit_items([_one(m) for m in memories], budget, "memories", separator="; ")
+
+
+def render_thoughts(thoughts: Any, budget: int = PROMPT_TEXT_TOKEN_BUDGET) -> str:
+    """Render thought documents (newest-first, as fetched) or plain text within `budget` tokens."""
+    if isinstance(thoughts, dict):
+        thoughts = [thoughts]
+    if not isinstance(thoughts, (list, tuple)):
+        return fit_text(thoughts, budget)
+
+    texts = [str(t.get("thought", "")) if isinstance(t, dict) else str(t) for t in thoughts]
+    return _fit_items([t for t in reversed(texts) if t], budget, "thoughts", separator="; ")
+
@@ -2,22 +2,30 @@ import asyncio
 from datetime import datetime, timezone
 import random
 import time
-from typing import Any, Dict, List, Optional, Tuple
-from app.constants.constants import AGENT_RICH_COLLECTION, AGENT_LITE_COLLECTION, AGENT_NAME_PROPERTY, AUTH_COLLECTION, BASE_EMOTIONAL_STATUS, BASE_EMOTIONAL_STATUS_LITE, BASE_PERSONALITY, BASE_SENTIMENT_MATRIX, BASE_SENTIMENT_MATRIX_LITE, CONVERSATION_COLLECTION, INTRINSIC_RELATIONSHIPS, MEMORY_COLLECTION, MESSAGE_COLLECTION, MYERS_BRIGGS_PERSONALITIES, SESSIONS_COLLECTION, THOUGHT_COLLECTION, USER_RICH_COLLECTION, USER_LITE_COLLECTION
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.constants.constants import AGENT_RICH_COLLECTION, AGENT_LITE_COLLECTION, AGENT_NAME_PROPERTY, AUTH_COLLECTION, BASE_EMOTIONAL_STATUS, BASE_EMOTIONAL_STATUS_LITE, BASE_PERSONALITY, BASE_SENTIMENT_MATRIX, BASE_SENTIMENT_MATRIX_LITE, CONVERSATION_COLLECTION, CONVERSATION_MESSAGE_COLLECTION, INTRINSIC_RELATIONSHIPS, MEMORY_COLLECTION, MESSAGE_COLLECTION, MYERS_BRIGGS_PERSONALITIES, SESSIONS_COLLECTION, THOUGHT_COLLECTION, USER_RICH_COLLECTION, USER_LITE_COLLECTION
 from motor.motor_asyncio import AsyncIOMotorClient
-from app.core.config import AGENT_NAME, LITE_MODE, MONGO_CONNECTION, DATABASE_NAME
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure, ServerSelectionTimeoutError, WriteConcernError
+from app.core.config import AGENT_NAME, EMOTION_WRITE_BEHIND_SECONDS, LITE_MODE, MONGO_CONNECTION, DATABASE_NAME
 
 from app.constants.validators import AGENT_RICH_VALIDATOR, AUTH_VALIDATOR, MEMORY_VALIDATOR, MESSAGES_VALIDATOR, SESSIONS_VALIDATOR, THOUGHT_VALIDATOR, USER_RICH_VALIDATOR
 from app.constants.validators import AGENT_LITE_VALIDATOR
-from app.constants.validators import CONVERSATION_VALIDATOR
+from app.constants.validators import CONVERSATION_MESSAGE_VALIDATOR, CONVERSATION_VALIDATOR
 from app.constants.validators import USER_LITE_VALIDATOR
-from app.domain.agent import ObjectId
+from bson import ObjectId
 from app.domain.memory import Memory
+from app.services import agent_state, emotion_buffer
 
 # ---- Globals guarded by a simple init flag
 _db_client: AsyncIOMotorClient | None = None
 _db_init_done: bool = False
 
+# ---- Scheduled write-behind flushes of agent emotion values, per agent name, and the flush writes
+# in flight (resolved once the write and its cache write-through have landed, or failed)
+_emotion_flushes: Dict[str, asyncio.Task] = {}
+_emotion_writes: Dict[str, Set[asyncio.Future]] = {}
+
 if LITE_MODE:
     AGENT_COLLECTION = AGENT_LITE_COLLECTION
     AGENT_VALIDATOR = AGENT_LITE_VALIDATOR
@@ -33,6 +41,7 @@ else:
 
 _VALIDATORS: Dict[str, Dict[str, Any]] = {
     CONVERSATION_COLLECTION: CONVERSATION_VALIDATOR,
+    CONVERSATION_MESSAGE_COLLECTION: CONVERSATION_MESSAGE_VALIDATOR,
     AGENT_COLLECTION:        AGENT_VALIDATOR,
     USER_COLLECTION:    USER_VALIDATOR,
     MEMORY_COLLECTION: MEMORY_VALIDATOR,
@@ -52,35 +61,120 @@ def _client_opts() -> Dict[str, Any]:
         # "tls": True, "tlsAllowInvalidCertificates": False,  # if applicable
     }
 
+# ---- Index plan: the indexes each query in this module (and auth) needs, per collection, with the
+# query they serve. Existing index names are kept so re-running against an initialized database is
+# a no-op. Indexes made redundant by a plan entry are listed in _RETIRED_INDEXES and dropped.
+_INDEX_PLAN: Dict[str, List[Dict[str, Any]]] = {
+    AGENT_COLLECTION: [
+        {"keys": [("name", 1)], "name": "name_1", "unique": True},  # grab_self, agent updates
+    ],
+    AUTH_COLLECTION: [
+        {"keys": [("email", 1)], "name": "email_unique", "unique": True, "sparse": True},  # login, claim
+        {"keys": [("username", 1)], "name": "username_unique", "unique": True, "sparse": True},
+        {"keys": [("_id", 1)], "name": "user_id"},
+    ],
+    USER_COLLECTION: [
+        {"keys": [("user_id", 1), ("agent_perspective", 1)], "name": "user_id_agent_perspective", "unique": True},  # grab_user
+        {"keys": [("username", 1), ("agent_perspective", 1)], "name": "username_agent_perspective", "unique": True},
+    ],
+    CONVERSATION_COLLECTION: [
+        {"keys": [("user_id", 1), ("agent_name", 1)], "name": "user_id_agent"},  # legacy embedded conversations (migration)
+    ],
+    CONVERSATION_MESSAGE_COLLECTION: [
+        # get_recent_conversation_messages, get_conversation_page (newest first, keyset paging)
+        {"keys": [("user_id", 1), ("agent_name", 1), ("timestamp", -1), ("_id", -1)], "name": "user_agent_time"},
+    ],
+    MESSAGE_COLLECTION: [
+        {"keys": [("agent", 1), ("_id", -1)], "name": "agent_id"},  # get_all_message_memory (newest first)
+        {"keys": [("sender", 1)], "name": "sender"},
+    ],
+    MEMORY_COLLECTION: [
+        {"keys": [("agent_name", 1), ("ts_created", -1)], "name": "agent_time"},
+        {"keys": [("tags", 1), ("_id", -1)], "name": "tags_id"},  # get_tagged_memories (newest first, paged by _id)
+        {"keys": [("recall_count", 1)], "name": "recalls"},
+    ],
+    THOUGHT_COLLECTION: [
+        {"keys": [("agent_name", 1), ("_id", -1)], "name": "agent_name_id"},  # get_thoughts (newest first)
+    ],
+    SESSIONS_COLLECTION: [
+        {"keys": [("_id", 1)], "name": "sid_unique"},  # session lookups
+        {"keys": [("user_id", 1), ("revoked", 1)], "name": "user_revoked"},  # revoke all user sessions
+        {"keys": [("expires_at", 1)], "name": "expires_ttl", "expireAfterSeconds": 0},
+    ],
+}
+
+# Prefixes of a plan index above; the compound index serves their queries too.
+_RETIRED_INDEXES: Dict[str, List[str]] = {
+    MEMORY_COLLECTION: ["tags"],
+    THOUGHT_COLLECTION: ["agent_name"],
+}
+
+# ---- Hot queries, explained at API startup (DB_QUERY_PLAN_CHECK) to catch a plan that stopped
+# using its index. Filter values only need the right shape.
+_HOT_QUERIES: List[Dict[str, Any]] = [
+    {"name": "grab_self", "collection": AGENT_COLLECTION, "filter": {"name": AGENT_NAME}},
+    {"name": "grab_user", "collection": USER_COLLECTION, "filter": {"user_id": "", "agent_perspective": AGENT_NAME}},
+    {"name": "get_recent_conversation_messages", "collection": CONVERSATION_MESSAGE_COLLECTION, "filter": {"user_id": "", "agent_name": AGENT_NAME}, "sort": [("timestamp", -1), ("_id", -1)]},
+    {"name": "get_all_message_memory", "collection": MESSAGE_COLLECTION, "filter": {"agent": AGENT_NAME}, "sort": [("_id", -1)]},
+    {"name": "get_thoughts", "collection": THOUGHT_COLLECTION, "filter": {"agent_name": AGENT_NAME}, "sort": [("_id", -1)]},
+    {"name": "get_tagged_memories", "collection": MEMORY_COLLECTION, "filter": {"tags": ""}, "sort": [("_id", -1)]},
+]
+
 async def _ensure_indexes(db):
-    await db[AGENT_COLLECTION].create_index("name", unique=True)
-    
-    await db[AUTH_COLLECTION].create_index("email", unique=True, sparse=True, name="email_unique")
-    await db[AUTH_COLLECTION].create_index("username", unique=True, sparse=True, name="username_unique")
-    await db[AUTH_COLLECTION].create_index("_id", name="user_id")
-    
-    await db[USER_COLLECTION].create_index([("user_id", 1), ("agent_perspective", 1)],unique=True,name="user_id_agent_perspective")
-    await db[USER_COLLECTION].create_index([("username", 1), ("agent_perspective", 1)],unique=True,name="username_agent_perspective")
-    
-    await db[CONVERSATION_COLLECTION].create_index(
-        [("user_id", 1), ("agent_name", 1)],
-        name="user_id_agent"
-    )
-    await db[MESSAGE_COLLECTION].create_index("sender", name="sender")
-    
-    await db[MEMORY_COLLECTION].create_index(
-        [("agent_name", 1), ("ts_created", -1)],
-        name="agent_time"
-    )
-    await db[MEMORY_COLLECTION].create_index("tags", name="tags")
-    await db[MEMORY_COLLECTION].create_index("recall_count", name="recalls")
-    
-    await db[THOUGHT_COLLECTION].create_index("agent_name", name="agent_name")
-    
-    # Sessions
-    await db[SESSIONS_COLLECTION].create_index("_id", name="sid_unique")
-    await db[SESSIONS_COLLECTION].create_index([("user_id", 1), ("revoked", 1)], name="user_revoked")
-    await db[SESSIONS_COLLECTION].create_index("expires_at", expireAfterSeconds=0, name="expires_ttl")
+    async def _create(collection: str, spec: Dict[str, Any]) -> None:
+        options = {k: v for k, v in spec.items() if k != "keys"}
+        await db[collection].create_index(spec["keys"], **options)
+
+    async def _retire(collection: str, name: str) -> None:
+        try:
+            await db[collection].drop_index(name)
+        except OperationFailure as e:
+            if e.code != 27:  # IndexNotFound: already gone
+                print(f"Warning - could not drop index '{name}' on '{collection}': {e}")
+
+    await asyncio.gather(*(
+        _create(collection, spec) for collection, specs in _INDEX_PLAN.items() for spec in specs
+    ))
+    await asyncio.gather(*(
+        _retire(collection, name) for collection, names in _RETIRED_INDEXES.items() for name in names
+    ))
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    # Every "stage" in an explain() plan tree (inputStage/inputStages, classic or SBE queryPlan).
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in _plan_stages(item)]
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan["stage"]] if isinstance(plan.get("stage"), str) else []
+    return stages + [stage for value in plan.values() for stage in _plan_stages(value)]
+
+
+async def check_query_plans() -> Dict[str, List[str]]:
+    """
+    Run explain() on the hot queries and warn about collection scans (COLLSCAN) and in-memory
+    sorts (SORT), which mean _INDEX_PLAN no longer covers the query. Returns the winning plan's
+    stages per query.
+    """
+    db = await get_database()
+    plans: Dict[str, List[str]] = {}
+    for query in _HOT_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"]).limit(query.get("limit", 10))
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        try:
+            explained = await cursor.explain()
+        except Exception as e:
+            print(f"Warning - explain failed for {query['name']}: {e}")
+            continue
+
+        stages = _plan_stages((explained.get("queryPlanner") or {}).get("winningPlan") or {})
+        plans[query["name"]] = stages
+        if "COLLSCAN" in stages:
+            print(f"Warning - {query['name']} scans the whole '{query['collection']}' collection (COLLSCAN); plan: {stages}")
+        elif "SORT" in stages:
+            print(f"Warning - {query['name']} sorts '{query['collection']}' results in memory (SORT); plan: {stages}")
+    return plans
 
 async def init_db() -> None:
     """
@@ -223,10 +317,15 @@ async def grab_self():
     """
     Grab self object based on the agent name.
     If the agent doesn't exist, create one with default values.
+    Served from the in-process agent-state cache when no process has written it since.
 
     :param agent_name: Name of the bot
     :return: Self object
     """
+    cached, version = await agent_state.lookup()
+    if cached is not None:
+        return emotion_buffer.overlay(cached, AGENT_NAME)
+
     db = await get_database()
     
     now = datetime.now()
@@ -239,8 +338,15 @@ async def grab_self():
         default_emotional_status = BASE_EMOTIONAL_STATUS
         
     agent_collection = db[AGENT_COLLECTION]
-    
-    self = await agent_collection.find_one({"name": AGENT_NAME})
+
+    # Read a document that predates every in-flight emotion write (overlay re-applies those): wait
+    # for them to land, and re-read if a flush started while reading.
+    while True:
+        await _emotion_writes_settled(AGENT_NAME)
+        taken = emotion_buffer.take_count(AGENT_NAME)
+        self = await agent_collection.find_one({"name": AGENT_NAME})
+        if emotion_buffer.take_count(AGENT_NAME) == taken:
+            break
 
     if not self:
         result = await agent_collection.insert_one({
@@ -253,34 +359,73 @@ async def grab_self():
             "birthdate": now
         })
         self = await agent_collection.find_one({"_id": result.inserted_id})
-            
-    return self
 
-async def get_conversation(user_id, agent_name=AGENT_NAME):
+    agent_state.store(self, version)
+    return emotion_buffer.overlay(self, AGENT_NAME)
+
+_CONVERSATION_ORDER = [("timestamp", -1), ("_id", -1)]  # newest first; _id breaks timestamp ties
+_CONVERSATION_INTERNAL_FIELDS = {"user_id": 0, "agent_name": 0, "legacy_conversation_id": 0}
+
+
+async def get_recent_conversation_messages(user_id, count, agent_name=AGENT_NAME) -> List[dict[str, Any]]:
     """
-    Grab conversation messages based on the username.
-    If no conversation exists, create a new conversation object.
+    Grab the last `count` messages of a user's conversation with the agent, oldest first.
 
-    :param username: username of the user
+    :param user_id: ID of the user
+    :param count: Number of messages
     :param agent_name: name of the agent
-    :return: Conversation object
+    :return: List of messages
     """
-    db = await get_database()
-    conversations_collection = db[CONVERSATION_COLLECTION]
-
-    user_conversation = await conversations_collection.find_one({"user_id": user_id, "agent_name": agent_name})
+    try:
+        db = await get_database()
+        cursor = (
+            db[CONVERSATION_MESSAGE_COLLECTION]
+            .find({"user_id": user_id, "agent_name": agent_name}, {"_id": 0, **_CONVERSATION_INTERNAL_FIELDS})
+            .sort(_CONVERSATION_ORDER)
+            .limit(count)
+        )
+        messages = await cursor.to_list(length=count)
+        messages.reverse()
+        return messages
+    except Exception as e:
+        print(e)
+        return []
 
-    if not user_conversation:
-        # Create a new conversation object if one doesn't exist
-        new_conversation = {
-            "user_id": user_id,
-            "agent_name": agent_name,
-            "messages": []
-        }
-        result = await conversations_collection.insert_one(new_conversation)
-        user_conversation = await conversations_collection.find_one({"_id": result.inserted_id})
+async def get_conversation_page(
+    user_id: str,
+    limit: int = 50,
+    before_id: Optional[str] = None,
+    agent_name: str = AGENT_NAME,
+) -> Tuple[List[dict[str, Any]], Optional[str]]:
+    """
+    Grab one page of a user's conversation, walking back from the newest message.
 
-    return user_conversation
+    :param user_id: ID of the user
+    :param limit: Page size
+    :param before_id: Cursor from the previous page (id of its oldest message); None for the newest page
+    :param agent_name: name of the agent
+    :return: The page's messages oldest first, and the cursor for the next (older) page or None
+    """
+    db = await get_database()
+    collection = db[CONVERSATION_MESSAGE_COLLECTION]
+    query: dict[str, Any] = {"user_id": user_id, "agent_name": agent_name}
+
+    if before_id:
+        anchor = await collection.find_one({**query, "_id": ObjectId(before_id)}, {"timestamp": 1})
+        if not anchor:
+            return [], None
+        query["$or"] = [
+            {"timestamp": {"$lt": anchor["timestamp"]}},
+            {"timestamp": anchor["timestamp"], "_id": {"$lt": anchor["_id"]}},
+        ]
+
+    # One extra document tells whether an older page exists.
+    cursor = collection.find(query, _CONVERSATION_INTERNAL_FIELDS).sort(_CONVERSATION_ORDER).limit(limit + 1)
+    messages = await cursor.to_list(length=limit + 1)
+    next_cursor = str(messages[limit - 1]["_id"]) if len(messages) > limit else None
+    messages = messages[:limit]
+    messages.reverse()
+    return messages, next_cursor
 
 async def get_all_agents():
     """
@@ -360,22 +505,12 @@ async def insert_message_to_conversation(
 ) -> None:
     try:
         db = await get_database()
-        conversation_collection = db[CONVERSATION_COLLECTION]
+        conversation_message_collection = db[CONVERSATION_MESSAGE_COLLECTION]
         normalized = _normalize_message_for_storage(message)
-        await conversation_collection.update_one(
-            {"user_id": user_id, "agent_name": agent_name}, 
-            { 
-            "$push": 
-                {
-                    "messages": {
-                        "$each": [normalized],
-                        "$slice": -1000 
-                        }
-                    },
-                "$setOnInsert": {"user_id": user_id, "agent_name": agent_name}
-            },
-            upsert=True
-        )
+        normalized.pop("_id", None)
+        normalized["user_id"] = user_id
+        normalized["agent_name"] = agent_name
+        await conversation_message_collection.insert_one(normalized)
     except Exception as e:
         print(e)
 
@@ -459,11 +594,12 @@ async def add_memory(mem: Memory):
 async def update_tags(new_tags: List[str]):
     try:
         db = await get_database()
-        agent_lite_collection = db[AGENT_LITE_COLLECTION]
-        await agent_lite_collection.update_one(
+        agent_collection = db[AGENT_COLLECTION]
+        await agent_collection.update_one(
             {AGENT_NAME_PROPERTY: AGENT_NAME},
             {"$addToSet": {"memory_tags": {"$each": new_tags}}}
         )
+        await agent_state.write_through(add_to_set={"memory_tags": new_tags})
     except Exception as e:
         print(e)
       
@@ -493,6 +629,8 @@ async def update_summary_identity_relationship(user_id, summary, extrinsic_relat
             normalized_relationship = "best friend"
 
         await agent_collection.update_one({"name": agent_name}, {"$set": {"identity": str(identity)}})
+        if agent_name == AGENT_NAME:
+            await agent_state.write_through(set_fields={"identity": str(identity)})
         await user_collection.update_one(
             {"user_id": user_id, "agent_perspective": agent_name},
             {"$set": {"summary": str(summary), "extrinsic_relationship": str(normalized_relationship)}},
@@ -500,19 +638,119 @@ async def update_summary_identity_relationship(user_id, summary, extrinsic_relat
     except Exception as e:
         print(e)
         
-async def update_agent_emotions(emotions, agent_name=AGENT_NAME):
+def _clamped_inc_pipeline(prefix: str, deltas: Dict[str, int]) -> List[Dict[str, Any]]:
+    """
+    Update pipeline adding each delta to `<prefix>.<trait>.value`, clamped to that trait's stored
+    min/max (0..100 if unset), so concurrent updates compose instead of overwriting each other.
+    """
+    fields: Dict[str, Any] = {}
+    for trait, delta in deltas.items():
+        path = f"{prefix}.{trait}"
+        added = {"$add": [{"$ifNull": [f"${path}.value", 0]}, int(delta)]}
+        fields[f"{path}.value"] = {
+            "$max": [{"$ifNull": [f"${path}.min", 0]}, {"$min": [{"$ifNull": [f"${path}.max", 100]}, added]}]
+        }
+    return [{"$set": fields}]
+
+
+async def queue_agent_emotions(deltas: Dict[str, int], reason: Optional[str] = None, agent_name=AGENT_NAME):
+    """
+    Queue emotion deltas (emotion -> change in value) for the agent. Deltas within
+    EMOTION_WRITE_BEHIND_SECONDS are summed and written as one clamped $inc of only the changed
+    `emotional_status.emotions.<k>.value` fields; 0 writes immediately.
+
+    Args:
+        deltas (dict): Value changes of the emotions that changed
+        reason (string): Updated emotional status reason, if any
+        agent_name (string): The agent's name
+    """
+    if not emotion_buffer.add(agent_name, deltas, reason):
+        return
+    if EMOTION_WRITE_BEHIND_SECONDS <= 0:
+        await flush_agent_emotions(agent_name)
+        return
+    task = _emotion_flushes.get(agent_name)
+    if task is None or task.done():
+        _emotion_flushes[agent_name] = asyncio.create_task(_flush_agent_emotions_later(agent_name))
+
+
+async def _flush_agent_emotions_later(agent_name: str):
+    await asyncio.sleep(EMOTION_WRITE_BEHIND_SECONDS)
+    _emotion_flushes.pop(agent_name, None)
+    await flush_agent_emotions(agent_name)
+
+
+async def _emotion_writes_settled(agent_name: str):
+    for write in list(_emotion_writes.get(agent_name, ())):
+        await asyncio.shield(write)
+
+
+def _write_not_applied(error: Exception) -> bool:
+    # The server never ran the update: no server was reachable, or it answered with an error. A
+    # write-concern error (or a network error mid-request) leaves the outcome unknown.
+    if isinstance(error, ServerSelectionTimeoutError):
+        return True
+    return isinstance(error, OperationFailure) and not isinstance(error, WriteConcernError)
+
+
+async def flush_agent_emotions(agent_name: Optional[str] = None):
+    """
+    Write queued emotion deltas now (one agent, or all when agent_name is None). The update stays
+    overlaid for this process's reads until the write and its cache write-through land.
+    """
+    for name in [agent_name] if agent_name else emotion_buffer.pending_agents():
+        task = _emotion_flushes.pop(name, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        entry = emotion_buffer.take(name)
+        if not entry:
+            continue
+
+        done = asyncio.get_running_loop().create_future()
+        _emotion_writes.setdefault(name, set()).add(done)
+        try:
+            await _write_agent_emotions(name, entry)
+        finally:
+            done.set_result(None)
+            _emotion_writes[name].discard(done)
+            if not _emotion_writes[name]:
+                _emotion_writes.pop(name, None)
+
+
+async def _write_agent_emotions(name: str, entry: Dict[str, Any]):
+    pipeline = _clamped_inc_pipeline("emotional_status.emotions", entry["deltas"])
+    if entry["reason"]:
+        pipeline[0]["$set"]["emotional_status.reason"] = {"$literal": str(entry["reason"])}
     try:
         db = await get_database()
-        if LITE_MODE:
-            agent_collection = db[AGENT_LITE_COLLECTION]
-        else:
-            agent_collection = db[AGENT_RICH_COLLECTION]
-        
-        await agent_collection.update_one({AGENT_NAME_PROPERTY: agent_name}, {"$set": {"emotional_status": emotions}})
-    
     except Exception as e:
-        print(e)
-        
+        emotion_buffer.restore(name, entry)
+        print(f"Error - flush_agent_emotions: {e}")
+        return
+    try:
+        updated = await db[AGENT_COLLECTION].find_one_and_update(
+            {AGENT_NAME_PROPERTY: name},
+            pipeline,
+            projection={"_id": 0, "emotional_status": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+    except Exception as e:
+        if _write_not_applied(e):
+            emotion_buffer.restore(name, entry)
+        else:
+            # May have been applied: re-queueing could apply the deltas twice, so drop them and make
+            # every process re-read the agent document instead.
+            emotion_buffer.discard(name, entry)
+            if name == AGENT_NAME:
+                await agent_state.invalidate()
+        print(f"Error - flush_agent_emotions: {e}")
+        return
+    if name == AGENT_NAME and updated:
+        await agent_state.write_through(set_fields={"emotional_status": updated["emotional_status"]})
+    # No await between the write-through patching the cache and the entry leaving the overlay.
+    emotion_buffer.landed(name, entry, len(pipeline[0]["$set"]))
+
+
 async def update_agent_expression(expression, agent_name=AGENT_NAME):
     try:
         db = await get_database()
@@ -522,24 +760,43 @@ async def update_agent_expression(expression, agent_name=AGENT_NAME):
             agent_collection = db[AGENT_RICH_COLLECTION]
         
         await agent_collection.update_one({AGENT_NAME_PROPERTY: agent_name}, {"$set": {"global_expression": expression}})
+        if agent_name == AGENT_NAME:
+            await agent_state.write_through(set_fields={"global_expression": expression})
     
     except Exception as e:
         print(e)
         
-async def update_user_sentiment(user_id, sentiments):
+async def apply_user_sentiment_deltas(user_id, deltas: Dict[str, int], reason: Optional[str] = None, agent_name=AGENT_NAME):
+    """Adds sentiment deltas toward a user in one clamped $inc and returns the updated sentiment_status
+
+    Args:
+        user_id (string): The user's ID
+        deltas (dict): Value changes per sentiment
+        reason (string): Updated sentiment reason, if any
+        agent_name (string): The agent's name
+    """
     try:
         db = await get_database()
         if LITE_MODE:
             user_collection = db[USER_LITE_COLLECTION]
         else:
             user_collection = db[USER_RICH_COLLECTION]
-        
-        await user_collection.update_one(
-            {"user_id": user_id},
-            {"$set": {"sentiment_status": sentiments, "last_interaction": datetime.now()}},
+
+        pipeline = _clamped_inc_pipeline("sentiment_status.sentiments", {k: d for k, d in deltas.items() if d})
+        pipeline[0]["$set"]["last_interaction"] = datetime.now()
+        if reason:
+            pipeline[0]["$set"]["sentiment_status.reason"] = {"$literal": str(reason)}
+
+        updated = await user_collection.find_one_and_update(
+            {"user_id": user_id, "agent_perspective": agent_name},
+            pipeline,
+            projection={"_id": 0, "sentiment_status": 1},
+            return_document=ReturnDocument.AFTER,
         )
+        return (updated or {}).get("sentiment_status")
     except Exception as e:
         print(e)
+        return None
         
 async def ensure_user_and_profile(user_id: str, username: str, agent_name: str = AGENT_NAME):
     """
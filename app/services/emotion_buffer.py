@@ -0,0 +1,118 @@
+from typing import Any, Dict, List, Optional
+
+# ---- Write-behind buffer for agent emotions: agent name -> summed per-emotion deltas (and the latest
+# reason) not yet written to Mongo. database.queue_agent_emotions fills it and flushes it as one
+# clamped $inc per agent; grab_self overlays it so this process reads its own writes.
+_pending: Dict[str, Dict[str, Any]] = {}
+# Entries taken for a flush whose write (and cache write-through) hasn't landed yet. Still overlaid,
+# so a read during the flush sees them; `_taken` counts takes per agent so readers can tell whether a
+# flush started while they were reading.
+_in_flight: Dict[str, List[Dict[str, Any]]] = {}
+_taken: Dict[str, int] = {}
+_stats: Dict[str, int] = {
+    "queued": 0,
+    "coalesced": 0,
+    "flushes": 0,
+    "fields_written": 0,
+    "flush_errors": 0,
+    "flush_outcome_unknown": 0,
+}
+
+
+def _merge(into: Dict[str, int], deltas: Dict[str, int]) -> None:
+    for key, delta in deltas.items():
+        into[key] = into.get(key, 0) + int(delta)
+
+
+def add(agent_name: str, deltas: Dict[str, int], reason: Optional[str] = None) -> bool:
+    """Add emotion deltas to the agent's pending update (summed per emotion). False if nothing to add."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas and not reason:
+        return False
+    entry = _pending.setdefault(agent_name, {"deltas": {}, "reason": None})
+    _stats["queued"] += 1
+    _stats["coalesced"] += sum(1 for key in deltas if key in entry["deltas"])
+    _merge(entry["deltas"], deltas)
+    if reason:
+        entry["reason"] = reason
+    return True
+
+
+def take(agent_name: str) -> Optional[Dict[str, Any]]:
+    """Move the agent's pending update in flight for a flush; it stays overlaid until settled."""
+    entry = _pending.pop(agent_name, None)
+    if entry is not None:
+        _in_flight.setdefault(agent_name, []).append(entry)
+        _taken[agent_name] = _taken.get(agent_name, 0) + 1
+    return entry
+
+
+def _settle(agent_name: str, entry: Dict[str, Any]) -> None:
+    entries = _in_flight.get(agent_name) or []
+    if any(e is entry for e in entries):
+        entries[:] = [e for e in entries if e is not entry]
+    if not entries:
+        _in_flight.pop(agent_name, None)
+
+
+def landed(agent_name: str, entry: Dict[str, Any], fields: int) -> None:
+    """The flush of `entry` was written (and mirrored into the cache)."""
+    _settle(agent_name, entry)
+    _stats["flushes"] += 1
+    _stats["fields_written"] += fields
+
+
+def restore(agent_name: str, entry: Dict[str, Any]) -> None:
+    """Put back an update whose flush definitely wasn't applied, keeping anything queued since."""
+    _settle(agent_name, entry)
+    current = _pending.setdefault(agent_name, {"deltas": {}, "reason": None})
+    _merge(current["deltas"], entry["deltas"])
+    current["reason"] = current["reason"] or entry["reason"]
+    _stats["flush_errors"] += 1
+
+
+def discard(agent_name: str, entry: Dict[str, Any]) -> None:
+    """Drop an update whose flush may or may not have been applied (re-queueing could apply it twice)."""
+    _settle(agent_name, entry)
+    _stats["flush_outcome_unknown"] += 1
+
+
+def in_flight(agent_name: str) -> bool:
+    return bool(_in_flight.get(agent_name))
+
+
+def take_count(agent_name: str) -> int:
+    return _taken.get(agent_name, 0)
+
+
+def pending_agents() -> list:
+    return list(_pending)
+
+
+def overlay(doc: Optional[Dict[str, Any]], agent_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Apply the agent's unwritten emotion deltas (in flight, then pending) to an agent document, in
+    place. `doc` must predate the in-flight writes (see database.grab_self).
+    """
+    entries = [*(_in_flight.get(agent_name) or []), *([_pending[agent_name]] if agent_name in _pending else [])]
+    if not doc or not entries:
+        return doc
+    status = doc.get("emotional_status") or {}
+    emotions = status.get("emotions") or {}
+    for entry in entries:
+        for key, delta in entry["deltas"].items():
+            trait = emotions.get(key)
+            if isinstance(trait, dict):
+                trait["value"] = max(trait.get("min", 0), min(trait.get("max", 100), trait.get("value", 0) + delta))
+        if entry["reason"]:
+            status["reason"] = entry["reason"]
+    return doc
+
+
+def buffer_stats() -> Dict[str, Any]:
+    return {
+        **_stats,
+        "pending_agents": len(_pending),
+        "in_flight_agents": len(_in_flight),
+        "pending_fields": sum(len(entry["deltas"]) for entry in _pending.values()),
+    }
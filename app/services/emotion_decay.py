@@ -1,7 +1,7 @@
 import asyncio
 from app.core.config import EMOTIONAL_DECAY_RATE
 from app.domain.state import BoundedTrait, EmotionalDelta, EmotionalState
-from app.services.database import grab_self, update_agent_emotions
+from app.services.database import grab_self, queue_agent_emotions
 from app.services.state_reducer import apply_deltas_emotional_decay
 
 async def emotion_decay_loop(decay_rate: int = EMOTIONAL_DECAY_RATE):
@@ -31,14 +31,9 @@ async def emotion_decay_loop(decay_rate: int = EMOTIONAL_DECAY_RATE):
                     EmotionalDelta(deltas=deltas, reason="decay", confidence=1.0), cap=7.0
                 )
                 
-                # Persist back as INTs (validator requires bsonType: "int")
-                self["emotional_status"]["emotions"] = {
-                    k: decayed.emotions[k].model_dump() for k in decayed.emotions
-                }
-                if decayed.reason:
-                    self["emotional_status"]["reason"] = decayed.reason
-                
-                await update_agent_emotions(self["emotional_status"])     
+                # Persist only the per-emotion changes as INTs (validator requires bsonType: "int")
+                changed = {k: decayed.emotions[k].value - emo.emotions[k].value for k in deltas}
+                await queue_agent_emotions(changed, decayed.reason)
     
         except Exception as e:
             print(f"Error - Emotional decay: {e}")
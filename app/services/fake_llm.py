@@ -0,0 +1,167 @@
+import asyncio
+import json
+import math
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import (
+    LLM_FAKE_FAILURE_RATE,
+    LLM_FAKE_FAST_LATENCY_MS,
+    LLM_FAKE_LATENCY_SIGMA,
+    LLM_FAKE_QUALITY_LATENCY_MS,
+    LLM_FAKE_SEED,
+)
+
+FAKE_BASE_URL = "http://fake-llm/v1"
+FAKE_FAST_MODEL = "fake-fast"
+FAKE_QUALITY_MODEL = "fake-quality"
+
+# Share of the sampled latency spent before the first streamed chunk; the rest is spread over chunks.
+_FIRST_CHUNK_SHARE = 0.25
+_CHUNK_CHARS = 16
+
+_WORDS = (
+    "the quiet morning felt warm and a little strange while we talked about music tea walks "
+    "memories plans small joys and the way light moves through the window in late afternoon"
+).split()
+
+_rng = random.Random(LLM_FAKE_SEED)
+
+
+def _words(min_length: int, max_length: Optional[int]) -> str:
+    target = max(min_length, _rng.randint(24, 160))
+    if max_length is not None:
+        target = min(target, max_length)
+    text = ""
+    while len(text) < target:
+        text = f"{text} {_rng.choice(_WORDS)}" if text else _rng.choice(_WORDS).capitalize()
+    return text[:max_length] if max_length is not None else text
+
+
+def fake_payload(node: Any) -> Any:
+    """A random value that satisfies the JSON-schema `node` (the subset used in app/constants/schemas.py)."""
+    if not isinstance(node, dict):
+        return None
+    if "enum" in node:
+        return _rng.choice(list(node["enum"]))
+    type_spec = node.get("type")
+    type_name = _rng.choice(type_spec) if isinstance(type_spec, list) else type_spec
+    if type_name == "object" or "properties" in node:
+        payload = {key: fake_payload(sub) for key, sub in (node.get("properties") or {}).items()}
+        additional = node.get("additionalProperties")
+        if isinstance(additional, dict) and not payload:
+            payload = {f"key_{i}": fake_payload(additional) for i in range(_rng.randint(1, 3))}
+        return payload
+    if type_name == "array":
+        min_items = node.get("minItems", 0)
+        max_items = node.get("maxItems")
+        count = min_items + _rng.randint(0, 2)
+        if isinstance(max_items, int):
+            count = min(count, max_items)
+        items: List[Any] = []
+        for _ in range(count * 10):
+            if len(items) >= count:
+                break
+            item = fake_payload(node.get("items") or {})
+            if not (node.get("uniqueItems") and item in items):
+                items.append(item)
+        return items
+    if type_name == "string":
+        max_length = node.get("maxLength")
+        return _words(node.get("minLength", 0), max_length if isinstance(max_length, int) else None)
+    if type_name in ("number", "integer"):
+        low = node.get("minimum", 0)
+        high = node.get("maximum", low + 10)
+        return _rng.randint(math.ceil(low), math.floor(high)) if type_name == "integer" else round(_rng.uniform(low, high), 2)
+    if type_name == "boolean":
+        return _rng.random() < 0.5
+    return None
+
+
+def _schema_from_request(body: Dict[str, Any]) -> Dict[str, Any]:
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return (response_format.get("json_schema") or {}).get("schema") or {}
+    return {"type": "object"}
+
+
+def _latency_seconds(model: str) -> float:
+    # Lognormal around the configured median: LLM latencies are right-skewed.
+    median_ms = LLM_FAKE_QUALITY_LATENCY_MS if model == FAKE_QUALITY_MODEL else LLM_FAKE_FAST_LATENCY_MS
+    return max(0.0, median_ms * math.exp(_rng.gauss(0.0, LLM_FAKE_LATENCY_SIGMA))) / 1000.0
+
+
+def _usage(body: Dict[str, Any], content: str) -> Dict[str, int]:
+    prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages") or []) // 4
+    completion_tokens = max(1, len(content) // 4)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+def _chunk(model: str, delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+class FakeLLMTransport(httpx.AsyncBaseTransport):
+    """
+    In-process stand-in for an OpenAI-compatible chat completions endpoint (LLM_MODE=fake).
+    Answers with random schema-valid JSON for the request's response_format after a lognormal
+    latency (LLM_FAKE_*_LATENCY_MS, LLM_FAKE_LATENCY_SIGMA), streams it when asked, and fails
+    a share of requests with HTTP 500 (LLM_FAKE_FAILURE_RATE). Seed with LLM_FAKE_SEED for
+    repeatable runs.
+    """
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(await request.aread() or b"{}")
+        model = body.get("model") or FAKE_FAST_MODEL
+        latency = _latency_seconds(model)
+
+        if _rng.random() < LLM_FAKE_FAILURE_RATE:
+            await asyncio.sleep(latency * _FIRST_CHUNK_SHARE)
+            return httpx.Response(500, json={"error": {"message": "fake provider failure", "type": "server_error"}})
+
+        content = json.dumps(fake_payload(_schema_from_request(body)))
+        usage = _usage(body, content)
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=self._stream(model, content, usage if include_usage else None, latency),
+            )
+
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json={
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    async def _stream(
+        self, model: str, content: str, usage: Optional[Dict[str, int]], latency: float
+    ) -> AsyncIterator[bytes]:
+        chunks = [content[i : i + _CHUNK_CHARS] for i in range(0, len(content), _CHUNK_CHARS)]
+        per_chunk = latency * (1 - _FIRST_CHUNK_SHARE) / max(len(chunks), 1)
+        await asyncio.sleep(latency * _FIRST_CHUNK_SHARE)
+        events = [_chunk(model, {"role": "assistant", "content": ""})]
+        for text in chunks:
+            events.append(_chunk(model, {"content": text}))
+        events.append(_chunk(model, {}, finish_reason="stop"))
+        if usage is not None:
+            events.append({**_chunk(model, {}), "choices": [], "usage": usage})
+        for event in events:
+            if event["choices"] and event["choices"][0]["delta"].get("content"):
+                await asyncio.sleep(per_chunk)
+            yield f"data: {json.dumps(event)}\n\n".encode("utf-8")
+        yield b"data: [DONE]\n\n"
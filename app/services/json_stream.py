@@ -0,0 +1,210 @@
+import json
+import re
+from typing import List, Optional, Sequence, Tuple
+
+# Nested spans tried after an enclosing object fails to parse; bounds the work on
+# pathological inputs (e.g. thousands of balanced but invalid braces).
+MAX_NESTED_CANDIDATES = 32
+# Rescans from a later '{' when an object never closes (e.g. an unterminated string
+# flipped the quote state for the rest of the text).
+MAX_RESTARTS = 8
+
+# The only characters that change the extractor's state; everything between them is skipped in C.
+_STRUCTURAL = re.compile(r'[{}"\\]')
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JsonStringFieldStream:
+    """
+    Incrementally decodes one string field, addressed by its object-key path, out of a JSON
+    document that arrives in arbitrary chunks (e.g. streamed completion deltas).
+
+        field = JsonStringFieldStream(("response", "message"))
+        for chunk in chunks:
+            text = field.feed(chunk)  # newly decoded characters of response.message, possibly ""
+
+    Single pass, O(1) state per character; no partial JSON is re-parsed. Text outside the JSON
+    value (markdown fences, prose) is ignored as long as it contains no braces or quotes.
+    """
+
+    def __init__(self, path: Sequence[str]):
+        self._path = tuple(path)
+        self._keys: List[Optional[str]] = []  # current key per open container (None for arrays)
+        self._objects: List[bool] = []  # whether each open container is an object
+        self._expect_key = False
+        self._in_string = False
+        self._string_is_key = False
+        self._capturing = False
+        self._escape = False
+        self._unicode: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        self._key_chars: List[str] = []
+        self.text = ""
+        self.complete = False
+
+    def _emit(self, out: List[str], ch: str) -> None:
+        if self._string_is_key:
+            self._key_chars.append(ch)
+        elif self._capturing:
+            out.append(ch)
+
+    def _emit_code_point(self, out: List[str], code: int) -> None:
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        self._emit(out, chr(code))
+
+    def feed(self, chunk: str) -> str:
+        out: List[str] = []
+        for ch in chunk:
+            if self._in_string:
+                if self._unicode is not None:
+                    self._unicode += ch
+                    if len(self._unicode) == 4:
+                        try:
+                            self._emit_code_point(out, int(self._unicode, 16))
+                        except ValueError:
+                            pass
+                        self._unicode = None
+                elif self._escape:
+                    self._escape = False
+                    if ch == "u":
+                        self._unicode = ""
+                    else:
+                        self._emit(out, _ESCAPES.get(ch, ch))
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._keys[-1] = "".join(self._key_chars)
+                    elif self._capturing:
+                        self._capturing = False
+                        self.complete = True
+                else:
+                    self._emit(out, ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_is_key = bool(self._objects) and self._objects[-1] and self._expect_key
+                self._key_chars = []
+                self._capturing = (
+                    not self._string_is_key and not self.complete and tuple(self._keys) == self._path
+                )
+            elif ch in "{[":
+                self._objects.append(ch == "{")
+                self._keys.append(None)
+                self._expect_key = ch == "{"
+            elif ch in "}]":
+                if self._objects:
+                    self._objects.pop()
+                    self._keys.pop()
+                self._expect_key = False
+            elif ch == ":":
+                self._expect_key = False
+            elif ch == ",":
+                self._expect_key = bool(self._objects) and self._objects[-1]
+
+        text = "".join(out)
+        self.text += text
+        return text
+
+
+class JsonObjectExtractor:
+    """
+    Finds the first parseable JSON object in text that may be wrapped in prose or arrive in chunks.
+
+        extractor = JsonObjectExtractor()
+        for chunk in chunks:
+            found = extractor.feed(chunk)  # the object's source text once it is complete, else None
+        found = found or extractor.finish()  # raises ValueError if there is none
+
+    The text is scanned once (jumping between braces, quotes, and backslashes), tracking depth and string state. Only a balanced
+    top-level `{...}` is handed to json.loads; if it doesn't parse, the objects nested inside it
+    are tried in order of their start (as are those inside an unterminated, truncated object).
+    If an object never closes, finish() rescans from the next '{' a bounded number of times.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._scanned = 0
+        self._open: List[int] = []  # start offsets of unclosed '{'
+        self._nested: List[Tuple[int, int]] = []  # closed spans inside the current top-level object
+        self._in_string = False
+        self._skip_until = 0  # offset just past an escaped character
+        self.result: Optional[str] = None
+
+    @staticmethod
+    def _parses(candidate: str) -> bool:
+        try:
+            json.loads(candidate)
+            return True
+        except (ValueError, RecursionError):
+            return False
+
+    def _first_nested(self) -> Optional[str]:
+        for start, end in sorted(self._nested)[:MAX_NESTED_CANDIDATES]:
+            candidate = self._text[start:end]
+            if self._parses(candidate):
+                return candidate
+        return None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        if self.result is not None:
+            return self.result
+        self._text += chunk
+        text = self._text
+        for match in _STRUCTURAL.finditer(text, self._scanned):
+            idx = match.start()
+            if idx < self._skip_until:
+                continue
+            ch = text[idx]
+            if not self._open:
+                # Outside any object: prose, fences, or quotes there don't affect the scan.
+                if ch == "{":
+                    self._open.append(idx)
+                continue
+            if self._in_string:
+                if ch == "\\":
+                    self._skip_until = idx + 2
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._open.append(idx)
+            elif ch == "}":
+                start = self._open.pop()
+                if self._open:
+                    self._nested.append((start, idx + 1))
+                    continue
+                candidate = text[start : idx + 1]
+                found = candidate if self._parses(candidate) else self._first_nested()
+                self._nested.clear()
+                if found is not None:
+                    self._scanned = idx + 1
+                    self.result = found
+                    return found
+        self._scanned = len(text)
+        return None
+
+    def finish(self, restarts: int = MAX_RESTARTS) -> str:
+        if self.result is None and self._open:
+            # Truncated output: an object nested in the unterminated one may still be complete.
+            self.result = self._first_nested()
+            next_start = self._text.find("{", self._open[0] + 1)
+            if self.result is None and restarts > 0 and next_start != -1:
+                rescan = JsonObjectExtractor()
+                try:
+                    self.result = rescan.feed(self._text[next_start:]) or rescan.finish(restarts - 1)
+                except ValueError:
+                    pass
+        if self.result is None:
+            raise ValueError("No JSON object found in model response.")
+        return self.result
@@ -0,0 +1,232 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager, nullcontext
+from typing import Any, AsyncContextManager, AsyncIterator, Deque, Dict, Optional
+
+import httpx
+import openai
+
+from app.core.config import (
+    LLM_BREAKER_ENABLED,
+    LLM_BREAKER_FAILURE_RATE,
+    LLM_BREAKER_MIN_CALLS,
+    LLM_BREAKER_OPEN_SECONDS,
+    LLM_BREAKER_SLOW_CALL_SECONDS,
+    LLM_BREAKER_WINDOW,
+    LLM_FAILOVER_ENABLED,
+)
+from app.core.redis_queue import get_redis
+
+_REDIS_STATE_KEY = "llm_breaker:state"
+_REDIS_STATS_KEY = "llm_breaker:stats"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider/model whose breaker is open."""
+
+
+# ---- Per (mode, model) breakers. State is process-local so each worker stops calling a
+# failing provider on its own evidence; transitions and counters are mirrored to Redis for reporting.
+_breakers: Dict[str, Dict[str, Any]] = {}
+
+
+def _key(mode: str, model: str) -> str:
+    return f"{mode}:{model}"
+
+
+def _breaker(key: str) -> Dict[str, Any]:
+    return _breakers.setdefault(key, {
+        "state": CLOSED,
+        "outcomes": deque(maxlen=max(1, LLM_BREAKER_WINDOW)),
+        "opened_at": 0.0,
+        "probe_in_flight": False,
+        "trips": 0,
+        "rejected": 0,
+        "failovers": 0,
+    })
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Errors that say the provider is unhealthy (not that the model answered badly)."""
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    return isinstance(error, (asyncio.TimeoutError, httpx.TransportError))
+
+
+def _failure_rate(outcomes: Deque[bool]) -> float:
+    return sum(outcomes) / len(outcomes) if outcomes else 0.0
+
+
+def _cooldown_elapsed(breaker: Dict[str, Any]) -> bool:
+    return time.monotonic() - breaker["opened_at"] >= LLM_BREAKER_OPEN_SECONDS
+
+
+def breaker_allows(mode: str, model: str) -> bool:
+    """Whether a call to (mode, model) would be admitted right now. No side effects."""
+    if not LLM_BREAKER_ENABLED:
+        return True
+    breaker = _breakers.get(_key(mode, model))
+    if breaker is None or breaker["state"] == CLOSED:
+        return True
+    if breaker["state"] == OPEN:
+        return _cooldown_elapsed(breaker)
+    return not breaker["probe_in_flight"]
+
+
+def _redis_write(key: str, state: Optional[str], counters: Dict[str, int]) -> None:
+    pipe = get_redis().pipeline(transaction=False)
+    if state is not None:
+        pipe.hset(_REDIS_STATE_KEY, key, state)
+    for field, amount in counters.items():
+        pipe.hincrby(_REDIS_STATS_KEY, f"{key}:{field}", amount)
+    pipe.execute()
+
+
+async def _publish(key: str, state: Optional[str] = None, **counters: int) -> None:
+    try:
+        await asyncio.to_thread(_redis_write, key, state, counters)
+    except Exception:
+        pass
+
+
+def _transition(key: str, breaker: Dict[str, Any], state: str) -> Dict[str, int]:
+    # Synchronous so concurrent calls never observe a half-applied transition; returns counters to publish.
+    previous = breaker["state"]
+    breaker["state"] = state
+    breaker["outcomes"].clear()
+    counters: Dict[str, int] = {}
+    if state == OPEN:
+        breaker["opened_at"] = time.monotonic()
+        if previous == CLOSED:
+            breaker["trips"] += 1
+            counters["trips"] = 1
+    print(f"llm_breaker: {key} {previous} -> {state}")
+    return counters
+
+
+async def _record(key: str, breaker: Dict[str, Any], failed: bool) -> None:
+    if breaker["state"] == HALF_OPEN:
+        state = OPEN if failed else CLOSED
+        await _publish(key, state, **_transition(key, breaker, state))
+        return
+    if breaker["state"] != CLOSED:
+        return
+    outcomes = breaker["outcomes"]
+    outcomes.append(failed)
+    if len(outcomes) >= LLM_BREAKER_MIN_CALLS and _failure_rate(outcomes) >= LLM_BREAKER_FAILURE_RATE:
+        await _publish(key, OPEN, **_transition(key, breaker, OPEN))
+
+
+def _is_slow(start: float) -> bool:
+    return LLM_BREAKER_SLOW_CALL_SECONDS > 0 and time.perf_counter() - start >= LLM_BREAKER_SLOW_CALL_SECONDS
+
+
+@asynccontextmanager
+async def circuit(
+    mode: str,
+    model: str,
+    admission: Optional[AsyncContextManager[Any]] = None,
+) -> AsyncIterator[None]:
+    """
+    Guard one upstream request to (mode, model). Raises CircuitOpenError without calling out while
+    the breaker is open; otherwise enters `admission` (e.g. the limiter slot) and records the request
+    as a failure if it raised a provider error or took longer than LLM_BREAKER_SLOW_CALL_SECONDS,
+    timed from admission so queueing for a slot never counts as a slow provider.
+    Cancelled requests are not counted.
+    """
+    admission = admission or nullcontext()
+    if not LLM_BREAKER_ENABLED:
+        async with admission:
+            yield
+        return
+
+    key = _key(mode, model)
+    breaker = _breaker(key)
+    half_opened = breaker["state"] == OPEN and _cooldown_elapsed(breaker)
+    if half_opened:
+        _transition(key, breaker, HALF_OPEN)
+    if breaker["state"] == OPEN or (breaker["state"] == HALF_OPEN and breaker["probe_in_flight"]):
+        breaker["rejected"] += 1
+        await _publish(key, rejected=1)
+        raise CircuitOpenError(f"circuit open for {key}")
+
+    probe = breaker["state"] == HALF_OPEN
+    if probe:
+        breaker["probe_in_flight"] = True
+    if half_opened:
+        await _publish(key, HALF_OPEN)
+    try:
+        async with admission:
+            start = time.perf_counter()
+            try:
+                yield
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                await _record(key, breaker, is_provider_failure(error) or _is_slow(start))
+                raise
+            else:
+                await _record(key, breaker, _is_slow(start))
+    finally:
+        if probe:
+            breaker["probe_in_flight"] = False
+
+
+async def record_failover(mode: str, model: str) -> None:
+    """Count a call routed away from (mode, model) because its breaker was open."""
+    key = _key(mode, model)
+    _breaker(key)["failovers"] += 1
+    await _publish(key, failovers=1)
+
+
+def _snapshot(breaker: Dict[str, Any]) -> Dict[str, Any]:
+    remaining = None
+    if breaker["state"] == OPEN:
+        remaining = round(max(0.0, LLM_BREAKER_OPEN_SECONDS - (time.monotonic() - breaker["opened_at"])), 1)
+    return {
+        "state": breaker["state"],
+        "window_calls": len(breaker["outcomes"]),
+        "window_failure_rate": round(_failure_rate(breaker["outcomes"]), 3),
+        "open_remaining_seconds": remaining,
+        "trips": breaker["trips"],
+        "rejected": breaker["rejected"],
+        "failovers": breaker["failovers"],
+    }
+
+
+def _cluster_snapshot() -> Dict[str, Any]:
+    conn = get_redis()
+    per_key: Dict[str, Dict[str, Any]] = {}
+    for key, value in (conn.hgetall(_REDIS_STATE_KEY) or {}).items():
+        key = key.decode() if isinstance(key, bytes) else str(key)
+        per_key.setdefault(key, {})["last_state"] = value.decode() if isinstance(value, bytes) else str(value)
+    for key, value in (conn.hgetall(_REDIS_STATS_KEY) or {}).items():
+        key = key.decode() if isinstance(key, bytes) else str(key)
+        name, _, field = key.rpartition(":")
+        per_key.setdefault(name, {})[field] = int(value)
+    return per_key
+
+
+def breaker_stats() -> Dict[str, Any]:
+    """
+    Circuit breaker state per provider mode + model (this process), plus trip/reject/failover
+    counters and the last transition seen by any worker (Redis).
+    Blocking (Redis read); call via asyncio.to_thread from async code.
+    """
+    cluster: Optional[Dict[str, Any]] = None
+    try:
+        cluster = _cluster_snapshot()
+    except Exception:
+        cluster = None
+
+    return {
+        "enabled": LLM_BREAKER_ENABLED,
+        "failover_enabled": LLM_FAILOVER_ENABLED,
+        "process": {key: _snapshot(breaker) for key, breaker in _breakers.items()},
+        "cluster": cluster,
+    }
@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.constants.schema_registry import schema_entry
+from app.core.config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_REDIS,
+    LLM_CACHE_SCHEMA_TTLS,
+    LLM_CACHE_TTL_SECONDS,
+)
+from app.core.redis_queue import get_redis
+
+_REDIS_KEY_PREFIX = "llm_cache:"
+_REDIS_STATS_KEY = "llm_cache:stats"
+
+# ---- In-process LRU tier: key -> (expires_at, serialized payload)
+_memory: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+_stats: Dict[str, int] = {
+    "memory_hits": 0,
+    "redis_hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0,
+}
+
+
+def schema_name(schema: Dict[str, Any]) -> str:
+    return schema_entry(schema).name
+
+
+def request_fingerprint(mode: str, model: str, messages: List[Dict[str, Any]], schema: Dict[str, Any]) -> str:
+    """
+    Stable content hash of everything that determines an LLM answer.
+    Messages may carry datetimes/ObjectIds, so fall back to str() for those. The schema enters
+    as its precomputed content hash rather than being re-serialized per call.
+    """
+    canonical = json.dumps(
+        {"mode": mode, "model": model, "messages": messages, "schema": schema_entry(schema).digest},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def ttl_for_schema(schema: Dict[str, Any]) -> int:
+    return LLM_CACHE_SCHEMA_TTLS.get(schema_name(schema), LLM_CACHE_TTL_SECONDS)
+
+
+def cache_enabled_for(schema: Dict[str, Any]) -> bool:
+    return LLM_CACHE_ENABLED and ttl_for_schema(schema) > 0
+
+
+def _count(stat: str) -> None:
+    _stats[stat] += 1
+
+
+def _memory_get(key: str) -> Optional[str]:
+    entry = _memory.get(key)
+    if entry is None:
+        return None
+    expires_at, payload = entry
+    if expires_at <= time.monotonic():
+        _memory.pop(key, None)
+        return None
+    _memory.move_to_end(key)
+    return payload
+
+
+def _memory_set(key: str, payload: str, ttl: int) -> None:
+    _memory[key] = (time.monotonic() + ttl, payload)
+    _memory.move_to_end(key)
+    while len(_memory) > max(1, LLM_CACHE_MAX_ENTRIES):
+        _memory.popitem(last=False)
+        _count("evictions")
+
+
+def _redis_get(key: str) -> Optional[str]:
+    raw = get_redis().get(_REDIS_KEY_PREFIX + key)
+    if raw is None:
+        return None
+    return raw.decode("utf-8") if isinstance(raw, bytes) else str(raw)
+
+
+def _redis_set(key: str, payload: str, ttl: int) -> None:
+    get_redis().setex(_REDIS_KEY_PREFIX + key, ttl, payload)
+
+
+def _redis_record(stat: str) -> None:
+    get_redis().hincrby(_REDIS_STATS_KEY, stat, 1)
+
+
+async def _record(stat: str) -> None:
+    _count(stat)
+    if LLM_CACHE_REDIS:
+        try:
+            await asyncio.to_thread(_redis_record, stat)
+        except Exception:
+            pass
+
+
+async def cache_get(key: str, schema: Dict[str, Any]) -> Optional[Any]:
+    """
+    Look up a cached parsed response. Memory first, then Redis (shared across workers).
+    Returns a fresh copy so callers can mutate it freely. Redis failures count as misses.
+    """
+    payload = _memory_get(key)
+    stat = "memory_hits"
+
+    if payload is None:
+        stat = "misses"
+        if LLM_CACHE_REDIS:
+            try:
+                payload = await asyncio.to_thread(_redis_get, key)
+            except Exception as e:
+                print(f"Error - llm_cache.cache_get: {e}")
+            if payload is not None:
+                # Promote into the local tier so repeat lookups skip the round trip.
+                _memory_set(key, payload, ttl_for_schema(schema))
+                stat = "redis_hits"
+
+    await _record(stat)
+    return json.loads(payload) if payload is not None else None
+
+
+async def cache_set(key: str, value: Any, schema: Dict[str, Any]) -> None:
+    ttl = ttl_for_schema(schema)
+    if ttl <= 0 or value is None:
+        return
+    try:
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+    except Exception as e:
+        print(f"Error - llm_cache.cache_set: {e}")
+        return
+
+    _memory_set(key, payload, ttl)
+    await _record("stores")
+
+    if LLM_CACHE_REDIS:
+        try:
+            await asyncio.to_thread(_redis_set, key, payload, ttl)
+        except Exception as e:
+            print(f"Error - llm_cache.cache_set: {e}")
+
+
+def _hit_rate(hits: int, misses: int) -> Optional[float]:
+    total = hits + misses
+    return round(hits / total, 4) if total else None
+
+
+def cache_stats() -> Dict[str, Any]:
+    """
+    Process-local counters plus cluster-wide counters aggregated in Redis.
+    Blocking (Redis read); call via asyncio.to_thread from async code.
+    """
+    local = dict(_stats)
+    local["entries"] = len(_memory)
+    local["hit_rate"] = _hit_rate(local["memory_hits"] + local["redis_hits"], local["misses"])
+
+    cluster: Optional[Dict[str, Any]] = None
+    if LLM_CACHE_REDIS:
+        try:
+            raw = get_redis().hgetall(_REDIS_STATS_KEY) or {}
+            cluster = {
+                (k.decode() if isinstance(k, bytes) else str(k)): int(v)
+                for k, v in raw.items()
+            }
+            cluster["hit_rate"] = _hit_rate(
+                cluster.get("memory_hits", 0) + cluster.get("redis_hits", 0),
+                cluster.get("misses", 0),
+            )
+        except Exception:
+            cluster = None
+
+    return {
+        "enabled": LLM_CACHE_ENABLED,
+        "redis_tier": LLM_CACHE_REDIS,
+        "default_ttl_seconds": LLM_CACHE_TTL_SECONDS,
+        "schema_ttl_seconds": dict(LLM_CACHE_SCHEMA_TTLS),
+        "max_entries": LLM_CACHE_MAX_ENTRIES,
+        "process": local,
+        "cluster": cluster,
+    }
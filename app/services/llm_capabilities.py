@@ -0,0 +1,166 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import openai
+
+from app.core.config import LOCAL_STRUCTURED_OUTPUT, LOCAL_STRUCTURED_OUTPUT_MEMORY_SECONDS
+from app.core.redis_queue import get_redis
+
+_REDIS_CAPABILITY_PREFIX = "llm_capabilities:structured_output:"
+_REDIS_SCHEMA_KEY = "llm_capabilities:schema_attempts"
+_REDIS_STRATEGY_KEY = "llm_capabilities:strategy_attempts"
+
+# Output-constraint strategies for local models (LOCAL_STRUCTURED_OUTPUT), in fallback order.
+# json_object is the last resort every OpenAI-compatible local server supports.
+_AUTO_ORDER = ("json_schema", "json_object")
+
+# Words a 400/422 from an OpenAI-compatible server uses when it rejects the output constraint itself
+# (as opposed to the prompt, the key, or the context length).
+_FORMAT_ERROR_MARKERS = ("response_format", "json_schema", "json schema", "grammar", "structured output")
+
+# ---- Per-model capability memory: the strategy a model's endpoint last accepted, and until when
+# (monotonic) it is trusted. Shared through a Redis key with the same TTL, so a new worker doesn't
+# re-probe what another already learned, and an upgraded server is re-probed once the entry expires.
+_accepted: Dict[str, Tuple[str, float]] = {}
+
+# ---- Per-schema (and per-strategy) attempt counters for local structured calls.
+_schema_stats: Dict[str, Dict[str, int]] = {}
+_strategy_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _configured_order() -> List[str]:
+    if LOCAL_STRUCTURED_OUTPUT == "auto":
+        return list(_AUTO_ORDER)
+    return list(dict.fromkeys([LOCAL_STRUCTURED_OUTPUT, "json_object"]))
+
+
+def _redis_get_strategy(model: str) -> Tuple[Optional[str], int]:
+    conn = get_redis()
+    value = conn.get(f"{_REDIS_CAPABILITY_PREFIX}{model}")
+    ttl = conn.ttl(f"{_REDIS_CAPABILITY_PREFIX}{model}") if value is not None else -2
+    return (value.decode() if isinstance(value, bytes) else value), ttl
+
+
+def _redis_incr(keys: Dict[str, Dict[str, int]]) -> None:
+    pipe = get_redis().pipeline(transaction=False)
+    for key, fields in keys.items():
+        for field, amount in fields.items():
+            pipe.hincrby(key, field, amount)
+    pipe.execute()
+
+
+def rejects_output_format(error: BaseException) -> bool:
+    """Whether a request error says the endpoint doesn't support the requested output constraint."""
+    if not isinstance(error, (openai.BadRequestError, openai.UnprocessableEntityError)):
+        return False
+    message = str(error).lower()
+    return any(marker in message for marker in _FORMAT_ERROR_MARKERS)
+
+
+async def structured_output_strategies(model: str) -> List[str]:
+    """Strategies to try for `model`, in order: the remembered one first, then the rest of the fallbacks."""
+    order = _configured_order()
+    entry = _accepted.get(model)
+    if entry is None or entry[1] <= time.monotonic():
+        _accepted.pop(model, None)
+        try:
+            shared, ttl = await asyncio.to_thread(_redis_get_strategy, model)
+        except Exception:
+            shared, ttl = None, -2
+        if shared in order and ttl > 0:
+            _accepted[model] = (shared, time.monotonic() + ttl)
+    accepted = (_accepted.get(model) or (None, 0.0))[0]
+    if accepted in order:
+        return order[order.index(accepted):]
+    return order
+
+
+async def remember_strategy(model: str, strategy: str) -> None:
+    """Remember the strategy `model`'s endpoint accepted for LOCAL_STRUCTURED_OUTPUT_MEMORY_SECONDS."""
+    entry = _accepted.get(model)
+    if entry is not None and entry[0] == strategy and entry[1] > time.monotonic():
+        return
+    ttl = max(1, int(LOCAL_STRUCTURED_OUTPUT_MEMORY_SECONDS))
+    _accepted[model] = (strategy, time.monotonic() + ttl)
+    try:
+        await asyncio.to_thread(lambda: get_redis().set(f"{_REDIS_CAPABILITY_PREFIX}{model}", strategy, ex=ttl))
+    except Exception:
+        pass
+
+
+async def record_schema_attempts(schema_name: str, strategy: str, attempts: int, valid: bool) -> None:
+    """One local structured call: `attempts` generations (1 = no retry), ending valid or not."""
+    fields = {
+        "calls": 1,
+        "retries": max(attempts - 1, 0),
+        "first_try_valid": int(valid and attempts == 1),
+        "failures": int(not valid),
+    }
+    for stats, name in ((_schema_stats, schema_name), (_strategy_stats, strategy)):
+        counts = stats.setdefault(name, dict.fromkeys(fields, 0))
+        for field, amount in fields.items():
+            counts[field] += amount
+    try:
+        await asyncio.to_thread(_redis_incr, {
+            _REDIS_SCHEMA_KEY: {f"{schema_name}:{field}": n for field, n in fields.items()},
+            _REDIS_STRATEGY_KEY: {f"{strategy}:{field}": n for field, n in fields.items()},
+        })
+    except Exception:
+        pass
+
+
+def _with_rates(per_name: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {
+            **counts,
+            "retries_per_call": round(counts.get("retries", 0) / counts["calls"], 3) if counts.get("calls") else None,
+        }
+        for name, counts in per_name.items()
+    }
+
+
+def _parse_name_fields(raw: Dict[Any, Any]) -> Dict[str, Dict[str, int]]:
+    per_name: Dict[str, Dict[str, int]] = {}
+    for key, value in raw.items():
+        key = key.decode() if isinstance(key, bytes) else str(key)
+        name, _, field = key.rpartition(":")
+        per_name.setdefault(name, {})[field] = int(value)
+    return per_name
+
+
+def capability_stats() -> Dict[str, Any]:
+    """
+    Remembered per-model output strategies and per-schema attempt counters for local structured
+    calls (this process + Redis aggregate). Blocking (Redis read); call via asyncio.to_thread.
+    """
+    cluster: Optional[Dict[str, Any]] = None
+    try:
+        conn = get_redis()
+        models = {}
+        for key in conn.scan_iter(match=f"{_REDIS_CAPABILITY_PREFIX}*"):
+            key = key.decode() if isinstance(key, bytes) else str(key)
+            value = conn.get(key)
+            if value is not None:
+                models[key[len(_REDIS_CAPABILITY_PREFIX):]] = value.decode() if isinstance(value, bytes) else value
+        cluster = {
+            "models": models,
+            "schemas": _with_rates(_parse_name_fields(conn.hgetall(_REDIS_SCHEMA_KEY) or {})),
+            "strategies": _with_rates(_parse_name_fields(conn.hgetall(_REDIS_STRATEGY_KEY) or {})),
+        }
+    except Exception:
+        cluster = None
+
+    return {
+        "mode": LOCAL_STRUCTURED_OUTPUT,
+        "memory_seconds": LOCAL_STRUCTURED_OUTPUT_MEMORY_SECONDS,
+        "process": {
+            "models": {
+                model: {"strategy": strategy, "expires_in_seconds": round(max(0.0, until - time.monotonic()))}
+                for model, (strategy, until) in _accepted.items()
+            },
+            "schemas": _with_rates(_schema_stats),
+            "strategies": _with_rates(_strategy_stats),
+        },
+        "cluster": cluster,
+    }
@@ -0,0 +1,118 @@
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+import openai
+
+from app.core.config import (
+    LLM_CONNECT_TIMEOUT_SECONDS,
+    LLM_HTTP2,
+    LLM_KEEPALIVE_EXPIRY_SECONDS,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_MODE,
+    LLM_TIMEOUT_SECONDS,
+    OLLAMA_API_KEY,
+    OLLAMA_BASE_URL,
+    OPENAI_KEY,
+)
+from app.services.fake_llm import FAKE_BASE_URL, FakeLLMTransport
+
+# ---- Process-wide async clients, one per provider mode.
+# httpx connection pools are bound to the event loop they were first used on,
+# so each entry remembers its loop and is rebuilt if a different loop asks for it
+# (e.g. the API loop vs. the persistent RQ worker loop).
+_clients: Dict[str, Tuple[asyncio.AbstractEventLoop, openai.AsyncOpenAI]] = {}
+_http2_warning_shown: bool = False
+
+
+def _http2_available() -> bool:
+    global _http2_warning_shown
+    if not LLM_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        if not _http2_warning_shown:
+            print("Warning - llm_client: LLM_HTTP2 is on but 'h2' is not installed; using HTTP/1.1.")
+            _http2_warning_shown = True
+        return False
+    return True
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    return openai.DefaultAsyncHttpxClient(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS),
+    )
+
+
+def _build_client(mode: str) -> openai.AsyncOpenAI:
+    if mode == "fake":
+        # No network: the fake provider answers in-process through the same SDK code path.
+        # SDK retries are off so the pipeline sees the configured failure rate and latency as-is.
+        return openai.AsyncOpenAI(
+            base_url=FAKE_BASE_URL,
+            api_key="fake",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=FakeLLMTransport(), timeout=LLM_TIMEOUT_SECONDS),
+        )
+
+    http_client = _build_http_client()
+    if mode == "local":
+        return openai.AsyncOpenAI(base_url=OLLAMA_BASE_URL, api_key=OLLAMA_API_KEY, http_client=http_client)
+
+    if not OPENAI_KEY:
+        raise RuntimeError("OPENAI_API_KEY is not set.")
+    return openai.AsyncOpenAI(api_key=OPENAI_KEY, http_client=http_client)
+
+
+def get_llm_client(mode: Optional[str] = None) -> openai.AsyncOpenAI:
+    """
+    Return the shared AsyncOpenAI client for `mode` (defaults to LLM_MODE).
+    Both hosted OpenAI and local Ollama speak the same API, so they share this path.
+    Must be called from inside a running event loop.
+    """
+    mode = mode or LLM_MODE
+    loop = asyncio.get_running_loop()
+
+    cached = _clients.get(mode)
+    if cached is not None:
+        cached_loop, client = cached
+        if cached_loop is loop and not client.is_closed():
+            return client
+
+    client = _build_client(mode)
+    _clients[mode] = (loop, client)
+    return client
+
+
+async def close_llm_clients() -> None:
+    """
+    Close pooled connections owned by the current event loop. Safe to call repeatedly.
+    """
+    loop = asyncio.get_running_loop()
+    for mode, (client_loop, client) in list(_clients.items()):
+        if client_loop is not loop:
+            continue
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"Error - close_llm_clients: {e}")
+        _clients.pop(mode, None)
+
+
+def llm_pool_settings() -> Dict[str, Any]:
+    return {
+        "http2": _http2_available(),
+        "max_connections": LLM_MAX_CONNECTIONS,
+        "max_keepalive_connections": LLM_MAX_KEEPALIVE_CONNECTIONS,
+        "keepalive_expiry_seconds": LLM_KEEPALIVE_EXPIRY_SECONDS,
+        "timeout_seconds": LLM_TIMEOUT_SECONDS,
+        "connect_timeout_seconds": LLM_CONNECT_TIMEOUT_SECONDS,
+    }
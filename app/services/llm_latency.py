@@ -0,0 +1,129 @@
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import (
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_MIN_DELAY_MS,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_PERCENTILE,
+)
+from app.core.redis_queue import get_redis
+
+_REDIS_HISTOGRAM_KEY = "llm_latency:histogram"
+_REDIS_HEDGE_KEY = "llm_latency:hedges"
+_WINDOW = 200
+
+# Histogram bucket upper bounds (ms); the last bucket is open-ended.
+BUCKETS_MS: List[int] = [100, 250, 500, 750, 1000, 1500, 2000, 3000, 5000, 7500, 10000, 15000, 30000, 60000]
+
+# ---- Per-model latency: a sliding window of recent samples (drives the hedge deadline)
+# and a cumulative histogram (reporting). Slow requests cancelled by a hedge are recorded
+# with their elapsed time, a lower bound, so the tail doesn't vanish from the window.
+_recent: Dict[str, Deque[float]] = {}
+_histograms: Dict[str, List[int]] = {}
+_hedges: Dict[str, Dict[str, int]] = {}
+
+
+def _bucket_label(index: int) -> str:
+    return f"le_{BUCKETS_MS[index]}" if index < len(BUCKETS_MS) else f"gt_{BUCKETS_MS[-1]}"
+
+
+def _bucket_index(ms: float) -> int:
+    for index, bound in enumerate(BUCKETS_MS):
+        if ms <= bound:
+            return index
+    return len(BUCKETS_MS)
+
+
+def _redis_incr(key: str, fields: Dict[str, int]) -> None:
+    pipe = get_redis().pipeline(transaction=False)
+    for field, amount in fields.items():
+        pipe.hincrby(key, field, amount)
+    pipe.execute()
+
+
+async def record_latency(model: str, seconds: float) -> None:
+    ms = seconds * 1000.0
+    _recent.setdefault(model, deque(maxlen=_WINDOW)).append(ms)
+    index = _bucket_index(ms)
+    _histograms.setdefault(model, [0] * (len(BUCKETS_MS) + 1))[index] += 1
+    try:
+        await asyncio.to_thread(_redis_incr, _REDIS_HISTOGRAM_KEY, {f"{model}:{_bucket_label(index)}": 1})
+    except Exception:
+        pass
+
+
+async def record_hedge(model: str, outcome: str) -> None:
+    """outcome: 'fired', 'backup_won', 'primary_won', or 'skipped' (backup model's limiter saturated)."""
+    counts = _hedges.setdefault(model, {"fired": 0, "backup_won": 0, "primary_won": 0, "skipped": 0})
+    counts[outcome] = counts.get(outcome, 0) + 1
+    try:
+        await asyncio.to_thread(_redis_incr, _REDIS_HEDGE_KEY, {f"{model}:{outcome}": 1})
+    except Exception:
+        pass
+
+
+def latency_percentile(model: str, percentile: float) -> Optional[float]:
+    samples = sorted(_recent.get(model) or ())
+    if not samples:
+        return None
+    rank = min(len(samples) - 1, max(0, int(round(percentile / 100.0 * len(samples))) - 1))
+    return samples[rank]
+
+
+def hedge_delay_seconds(model: str) -> float:
+    """How long to wait on the primary before hedging: recent percentile latency, never below the floor."""
+    delay_ms = float(LLM_HEDGE_MIN_DELAY_MS)
+    if len(_recent.get(model) or ()) >= LLM_HEDGE_MIN_SAMPLES:
+        delay_ms = max(delay_ms, latency_percentile(model, LLM_HEDGE_PERCENTILE) or 0.0)
+    return delay_ms / 1000.0
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def _parse_model_fields(raw: Dict[Any, Any]) -> Dict[str, Dict[str, int]]:
+    per_model: Dict[str, Dict[str, int]] = {}
+    for key, value in raw.items():
+        key = key.decode() if isinstance(key, bytes) else str(key)
+        model, _, field = key.rpartition(":")
+        per_model.setdefault(model, {})[field] = int(value)
+    return per_model
+
+
+def latency_stats() -> Dict[str, Any]:
+    """
+    Per-model latency percentiles, histograms, and hedge counters (this process + Redis aggregate).
+    Blocking (Redis read); call via asyncio.to_thread from async code.
+    """
+    process = {}
+    for model, counts in _histograms.items():
+        process[model] = {
+            "samples": sum(counts),
+            "p50_ms": _round(latency_percentile(model, 50)),
+            "p95_ms": _round(latency_percentile(model, 95)),
+            "p99_ms": _round(latency_percentile(model, 99)),
+            "hedge_delay_ms": round(hedge_delay_seconds(model) * 1000.0, 1),
+            "histogram_ms": {_bucket_label(i): c for i, c in enumerate(counts) if c},
+            "hedges": dict(_hedges.get(model) or {}),
+        }
+
+    cluster: Optional[Dict[str, Any]] = None
+    try:
+        conn = get_redis()
+        histograms = _parse_model_fields(conn.hgetall(_REDIS_HISTOGRAM_KEY) or {})
+        hedges = _parse_model_fields(conn.hgetall(_REDIS_HEDGE_KEY) or {})
+        cluster = {
+            model: {"histogram_ms": histograms.get(model, {}), "hedges": hedges.get(model, {})}
+            for model in set(histograms) | set(hedges)
+        }
+    except Exception:
+        cluster = None
+
+    return {
+        "hedging_enabled": LLM_HEDGE_ENABLED,
+        "process": process,
+        "cluster": cluster,
+    }
@@ -0,0 +1,239 @@
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.core.config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_MODEL_CONCURRENCY,
+    LLM_MODEL_RATE_LIMITS,
+    LLM_RATE_LIMIT_BURST,
+    LLM_RATE_LIMIT_RPM,
+)
+from app.core.redis_queue import get_redis
+
+_BUCKET_PREFIX = "llm_bucket:"
+_WAITING_PREFIX = "llm_limiter:waiting:"
+_REDIS_STATS_KEY = "llm_limiter:stats"
+_WAITER_STALE_SECONDS = 300
+_MAX_BUCKET_SLEEP_SECONDS = 1.0
+
+# Token bucket on Redis server time: refill at `rate` tokens/sec up to `burst`, take one.
+# Returns 0 when a token was taken, otherwise milliseconds until one is available.
+_TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - ts) / 1000 * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 60000)
+return wait
+"""
+
+# ---- Per-model in-process semaphores. asyncio primitives bind to the loop that first
+# uses them, so entries are rebuilt for a different loop (API loop vs. RQ worker loop).
+_semaphores: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+_model_stats: Dict[str, Dict[str, Any]] = {}
+_waiters: Dict[str, Dict[str, float]] = {}
+_bucket_warning_shown: bool = False
+
+
+def concurrency_limit(model: str) -> int:
+    return LLM_MODEL_CONCURRENCY.get(model, LLM_MAX_CONCURRENCY)
+
+
+def rate_limit_rpm(model: str) -> int:
+    return LLM_MODEL_RATE_LIMITS.get(model, LLM_RATE_LIMIT_RPM)
+
+
+def _stats_for(model: str) -> Dict[str, Any]:
+    return _model_stats.setdefault(model, {
+        "in_flight": 0,
+        "admitted": 0,
+        "queued": 0,
+        "total_wait_ms": 0.0,
+        "max_wait_ms": 0.0,
+    })
+
+
+def _get_semaphore(model: str) -> Optional[asyncio.Semaphore]:
+    limit = concurrency_limit(model)
+    if limit <= 0:
+        return None
+    loop = asyncio.get_running_loop()
+    entry = _semaphores.get(model)
+    if entry is None or entry[0] is not loop:
+        entry = (loop, asyncio.Semaphore(limit))
+        _semaphores[model] = entry
+    return entry[1]
+
+
+def _take_token(model: str, rpm: int) -> int:
+    return int(get_redis().eval(
+        _TAKE_TOKEN_SCRIPT, 1, _BUCKET_PREFIX + model, rpm / 60.0, max(1, LLM_RATE_LIMIT_BURST)
+    ))
+
+
+def _mark_waiting(model: str, waiter_id: str) -> None:
+    key = _WAITING_PREFIX + model
+    now = time.time()
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.zremrangebyscore(key, 0, now - _WAITER_STALE_SECONDS)
+    pipe.zadd(key, {waiter_id: now})
+    pipe.expire(key, _WAITER_STALE_SECONDS)
+    pipe.execute()
+
+
+def _unmark_waiting(model: str, waiter_id: str, wait_ms: float) -> None:
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.zrem(_WAITING_PREFIX + model, waiter_id)
+    pipe.hincrby(_REDIS_STATS_KEY, f"{model}:admitted", 1)
+    pipe.hincrby(_REDIS_STATS_KEY, f"{model}:total_wait_ms", int(wait_ms))
+    pipe.execute()
+
+
+async def _wait_for_token(model: str, rpm: int) -> None:
+    """Block until the cross-process bucket hands out a token. Fails open if Redis is unavailable."""
+    global _bucket_warning_shown
+    while True:
+        try:
+            wait_ms = await asyncio.to_thread(_take_token, model, rpm)
+        except Exception as e:
+            if not _bucket_warning_shown:
+                print(f"Error - llm_limiter: rate limit bucket unavailable, admitting without it: {e}")
+                _bucket_warning_shown = True
+            return
+        if wait_ms <= 0:
+            return
+        await asyncio.sleep(min(wait_ms / 1000.0, _MAX_BUCKET_SLEEP_SECONDS))
+
+
+def limiter_saturated(model: str) -> bool:
+    """Whether requests to `model` are already queued for a slot in this process."""
+    stats = _model_stats.get(model)
+    return bool(stats and stats["queued"] > 0)
+
+
+@asynccontextmanager
+async def llm_slot(model: str) -> AsyncIterator[None]:
+    """
+    Hold one admission slot for an upstream request to `model`: waits for the in-process
+    concurrency limit, then for a token from the shared per-model rate bucket.
+    """
+    stats = _stats_for(model)
+    semaphore = _get_semaphore(model)
+    rpm = rate_limit_rpm(model)
+    waiter_id = uuid.uuid4().hex
+    start = time.perf_counter()
+
+    _waiters.setdefault(model, {})[waiter_id] = time.time()
+    stats["queued"] += 1
+    distributed = rpm > 0
+    if distributed:
+        try:
+            await asyncio.to_thread(_mark_waiting, model, waiter_id)
+        except Exception:
+            distributed = False
+
+    acquired = False
+    try:
+        if semaphore is not None:
+            await semaphore.acquire()
+            acquired = True
+        if rpm > 0:
+            await _wait_for_token(model, rpm)
+    except BaseException:
+        if acquired:
+            semaphore.release()
+        raise
+    finally:
+        _waiters[model].pop(waiter_id, None)
+        stats["queued"] -= 1
+        wait_ms = (time.perf_counter() - start) * 1000.0
+        if distributed:
+            try:
+                await asyncio.to_thread(_unmark_waiting, model, waiter_id, wait_ms)
+            except Exception:
+                pass
+
+    stats["admitted"] += 1
+    stats["total_wait_ms"] += wait_ms
+    stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+    stats["in_flight"] += 1
+    try:
+        yield
+    finally:
+        stats["in_flight"] -= 1
+        if semaphore is not None:
+            semaphore.release()
+
+
+def _local_snapshot(model: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+    waiting_since = _waiters.get(model) or {}
+    oldest = min(waiting_since.values(), default=None)
+    admitted = stats["admitted"]
+    return {
+        "concurrency_limit": concurrency_limit(model) or None,
+        "rate_limit_rpm": rate_limit_rpm(model) or None,
+        "in_flight": stats["in_flight"],
+        "queue_depth": stats["queued"],
+        "current_wait_ms": round((time.time() - oldest) * 1000.0, 1) if oldest else 0.0,
+        "avg_wait_ms": round(stats["total_wait_ms"] / admitted, 1) if admitted else None,
+        "max_wait_ms": round(stats["max_wait_ms"], 1),
+        "admitted": admitted,
+    }
+
+
+def _cluster_snapshot() -> Dict[str, Any]:
+    conn = get_redis()
+    now = time.time()
+    per_model: Dict[str, Dict[str, Any]] = {}
+
+    for key, value in (conn.hgetall(_REDIS_STATS_KEY) or {}).items():
+        key = key.decode() if isinstance(key, bytes) else str(key)
+        model, _, field = key.rpartition(":")
+        per_model.setdefault(model, {})[field] = int(value)
+
+    for raw_key in conn.scan_iter(match=_WAITING_PREFIX + "*"):
+        key = raw_key.decode() if isinstance(raw_key, bytes) else str(raw_key)
+        model = key[len(_WAITING_PREFIX):]
+        live = conn.zrangebyscore(key, now - _WAITER_STALE_SECONDS, "+inf", withscores=True)
+        entry = per_model.setdefault(model, {})
+        entry["queue_depth"] = len(live)
+        entry["current_wait_ms"] = round((now - min(score for _, score in live)) * 1000.0, 1) if live else 0.0
+
+    for entry in per_model.values():
+        admitted = entry.get("admitted", 0)
+        entry["avg_wait_ms"] = round(entry.get("total_wait_ms", 0) / admitted, 1) if admitted else None
+    return per_model
+
+
+def limiter_stats() -> Dict[str, Any]:
+    """
+    Admission-control state per model: this process, plus cross-process queue depth/wait from Redis
+    (only tracked for rate-limited models). Blocking; call via asyncio.to_thread from async code.
+    """
+    cluster: Optional[Dict[str, Any]] = None
+    if LLM_RATE_LIMIT_RPM > 0 or any(v > 0 for v in LLM_MODEL_RATE_LIMITS.values()):
+        try:
+            cluster = _cluster_snapshot()
+        except Exception:
+            cluster = None
+
+    return {
+        "default_concurrency_limit": LLM_MAX_CONCURRENCY or None,
+        "default_rate_limit_rpm": LLM_RATE_LIMIT_RPM or None,
+        "process": {model: _local_snapshot(model, stats) for model, stats in _model_stats.items()},
+        "cluster": cluster,
+    }
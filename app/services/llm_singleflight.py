@@ -0,0 +1,198 @@
+import asyncio
+import copy
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import (
+    LLM_SINGLEFLIGHT_ENABLED,
+    LLM_SINGLEFLIGHT_LEASE_SECONDS,
+    LLM_SINGLEFLIGHT_REDIS,
+)
+from app.core.redis_queue import get_redis
+
+_LEASE_PREFIX = "llm_inflight:"
+_RESULT_PREFIX = "llm_inflight_result:"
+_REDIS_STATS_KEY = "llm_inflight:stats"
+_RESULT_TTL_SECONDS = 30
+_POLL_INTERVAL_SECONDS = 0.1
+
+# Compare-and-delete so a leader never removes a lease that expired and was re-acquired.
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# ---- In-process flights: key -> (loop, future resolving to (parsed, response))
+_inflight: Dict[str, Tuple[asyncio.AbstractEventLoop, "asyncio.Future[Tuple[Any, Any]]"]] = {}
+_stats: Dict[str, int] = {
+    "leaders": 0,
+    "coalesced_local": 0,
+    "coalesced_remote": 0,
+}
+
+
+def _record_remote_stat(stat: str) -> None:
+    try:
+        get_redis().hincrby(_REDIS_STATS_KEY, stat, 1)
+    except Exception:
+        pass
+
+
+def _try_acquire_lease(key: str, token: str) -> Tuple[bool, Optional[str]]:
+    """(acquired, token of the lease holder) - read atomically with the acquire attempt."""
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.set(_LEASE_PREFIX + key, token, nx=True, ex=LLM_SINGLEFLIGHT_LEASE_SECONDS)
+    pipe.get(_LEASE_PREFIX + key)
+    acquired, holder = pipe.execute()
+    if isinstance(holder, bytes):
+        holder = holder.decode("utf-8")
+    return bool(acquired), holder
+
+
+def _release_lease(key: str, token: str) -> None:
+    get_redis().eval(_RELEASE_SCRIPT, 1, _LEASE_PREFIX + key, token)
+
+
+def _result_key(key: str, token: str) -> str:
+    # Keyed by lease token: followers only accept the result of the lease they waited on,
+    # never a previous leader's result for the same request.
+    return f"{_RESULT_PREFIX}{key}:{token}"
+
+
+def _publish_result(key: str, token: str, parsed: Any) -> None:
+    get_redis().setex(_result_key(key, token), _RESULT_TTL_SECONDS, json.dumps(parsed, ensure_ascii=False, default=str))
+
+
+def _poll_remote(key: str, holder: str) -> Tuple[bool, Optional[str]]:
+    """
+    One poll step for a follower: (holder's lease still held, holder's published result or None).
+    """
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.get(_LEASE_PREFIX + key)
+    pipe.get(_result_key(key, holder))
+    current, raw = pipe.execute()
+    if isinstance(current, bytes):
+        current = current.decode("utf-8")
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8")
+    return current == holder, raw
+
+
+async def _wait_for_remote_leader(key: str, holder: Optional[str]) -> Optional[Any]:
+    """
+    Wait while another process holds the lease `holder`. Returns that leader's parsed result,
+    or None if its lease went away without a result (leader failed or expired).
+    """
+    if holder is None:
+        return None
+    while True:
+        lease_held, raw = await asyncio.to_thread(_poll_remote, key, holder)
+        if raw is not None:
+            return json.loads(raw)
+        if not lease_held:
+            return None
+        await asyncio.sleep(_POLL_INTERVAL_SECONDS)
+
+
+async def _run_leader(key: str, call: Callable[[], Awaitable[Tuple[Any, Any]]]) -> Tuple[Any, Any]:
+    if not LLM_SINGLEFLIGHT_REDIS:
+        return await call()
+
+    token = uuid.uuid4().hex
+    try:
+        acquired, holder = await asyncio.to_thread(_try_acquire_lease, key, token)
+    except Exception as e:
+        print(f"Error - llm_singleflight lease: {e}")
+        return await call()
+
+    if not acquired:
+        remote = await _wait_for_remote_leader(key, holder)
+        if remote is not None:
+            _stats["coalesced_remote"] += 1
+            await asyncio.to_thread(_record_remote_stat, "coalesced_remote")
+            return remote, None
+        # Leader gave up; make the call ourselves (without a lease, to avoid a second wait cycle).
+        return await call()
+
+    try:
+        parsed, response = await call()
+        try:
+            await asyncio.to_thread(_publish_result, key, token, parsed)
+        except Exception as e:
+            print(f"Error - llm_singleflight publish: {e}")
+        return parsed, response
+    finally:
+        try:
+            await asyncio.to_thread(_release_lease, key, token)
+        except Exception:
+            pass
+
+
+async def coalesce(key: str, call: Callable[[], Awaitable[Tuple[Any, Any]]]) -> Tuple[Any, Any]:
+    """
+    Run `call` once per `key` across concurrent callers and share its (parsed, response) result.
+
+    In-process followers await the leader's future. With LLM_SINGLEFLIGHT_REDIS, a Redis
+    lease extends this across processes; remote followers receive (parsed, None).
+    Followers always get their own deep copy of the parsed payload.
+    """
+    if not LLM_SINGLEFLIGHT_ENABLED:
+        return await call()
+
+    loop = asyncio.get_running_loop()
+    existing = _inflight.get(key)
+    if existing is not None and existing[0] is loop:
+        leader_future = existing[1]
+        try:
+            parsed, _response = await asyncio.shield(leader_future)
+        except asyncio.CancelledError:
+            if not leader_future.cancelled():
+                raise  # we were cancelled ourselves
+            return await call()  # leader was cancelled; don't inherit its cancellation
+        _stats["coalesced_local"] += 1
+        if LLM_SINGLEFLIGHT_REDIS:
+            await asyncio.to_thread(_record_remote_stat, "coalesced_local")
+        return copy.deepcopy(parsed), None
+
+    future: "asyncio.Future[Tuple[Any, Any]]" = loop.create_future()
+    _inflight[key] = (loop, future)
+    _stats["leaders"] += 1
+    try:
+        result = await _run_leader(key, call)
+        future.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        # Mark retrieved so an un-awaited future does not log "exception was never retrieved".
+        future.exception()
+        raise
+    finally:
+        if _inflight.get(key, (None, None))[1] is future:
+            _inflight.pop(key, None)
+
+
+def singleflight_stats() -> Dict[str, Any]:
+    """
+    Blocking (Redis read when the distributed mode is on); call via asyncio.to_thread.
+    """
+    cluster: Optional[Dict[str, int]] = None
+    if LLM_SINGLEFLIGHT_REDIS:
+        try:
+            raw = get_redis().hgetall(_REDIS_STATS_KEY) or {}
+            cluster = {(k.decode() if isinstance(k, bytes) else str(k)): int(v) for k, v in raw.items()}
+        except Exception:
+            cluster = None
+
+    return {
+        "enabled": LLM_SINGLEFLIGHT_ENABLED,
+        "distributed": LLM_SINGLEFLIGHT_REDIS,
+        "in_flight": len(_inflight),
+        "process": dict(_stats),
+        "cluster": cluster,
+    }
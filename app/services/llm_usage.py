@@ -0,0 +1,227 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.config import LLM_MODEL_PRICES, LLM_USAGE_TTL_SECONDS
+from app.core.redis_queue import get_redis
+
+_REDIS_PROMPT_CACHE_KEY = "llm_usage:prompt_cache"
+_REDIS_STAGE_KEY = "llm_usage:stages"
+_REDIS_JOB_KEY_PREFIX = "llm_usage:job:"
+_REDIS_USER_KEY_PREFIX = "llm_usage:user:"
+
+# ---- Provider-side prompt caching, per model: how many prompt tokens were served from cache.
+# Workers make the LLM calls, so counters are also aggregated in Redis for the API process to report.
+_prompt_cache: Dict[str, Dict[str, int]] = {}
+
+
+def _usage_value(obj: Any, name: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def cached_prompt_tokens(usage: Any) -> int:
+    """
+    Cached prompt tokens reported by the provider (OpenAI: usage.prompt_tokens_details.cached_tokens).
+    Providers that don't report it (e.g. Ollama) count as 0.
+    """
+    details = _usage_value(usage, "prompt_tokens_details")
+    cached = _usage_value(details, "cached_tokens")
+    return int(cached) if isinstance(cached, (int, float)) else 0
+
+
+def _redis_record(model: str, counts: Dict[str, int]) -> None:
+    pipe = get_redis().pipeline()
+    for field, amount in counts.items():
+        pipe.hincrby(_REDIS_PROMPT_CACHE_KEY, f"{model}:{field}", amount)
+    pipe.execute()
+
+
+async def record_prompt_cache_usage(model: str, usage: Any) -> None:
+    if usage is None:
+        return
+    prompt_tokens = _usage_value(usage, "prompt_tokens")
+    counts = {
+        "calls": 1,
+        "prompt_tokens": int(prompt_tokens) if isinstance(prompt_tokens, (int, float)) else 0,
+        "cached_tokens": cached_prompt_tokens(usage),
+    }
+
+    local = _prompt_cache.setdefault(model, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+    for field, amount in counts.items():
+        local[field] += amount
+
+    try:
+        await asyncio.to_thread(_redis_record, model, counts)
+    except Exception:
+        pass
+
+
+def _with_ratio(counts: Dict[str, int]) -> Dict[str, Any]:
+    prompt_tokens = counts.get("prompt_tokens", 0)
+    return {
+        **counts,
+        "cached_ratio": round(counts.get("cached_tokens", 0) / prompt_tokens, 4) if prompt_tokens else None,
+    }
+
+
+def prompt_cache_stats() -> Dict[str, Any]:
+    """
+    Per-model prompt-cache counters for this process and across workers (Redis).
+    Blocking (Redis read); call via asyncio.to_thread from async code.
+    """
+    cluster: Optional[Dict[str, Any]] = None
+    try:
+        raw = get_redis().hgetall(_REDIS_PROMPT_CACHE_KEY) or {}
+        per_model: Dict[str, Dict[str, int]] = {}
+        for key, value in raw.items():
+            key = key.decode() if isinstance(key, bytes) else str(key)
+            model, _, field = key.rpartition(":")
+            per_model.setdefault(model, {})[field] = int(value)
+        cluster = {model: _with_ratio(counts) for model, counts in per_model.items()}
+    except Exception:
+        cluster = None
+
+    return {
+        "process": {model: _with_ratio(counts) for model, counts in _prompt_cache.items()},
+        "cluster": cluster,
+    }
+
+
+# ---- Usage accounting: every completion's tokens, latency and cost, attributed to the pipeline
+# stage, job and user it ran for. Attribution is carried in a context variable, so it follows
+# the call into gathered/hedged tasks without threading ids through every signature.
+_attribution: ContextVar[Dict[str, str]] = ContextVar("llm_usage_attribution", default={})
+_stage_usage: Dict[str, Dict[str, int]] = {}
+
+USAGE_FIELDS = ("calls", "prompt_tokens", "completion_tokens", "cached_tokens", "latency_ms", "cost_microusd")
+
+
+@contextmanager
+def usage_scope(**attributes: Optional[str]) -> Iterator[None]:
+    """Attribute LLM usage inside the block (job_id=, user_id=, stage=); unset values are inherited."""
+    merged = {**_attribution.get(), **{key: str(value) for key, value in attributes.items() if value}}
+    token = _attribution.set(merged)
+    try:
+        yield
+    finally:
+        _attribution.reset(token)
+
+
+def _int_usage(usage: Any, name: str) -> int:
+    value = _usage_value(usage, name)
+    return int(value) if isinstance(value, (int, float)) else 0
+
+
+def usage_cost_microusd(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int) -> int:
+    # Prices are USD per 1M tokens, so tokens * price is exactly micro-dollars.
+    prices = LLM_MODEL_PRICES.get(model)
+    if prices is None:
+        return 0
+    prompt_price, completion_price, cached_price = prices
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return int(round(uncached * prompt_price + cached_tokens * cached_price + completion_tokens * completion_price))
+
+
+def _redis_record_usage(counts: Dict[str, int], stage: str, job_id: Optional[str], user_id: Optional[str]) -> None:
+    pipe = get_redis().pipeline(transaction=False)
+    for key in (_REDIS_STAGE_KEY, job_id and _REDIS_JOB_KEY_PREFIX + job_id, user_id and _REDIS_USER_KEY_PREFIX + user_id):
+        if not key:
+            continue
+        for field, amount in counts.items():
+            pipe.hincrby(key, f"{stage}:{field}", amount)
+        if key != _REDIS_STAGE_KEY and LLM_USAGE_TTL_SECONDS > 0:
+            pipe.expire(key, LLM_USAGE_TTL_SECONDS)
+    pipe.execute()
+
+
+async def _record(counts: Dict[str, int]) -> None:
+    attribution = _attribution.get()
+    stage = attribution.get("stage", "unattributed")
+    local = _stage_usage.setdefault(stage, {})
+    for field, amount in counts.items():
+        local[field] = local.get(field, 0) + amount
+    try:
+        await asyncio.to_thread(_redis_record_usage, counts, stage, attribution.get("job_id"), attribution.get("user_id"))
+    except Exception:
+        pass
+
+
+async def record_usage(model: str, usage: Any, seconds: float) -> None:
+    """One upstream completion (every attempt and hedge counts), attributed via usage_scope()."""
+    prompt_tokens = _int_usage(usage, "prompt_tokens")
+    completion_tokens = _int_usage(usage, "completion_tokens")
+    cached_tokens = cached_prompt_tokens(usage)
+    await _record({
+        "calls": 1,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": cached_tokens,
+        "latency_ms": int(round(seconds * 1000)),
+        "cost_microusd": usage_cost_microusd(model, prompt_tokens, completion_tokens, cached_tokens),
+    })
+
+
+async def record_saved_call(reason: str) -> None:
+    """A structured_query answered without an upstream call: reason is 'cache_hits' or 'coalesced'."""
+    await _record({reason: 1})
+
+
+def _summarize(per_stage: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, Any]]:
+    summary = {}
+    for stage, counts in per_stage.items():
+        calls = counts.get("calls", 0)
+        tokens = counts.get("prompt_tokens", 0) + counts.get("completion_tokens", 0)
+        summary[stage] = {
+            **{field: counts.get(field, 0) for field in USAGE_FIELDS},
+            "cache_hits": counts.get("cache_hits", 0),
+            "coalesced": counts.get("coalesced", 0),
+            "total_tokens": tokens,
+            "avg_latency_ms": round(counts.get("latency_ms", 0) / calls, 1) if calls else None,
+            "cost_usd": round(counts.get("cost_microusd", 0) / 1_000_000, 6),
+        }
+    # Most expensive stages first: that's where optimization pays off.
+    return dict(sorted(summary.items(), key=lambda item: (item[1]["cost_microusd"], item[1]["total_tokens"]), reverse=True))
+
+
+def _read_stage_hash(conn: Any, key: str) -> Dict[str, Dict[str, int]]:
+    per_stage: Dict[str, Dict[str, int]] = {}
+    for field, value in (conn.hgetall(key) or {}).items():
+        field = field.decode() if isinstance(field, bytes) else str(field)
+        stage, _, name = field.rpartition(":")
+        per_stage.setdefault(stage, {})[name] = int(value)
+    return per_stage
+
+
+def _totals(per_stage: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    totals = {field: sum(stage.get(field, 0) for stage in per_stage.values()) for field in USAGE_FIELDS}
+    totals["total_tokens"] = totals["prompt_tokens"] + totals["completion_tokens"]
+    totals["cost_usd"] = round(totals["cost_microusd"] / 1_000_000, 6)
+    return totals
+
+
+def usage_stats(job_id: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    LLM usage per pipeline stage for this process and across workers (Redis), optionally narrowed
+    to one job or user. Blocking (Redis reads); call via asyncio.to_thread from async code.
+    """
+    result: Dict[str, Any] = {
+        "priced_models": sorted(LLM_MODEL_PRICES),
+        "process": {"stages": _summarize(_stage_usage)},
+        "cluster": None,
+    }
+    try:
+        conn = get_redis()
+        stages = _summarize(_read_stage_hash(conn, _REDIS_STAGE_KEY))
+        result["cluster"] = {"stages": stages, "totals": _totals(stages)}
+        for label, value, prefix in (("job", job_id, _REDIS_JOB_KEY_PREFIX), ("user", user_id, _REDIS_USER_KEY_PREFIX)):
+            if value:
+                stages = _summarize(_read_stage_hash(conn, prefix + value))
+                result[label] = {"id": value, "stages": stages, "totals": _totals(stages)}
+    except Exception:
+        pass
+    return result
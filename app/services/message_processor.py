@@ -1,23 +1,35 @@
 import asyncio
+import re
 import time
 import json
 
 from fastapi import HTTPException
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Awaitable, Dict, List, Optional, Set
 from datetime import datetime, timezone
-from app.constants.schemas import get_message_perception_schema,get_response_schema, get_thought_schema, implicitly_addressed_schema, post_processing_schema, get_memory_schema_lite, get_personality_emotion_delta_schema_lite
+from app.constants.schemas import get_message_perception_schema,get_response_schema, get_thought_schema, implicitly_addressed_schema, post_processing_schema, get_memory_schema_lite, get_personality_emotion_delta_schema_lite, get_personality_emotion_perception_schema_lite, get_post_processing_combined_schema
 from app.domain.memory import Memory
 from app.domain.models import GenerateReplyTaskResponse, InternalMessageRequest, MessageResponse
 from app.domain.state import BoundedTrait, EmotionalDelta, EmotionalState, PersonalityDelta, PersonalityMatrix, SentimentDelta, SentimentMatrix
 from app.services.expressions import get_available_expressions
 from app.services.memory import get_random_memory_tag, normalize_emotional_impact_fill_zeros, retrieve_relevant_memory_from_tag
+from app.services.json_stream import JsonStringFieldStream
 from app.services.openai import structured_query
+from app.services.progress import publish_job_event
 from app.constants.constants import BOT_ROLE, DM_TYPE, EXTRINSIC_RELATIONSHIPS, IGNORE_CHOICE, PERSONALITY_LANGUAGE_GUIDE, RESPOND_CHOICE, USER_ROLE
-from app.core.config import AGENT_NAME, DEBUG_MODE, MESSAGE_HISTORY_COUNT, CONVERSATION_MESSAGE_RETENTION_COUNT
-from app.services.database import add_memory, add_thought, get_all_message_memory, get_thoughts, grab_user, grab_self, get_conversation, insert_message_to_conversation, insert_message_to_message_memory, update_agent_emotions, update_summary_identity_relationship, update_tags, update_user_sentiment
-from app.services.prompting import _system_message, build_implicit_addressing_prompt, build_memory_prompt, build_message_perception_prompt, build_message_thought_prompt, build_personality_emotional_delta_prompt, build_post_processing_prompt, build_response_prompt
+from app.core.config import AGENT_NAME, DEBUG_MODE, DELTA_PERCEPTION_MODE, IGNORE_UNADDRESSED_GROUP_MESSAGES, LLM_STREAM_RESPONSES, POST_PROCESSING_MODE, MESSAGE_HISTORY_COUNT, CONVERSATION_MESSAGE_RETENTION_COUNT
+from app.services.database import add_memory, add_thought, get_all_message_memory, get_thoughts, grab_user, grab_self, get_recent_conversation_messages, insert_message_to_conversation, insert_message_to_message_memory, queue_agent_emotions, update_summary_identity_relationship, update_tags, apply_user_sentiment_deltas
+from app.services.prompting import _system_message, build_implicit_addressing_prompt, build_memory_prompt, build_message_perception_prompt, build_message_thought_prompt, build_personality_emotion_perception_prompt, build_personality_emotional_delta_prompt, build_post_processing_combined_prompt, build_post_processing_prompt, build_response_prompt
 from app.services.state_reducer import apply_deltas_emotion, apply_deltas_personality, apply_deltas_sentiment
 
+
+async def _timed(awaitable: Awaitable[Any], timings: Dict[str, float], key: str) -> Any:
+    # Record one awaited step's own duration, even when it runs concurrently with others.
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[key] = time.perf_counter() - start
+
         
 def _normalize_delta_payload(delta_payload: Any, allowed_keys: Set[str]) -> Dict[str, Any]:
     payload = delta_payload if isinstance(delta_payload, dict) else {}
@@ -46,11 +58,47 @@ def _normalize_delta_payload(delta_payload: Any, allowed_keys: Set[str]) -> Dict
     return normalized
 
 
+class _ReplyStreamer:
+    """
+    Publishes the reply text (`response.message`) as `delta` job events while the response
+    call streams, so clients can render it before the pipeline finishes.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.first_delta_at: Optional[float] = None
+        self._field = JsonStringFieldStream(("response", "message"))
+        self._seq = 0
+
+    async def _publish(self, text: str, replace: bool = False) -> None:
+        if self.first_delta_at is None:
+            self.first_delta_at = time.perf_counter()
+        await asyncio.to_thread(publish_job_event, self.job_id, delta=text, seq=self._seq, replace=replace)
+        self._seq += 1
+
+    async def on_delta(self, chunk: str) -> None:
+        text = self._field.feed(chunk)
+        if text:
+            await self._publish(text)
+
+    async def finish(self, final_text: Optional[str]) -> None:
+        # Cached/coalesced results aren't streamed, and local schema retries or the DM fallback
+        # can change the text: reconcile what was streamed with the final reply.
+        final_text = final_text or ""
+        streamed = self._field.text
+        if final_text == streamed:
+            return
+        if streamed and final_text.startswith(streamed):
+            await self._publish(final_text[len(streamed):])
+        else:
+            await self._publish(final_text, replace=bool(streamed))
+
+
 def _as_dict(payload: Any) -> Dict[str, Any]:
     return payload if isinstance(payload, dict) else {}
 
 
-async def generate_response(request: InternalMessageRequest) -> GenerateReplyTaskResponse:
+async def generate_response(request: InternalMessageRequest, job_id: Optional[str] = None) -> GenerateReplyTaskResponse:
         """
         Process a user message and return the bot's response.
 
@@ -58,6 +106,7 @@ async def generate_response(request: InternalMessageRequest) -> GenerateReplyTas
         --------
         0) Setup & prefetch:
             - Concurrently fetch agent/user state, conversation, message memory, and latest thoughts.
+            - For non-DMs, start the implicit-address check in the background (overlaps steps 1-2).
             - Initialize timing buckets.
 
         1) Personality & emotion deltas:
@@ -68,10 +117,18 @@ async def generate_response(request: InternalMessageRequest) -> GenerateReplyTas
             - Ask the model to interpret the user's latest message (message, purpose, tone, optional thought).
             - Persist the perceived message to conversation + long-term message memory.
             - If a new thought is produced, store it.
+            - DELTA_PERCEPTION_MODE controls how 1) and 2) run: `sequential` (perception sees the
+              post-delta state), `concurrent` (both calls in parallel from the pre-delta state), or
+              `combined` (one call returning both).
 
         3) Response generation:
+            - Await the implicit-address check. With IGNORE_UNADDRESSED_GROUP_MESSAGES, a non-DM
+              that neither mentions the agent nor is judged implicitly addressed is ignored without
+              the quality-model call.
             - Retrieve relevant memory (by random tag) and available expressions.
-            - Ask the model whether/how to respond (and which expression to use).
+            - Ask the model whether/how to respond (and which expression to use). With a `job_id`
+              and LLM_STREAM_RESPONSES, the call is streamed and the reply text is published as
+              `delta` job events as it is generated.
             - If responding, persist the agent message to conversation + message memory.
 
         Returns
@@ -88,6 +145,8 @@ async def generate_response(request: InternalMessageRequest) -> GenerateReplyTas
         """
         timings: Dict[str, float] = {}
         t0 = time.perf_counter()
+        implicit_task: Optional[asyncio.Task] = None
+        streamer = _ReplyStreamer(job_id) if (job_id and LLM_STREAM_RESPONSES) else None
         
         try:
             # ---------- 0) Setup & Prefetch ----------
@@ -99,94 +158,139 @@ async def generate_response(request: InternalMessageRequest) -> GenerateReplyTas
             
             self_task = asyncio.create_task(grab_self())
             user_task = asyncio.create_task(grab_user(request.user_id))
-            convo_task = asyncio.create_task(get_conversation(request.user_id))
+            convo_task = asyncio.create_task(
+                get_recent_conversation_messages(request.user_id, CONVERSATION_MESSAGE_RETENTION_COUNT)
+            )
             all_mem_task = asyncio.create_task(get_all_message_memory(MESSAGE_HISTORY_COUNT))
             thoughts_task = asyncio.create_task(get_thoughts(1))
             
-            self, user, conversation, recent_all_messages, latest_thoughts = await asyncio.gather(
+            self, user, recent_user_messages, recent_all_messages, latest_thoughts = await asyncio.gather(
                 self_task, user_task, convo_task, all_mem_task, thoughts_task
             )
             
             user_id: str = user.get("user_id", request.user_id)
             username: str = user.get("username", "unknown")
             
-            # Guard: conversation may be None or missing 'messages'
-            convo_messages: List[Dict[str, Any]] = (conversation or {}).get("messages", [])
-            recent_user_messages = convo_messages[-CONVERSATION_MESSAGE_RETENTION_COUNT:] if convo_messages else []
-            
-            # Non-DM messages may require an implicit address check;
-            # default to False for DMs.
-            if getattr(request, "type", None) != DM_TYPE:
-                implicitly_addressed = await check_implicit_addressed(
-                    user_id=user_id,
-                    username=username,
-                    message=request.message,
-                    recent_all_messages=recent_all_messages,
-                )
-            else:
-                implicitly_addressed = False
+            # Non-DM messages may require an implicit address check; it only needs the prefetched
+            # history, so it runs alongside the delta/perception stage and is awaited before step 3.
+            is_dm = getattr(request, "type", None) == DM_TYPE
+            if not is_dm:
+                implicit_task = asyncio.create_task(_timed(
+                    check_implicit_addressed(
+                        user_id=user_id,
+                        username=username,
+                        message=request.message,
+                        recent_all_messages=recent_all_messages,
+                    ),
+                    timings,
+                    "implicit_address_check",
+                ))
             
             timings["setup_prefetch"] = time.perf_counter() - step_start
             
             queries: List[Dict[str, Any]] = []
             
-            # ---------- 1) Personality & Emotion Deltas ----------
-            step_start = time.perf_counter()
+            # ---------- 1+2) Personality & Emotion Deltas + Message Perception ----------
+            stage_start = time.perf_counter()
             sys_msg = _system_message(
                 personality=self["personality"],
                 emotions=self["emotional_status"],
                 identity=self["identity"],
             )
-            prompt = {
+            context_kwargs = dict(
+                user=user,
+                recent_user_messages=recent_user_messages,
+                recent_all_messages=recent_all_messages,
+                received_date=str(received_dt),
+                user_message=request.message,
+            )
+
+            def _perception_prompt() -> Dict[str, Any]:
+                return {
+                    "role": "user",
+                    "content": (
+                        build_message_perception_prompt(
+                            user=user,
+                            recent_messages=recent_user_messages, 
+                            recent_all_messages=recent_all_messages, 
+                            user_message=request.message, 
+                            received_date=received_dt,
+                            latest_thoughts=latest_thoughts
+                        )
+                    ),
+                }
+
+            delta_prompt = {
                 "role": USER_ROLE, 
                 "content": (
                     build_personality_emotional_delta_prompt(
-                        user=user,
                         agent=self,
-                        recent_user_messages=recent_user_messages,
-                        recent_all_messages=recent_all_messages,
-                        received_date=str(received_dt),
-                        user_message=request.message,
-                        latest_thought=latest_thoughts
+                        latest_thought=latest_thoughts,
+                        **context_kwargs,
                     )
                 )
             }
-            
-            response = await structured_query(
-                [sys_msg, prompt],
-                get_personality_emotion_delta_schema_lite(),
-                quality=False
-            )
-            response = _as_dict(response)
+
+            if DELTA_PERCEPTION_MODE == "combined":
+                # One fast-model call returns deltas and perception (judged from the pre-delta state).
+                combined_prompt = {
+                    "role": USER_ROLE,
+                    "content": build_personality_emotion_perception_prompt(
+                        agent=self,
+                        latest_thought=latest_thoughts,
+                        **context_kwargs,
+                    ),
+                }
+                response = await _timed(
+                    structured_query(
+                        [sys_msg, combined_prompt],
+                        get_personality_emotion_perception_schema_lite(),
+                        quality=False,
+                        stage="personality_emotion_perception",
+                    ),
+                    timings,
+                    "personality_emotion_perception_combined",
+                )
+                response = _as_dict(response)
+                perception = _as_dict(response.get("perception"))
+            elif DELTA_PERCEPTION_MODE == "concurrent":
+                # Perception only needs the persona for its system message; use the pre-delta state
+                # so both fast-model calls can be in flight at once.
+                response, perception = await asyncio.gather(
+                    _timed(
+                        structured_query([sys_msg, delta_prompt], get_personality_emotion_delta_schema_lite(), quality=False, stage="personality_emotion_deltas"),
+                        timings,
+                        "personality_emotion_deltas",
+                    ),
+                    _timed(
+                        structured_query([sys_msg, _perception_prompt()], get_message_perception_schema(), quality=False, stage="message_perception"),
+                        timings,
+                        "message_perception",
+                    ),
+                )
+                response = _as_dict(response)
+                perception = _as_dict(perception)
+            else:
+                response = await _timed(
+                    structured_query([sys_msg, delta_prompt], get_personality_emotion_delta_schema_lite(), quality=False, stage="personality_emotion_deltas"),
+                    timings,
+                    "personality_emotion_deltas",
+                )
+                response = _as_dict(response)
             
             altered_personality = alter_personality((response or {}).get("personality_deltas", {}), self)
             current_emotions = await alter_emotions((response or {}).get("emotion_deltas", {}), self)
             
-            timings["personality_emotion_deltas"] = time.perf_counter() - step_start
-            
-            # ---- 2) Message Perception -------------------------------------------
-            step_start = time.perf_counter()
+            # The transcript carried into response generation always reflects the post-delta state.
             queries.append(_system_message(personality=altered_personality, emotions=current_emotions, identity=self["identity"]))
-            prompt = {
-                "role": "user",
-                "content": (
-                    build_message_perception_prompt(
-                        user=user,
-                        recent_messages=recent_user_messages, 
-                        recent_all_messages=recent_all_messages, 
-                        user_message=request.message, 
-                        received_date=received_dt,
-                        latest_thoughts=latest_thoughts
-                    )
-                ),
-            }
-            
-            perception = await structured_query(
-                queries + [prompt], 
-                get_message_perception_schema(), 
-                quality=False
-            )
-            perception = _as_dict(perception)
+
+            if DELTA_PERCEPTION_MODE == "sequential":
+                perception = await _timed(
+                    structured_query(queries + [_perception_prompt()], get_message_perception_schema(), quality=False, stage="message_perception"),
+                    timings,
+                    "message_perception",
+                )
+                perception = _as_dict(perception)
             
             queries.append({
                 "role": BOT_ROLE,
@@ -227,48 +331,75 @@ async def generate_response(request: InternalMessageRequest) -> GenerateReplyTas
                 *( [add_thought_task] if add_thought_task else [] )
             )
             
-            timings["message_perception"] = time.perf_counter() - step_start
+            timings["delta_perception_stage"] = time.perf_counter() - stage_start
             
             # ---- 3) Response -------------------------------------------
             step_start = time.perf_counter()
             
-             # Retrieve memory + expressions concurrently
-            memory_tag = get_random_memory_tag(self)
-            
-            retrieved_memory = await retrieve_relevant_memory_from_tag(memory_tag)
-            available_expressions = get_available_expressions()
+            # Default to False for DMs; None means the classifier gave no usable answer.
+            implicit_verdict = (await implicit_task) if implicit_task else False
+            implicitly_addressed = bool(implicit_verdict)
             
-            memory: List[Dict[str, Any]] = retrieved_memory or []
-            
-            prompt = {
-                "role": "user",
-                "content": (
-                    build_response_prompt(
-                        user_id=user_id,
-                        username=username,
-                        personality=altered_personality, 
-                        current_emotions=current_emotions, 
-                        personality_language_guide=PERSONALITY_LANGUAGE_GUIDE, 
-                        latest_thought=latest_thoughts, 
-                        recent_messages=recent_user_messages, 
-                        recent_all_messages=recent_all_messages, 
-                        memory=memory, 
-                        expressions=available_expressions,
-                        implicit=implicitly_addressed,
-                        message=rich_message
-                    )
-                ),
-            }
-            
-            response_decision  = await structured_query(queries + [prompt], get_response_schema())
-            invalid_response_decision = not isinstance(response_decision, dict)
-            if not isinstance(response_decision, dict):
+            invalid_response_decision = False
+            if (
+                not is_dm
+                and IGNORE_UNADDRESSED_GROUP_MESSAGES
+                and implicit_verdict is False
+                and not _mentions_agent(request.message)
+            ):
+                # Group message neither mentions nor implicitly addresses the agent: the response
+                # prompt would only tell the model it has no obligation to reply, so skip the
+                # quality-model call and ignore it outright.
                 response_decision = {
                     "response_choice": IGNORE_CHOICE,
-                    "reason": "invalid_response_payload",
+                    "reason": "not_addressed",
                     "response": {},
                     "expression": "neutral",
                 }
+            else:
+                 # Retrieve memory + expressions concurrently
+                memory_tag = get_random_memory_tag(self)
+                
+                retrieved_memory = await retrieve_relevant_memory_from_tag(memory_tag)
+                available_expressions = get_available_expressions()
+                
+                memory: List[Dict[str, Any]] = retrieved_memory or []
+                
+                prompt = {
+                    "role": "user",
+                    "content": (
+                        build_response_prompt(
+                            user_id=user_id,
+                            username=username,
+                            personality=altered_personality, 
+                            current_emotions=current_emotions, 
+                            personality_language_guide=PERSONALITY_LANGUAGE_GUIDE, 
+                            latest_thought=latest_thoughts, 
+                            recent_messages=recent_user_messages, 
+                            recent_all_messages=recent_all_messages, 
+                            memory=memory, 
+                            expressions=available_expressions,
+                            implicit=implicitly_addressed,
+                            message=rich_message
+                        )
+                    ),
+                }
+                
+                response_decision  = await structured_query(
+                    queries + [prompt],
+                    get_response_schema(),
+                    hedge=True,
+                    on_delta=streamer.on_delta if streamer else None,
+                    stage="response_generation",
+                )
+                invalid_response_decision = not isinstance(response_decision, dict)
+                if not isinstance(response_decision, dict):
+                    response_decision = {
+                        "response_choice": IGNORE_CHOICE,
+                        "reason": "invalid_response_payload",
+                        "response": {},
+                        "expression": "neutral",
+                    }
             
             queries.append({
                 "role": BOT_ROLE,
@@ -329,6 +460,10 @@ async def generate_response(request: InternalMessageRequest) -> GenerateReplyTas
                 
             # Could add post response emotional delta
 
+            if streamer is not None:
+                await streamer.finish(agent_response_message)
+                if streamer.first_delta_at is not None:
+                    timings["response_first_delta"] = streamer.first_delta_at - step_start
             timings["response_generation"] = time.perf_counter() - step_start
             
             # ---------- Finalize ----------
@@ -353,14 +488,17 @@ async def generate_response(request: InternalMessageRequest) -> GenerateReplyTas
                 message_response=message_response,
                 user_id=user_id,
                 queries=queries,
+                timings=timings,
             )
             
                         
         except Exception as e:
+            if implicit_task is not None and not implicit_task.done():
+                implicit_task.cancel()
             raise HTTPException(status_code=500, detail="generate_response_failed") from e
                                
 
-async def post_processing(user_id: str, queries: List[Any]) -> None:
+async def post_processing(user_id: str, queries: List[Any]) -> Dict[str, float]:
     """
     Run post-interaction updates after a message exchange.
 
@@ -378,6 +516,9 @@ async def post_processing(user_id: str, queries: List[Any]) -> None:
     3) Thought update (optional)
        - Ask the model for a refreshed agent thought; persist if provided.
 
+    POST_PROCESSING_MODE=combined (default) asks for all three in one fast-model call;
+    `sequential` runs the three calls in order, each seeing the previous step's output.
+
     Parameters
     ----------
     user_id : str
@@ -385,6 +526,11 @@ async def post_processing(user_id: str, queries: List[Any]) -> None:
     queries : List[Any]
         The running LLM transcript/messages. This function appends diagnostics to it.
 
+    Returns
+    -------
+    Dict[str, float]
+        Seconds spent per step (stored in the post-processing job's meta).
+
     Notes
     -----
     - Uses concurrent I/O where safe to reduce latency.
@@ -403,98 +549,66 @@ async def post_processing(user_id: str, queries: List[Any]) -> None:
         user, self = await asyncio.gather(user_task, self_task)
         timings["prefetch_user_self"] = time.perf_counter() - step_start
         
-        # ---------- 1) Post-processing refresh ----------
-        step_start = time.perf_counter()
-        prompt = {
-                    "role": USER_ROLE,
-                    "content": (
-                        build_post_processing_prompt(user, EXTRINSIC_RELATIONSHIPS)
-                    ),
-                }
-        response = await structured_query(queries + [prompt], post_processing_schema(), False)
-        response = _as_dict(response)
-        
-        queries.append({"role": BOT_ROLE, "content": f" This is {AGENT_NAME}'s refreshed summary of {user_id}, updated extrinsic relationship with {user_id}, sentiment change towards {user_id}, and updated self-perception: {json.dumps(response)}"})
-        
-        # Apply sentiment deltas (defensive default)
-        sentiment_deltas = response.get("sentiment_deltas") or {}
-        await alter_sentiments(sentiment_deltas, user)
-        
-        summary = response.get("summary") or user.get("summary", "")
-        extrinsic_relationship = response.get("extrinsic_relationship") or user.get("extrinsic_relationship", "stranger")
-        identity = response.get("identity") or self.get("identity", "")
-        await update_summary_identity_relationship(
-            user_id,
-            summary,
-            extrinsic_relationship,
-            identity,
-        )
-        
-        timings["post_processing_refresh"] = time.perf_counter() - step_start
-           
-        # ---------- 2) Create memory (optional) ----------
-        step_start = time.perf_counter() 
-        prompt = {
-            "role": USER_ROLE, 
-            "content": build_memory_prompt(self.get("memory_tags") or [])
-        }
-            
-        response = await structured_query(queries + [prompt], get_memory_schema_lite(), quality=False)
-        response = _as_dict(response)
-        
-        created_memory = False
-        if response:
-            event = response.get("event")
-            thoughts = response.get("thoughts")
+        if POST_PROCESSING_MODE == "combined":
+            # ---------- 1-3) Refresh + memory + thought in one call ----------
+            step_start = time.perf_counter()
+            previous_thought = await get_thoughts(1)
+            prompt = {
+                "role": USER_ROLE,
+                "content": build_post_processing_combined_prompt(self, user, EXTRINSIC_RELATIONSHIPS, previous_thought),
+            }
+            response = await structured_query(queries + [prompt], get_post_processing_combined_schema(), quality=False, stage="post_processing")
+            response = _as_dict(response)
+            timings["post_processing_combined_query"] = time.perf_counter() - step_start
             
-            if event and thoughts:
-                tags = [t for t in (response.get("tags") or []) if t]
-                # Normalize & cap tags (first 3)
-                tags = tags[:3]
+            step_start = time.perf_counter()
+            await _apply_post_processing_refresh(user_id, user, self, _as_dict(response.get("refresh")), queries)
+            await asyncio.gather(
+                _store_episodic_memory(user_id, _as_dict(response.get("memory")), queries),
+                _store_message_thought(_as_dict(response.get("thought"))),
+            )
+            timings["post_processing_persist"] = time.perf_counter() - step_start
+        else:
+            # ---------- 1) Post-processing refresh ----------
+            step_start = time.perf_counter()
+            prompt = {
+                        "role": USER_ROLE,
+                        "content": (
+                            build_post_processing_prompt(user, EXTRINSIC_RELATIONSHIPS)
+                        ),
+                    }
+            response = await structured_query(queries + [prompt], post_processing_schema(), False, stage="post_processing_refresh")
+            await _apply_post_processing_refresh(user_id, user, self, _as_dict(response), queries)
+            
+            timings["post_processing_refresh"] = time.perf_counter() - step_start
+               
+            # ---------- 2) Create memory (optional) ----------
+            step_start = time.perf_counter() 
+            prompt = {
+                "role": USER_ROLE, 
+                "content": build_memory_prompt(self.get("memory_tags") or [])
+            }
                 
-                mem = Memory(
-                    agent_name=AGENT_NAME,
-                    user_id=user_id,
-                    event=event,
-                    thoughts=thoughts,
-                    significance=response.get("significance", "low"),
-                    emotional_impact=normalize_emotional_impact_fill_zeros(response.get("emotional_impact")),
-                    tags=tags,
-                )
+            response = await structured_query(queries + [prompt], get_memory_schema_lite(), quality=False, stage="post_processing_memory")
+            await _store_episodic_memory(user_id, _as_dict(response), queries)
             
-                await asyncio.gather(
-                        add_memory(mem),
-                        update_tags(tags),
-                    )
-
-                created_memory = True
-        
-        timings["memory_creation"] = time.perf_counter() - step_start
+            timings["memory_creation"] = time.perf_counter() - step_start
+                
+            # ---- 3) Update thought ----------------------------------------------
+            step_start = time.perf_counter() 
+            previous_thought = await get_thoughts(1)
             
-        queries.append({"role": BOT_ROLE, "content": f"This is the decision on whether this interaction should be stored in {AGENT_NAME}'s long-term memory, and the episodic memory if so:{json.dumps(response)}"})
+            prompt = {
+                "role": USER_ROLE,
+                "content": (
+                    build_message_thought_prompt(self, previous_thought)
+                )
+            }
             
-        # ---- 3) Update thought ----------------------------------------------
-        step_start = time.perf_counter() 
-        previous_thought = await get_thoughts(1)
-        
-        prompt = {
-            "role": USER_ROLE,
-            "content": (
-                build_message_thought_prompt(self, previous_thought)
-            )
-        }
-        
-        response = await structured_query(queries + [prompt], get_thought_schema())
-        
-        thought_text = (response or {}).get("thought")
-        
-        if thought_text and str(thought_text).lower() != "no":
-            await add_thought({
-                "thought": thought_text,
-                "timestamp": datetime.now(timezone.utc),
-            })
-              
-        timings["updatthought_updateng_thought"] = time.perf_counter() - step_start
+            response = await structured_query(queries + [prompt], get_thought_schema(), stage="post_processing_thought")
+            await _store_message_thought(_as_dict(response))
+                  
+            timings["updating_thought"] = time.perf_counter() - step_start
         
         # ---------- finalize ----------
         timings["total_post_processing"] = time.perf_counter() - t0
@@ -506,11 +620,68 @@ async def post_processing(user_id: str, queries: List[Any]) -> None:
             print("\nPost Processing Query List")
             print(queries)
         
-        return None
+        return timings
     except Exception as e:
         raise HTTPException(status_code=500, detail="post_processing_failed") from e
     
 
+async def _apply_post_processing_refresh(user_id: str, user: Dict[str, Any], self: Dict[str, Any], response: Dict[str, Any], queries: List[Any]) -> None:
+    queries.append({"role": BOT_ROLE, "content": f" This is {AGENT_NAME}'s refreshed summary of {user_id}, updated extrinsic relationship with {user_id}, sentiment change towards {user_id}, and updated self-perception: {json.dumps(response)}"})
+    
+    # Apply sentiment deltas (defensive default)
+    sentiment_deltas = response.get("sentiment_deltas") or {}
+    await alter_sentiments(sentiment_deltas, user)
+    
+    summary = response.get("summary") or user.get("summary", "")
+    extrinsic_relationship = response.get("extrinsic_relationship") or user.get("extrinsic_relationship", "stranger")
+    identity = response.get("identity") or self.get("identity", "")
+    await update_summary_identity_relationship(
+        user_id,
+        summary,
+        extrinsic_relationship,
+        identity,
+    )
+
+
+async def _store_episodic_memory(user_id: str, response: Dict[str, Any], queries: List[Any]) -> bool:
+    queries.append({"role": BOT_ROLE, "content": f"This is the decision on whether this interaction should be stored in {AGENT_NAME}'s long-term memory, and the episodic memory if so:{json.dumps(response)}"})
+    
+    event = response.get("event")
+    thoughts = response.get("thoughts")
+    if not (event and thoughts):
+        return False
+    
+    tags = [t for t in (response.get("tags") or []) if t]
+    # Normalize & cap tags (first 3)
+    tags = tags[:3]
+    
+    mem = Memory(
+        agent_name=AGENT_NAME,
+        user_id=user_id,
+        event=event,
+        thoughts=thoughts,
+        significance=response.get("significance", "low"),
+        emotional_impact=normalize_emotional_impact_fill_zeros(response.get("emotional_impact")),
+        tags=tags,
+    )
+
+    await asyncio.gather(
+            add_memory(mem),
+            update_tags(tags),
+        )
+    return True
+
+
+async def _store_message_thought(response: Dict[str, Any]) -> None:
+    thought_text = response.get("thought")
+    
+    if thought_text and str(thought_text).lower() != "no":
+        await add_thought({
+            "thought": thought_text,
+            "timestamp": datetime.now(timezone.utc),
+        })
+
+
 def alter_personality(personality_deltas, self) -> Any:
     # Convert existing DB personality_matrix -> PersonalityMatrix
     flat = self["personality"].get("personality_matrix", {})
@@ -546,6 +717,7 @@ async def alter_emotions(emotion_deltas, self) -> Any:
         reason=current.get("reason")
     )
     new_state = apply_deltas_emotion(emo, EmotionalDelta(**normalized_deltas), cap=7.0)
+    changed = {k: t.value - emo.emotions[k].value for k, t in new_state.emotions.items() if t.value != emo.emotions[k].value}
     # persist back in your DB shape
     self["emotional_status"]["emotions"] = {
         k: new_state.emotions[k].model_dump() for k in new_state.emotions
@@ -553,7 +725,7 @@ async def alter_emotions(emotion_deltas, self) -> Any:
     if new_state.reason:
         self["emotional_status"]["reason"] = new_state.reason
  
-    await update_agent_emotions(self["emotional_status"])
+    await queue_agent_emotions(changed, new_state.reason)
     
     return self["emotional_status"]
 
@@ -575,16 +747,16 @@ async def alter_sentiments(sentiment_deltas, user)-> None:
         mat, SentimentDelta(**normalized_deltas), cap=5.0  # sentiment changes are slower
     )
     
-    # Put back into the persisted shape        
-    user["sentiment_status"]["sentiments"] = {
-        k: new_mat.sentiments[k].model_dump() for k in new_mat.sentiments
+    # Persist only the per-trait changes (clamped $inc), then take the stored post-image
+    changed = {
+        k: t.value - mat.sentiments[k].value for k, t in new_mat.sentiments.items() if t.value != mat.sentiments[k].value
     }
-    if new_mat.reason:
-        user["sentiment_status"]["reason"] = new_mat.reason
+    updated = await apply_user_sentiment_deltas(user["user_id"], changed, new_mat.reason)
+    if updated:
+        user["sentiment_status"] = updated
 
-    await update_user_sentiment(user["user_id"], user["sentiment_status"])
-
-async def check_implicit_addressed(user_id: str, username: str, message: str, recent_all_messages: Any) -> bool:
+async def check_implicit_addressed(user_id: str, username: str, message: str, recent_all_messages: Any) -> Optional[bool]:
+    """Return whether the message implicitly addresses the agent, or None if the classifier failed."""
     implicit_addressing_result = await structured_query([{
             "role": USER_ROLE, 
             "content": (
@@ -595,7 +767,13 @@ async def check_implicit_addressed(user_id: str, username: str, message: str, re
                     sender_username=username
                 )
             )
-        }], implicitly_addressed_schema())
-    implicit_addressing_result = _as_dict(implicit_addressing_result)
+        }], implicitly_addressed_schema(), stage="implicit_addressing")
+    verdict = _as_dict(implicit_addressing_result).get("implicitly_addressed")
     
-    return implicit_addressing_result.get("implicitly_addressed") == "yes"
+    if verdict not in {"yes", "no"}:
+        return None
+    return verdict == "yes"
+
+
+def _mentions_agent(message: str) -> bool:
+    return re.search(rf"\b{re.escape(AGENT_NAME)}\b", message or "", re.IGNORECASE) is not None
@@ -1,36 +1,55 @@
 import asyncio
 import json
-from typing import Any, Dict, List
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import openai
 
+from app.constants.schema_registry import schema_entry
 from app.core.config import (
     DEBUG_MODE,
     GPT_FAST,
     GPT_QUALITY,
+    LLM_HEDGE_BACKUP,
+    LLM_FAILOVER_ENABLED,
+    LLM_HEDGE_ENABLED,
     LLM_MODE,
-    OLLAMA_API_KEY,
-    OLLAMA_BASE_URL,
     OLLAMA_FAST_MODEL,
     OLLAMA_QUALITY_MODEL,
     OPENAI_KEY,
 )
+from app.services.fake_llm import FAKE_FAST_MODEL, FAKE_QUALITY_MODEL
+from app.services.json_stream import JsonObjectExtractor
+from app.services.llm_breaker import breaker_allows, circuit, record_failover
+from app.services.llm_capabilities import (
+    record_schema_attempts,
+    rejects_output_format,
+    remember_strategy,
+    structured_output_strategies,
+)
+from app.services.llm_cache import cache_enabled_for, cache_get, cache_set, request_fingerprint, schema_name
+from app.services.llm_client import get_llm_client
+from app.services.llm_latency import hedge_delay_seconds, record_hedge, record_latency
+from app.services.llm_limiter import limiter_saturated, llm_slot
+from app.services.llm_singleflight import coalesce
+from app.services.llm_usage import cached_prompt_tokens, record_prompt_cache_usage, record_saved_call, record_usage, usage_scope
+from app.services.schema_grammar import grammar_for
+from app.services.schema_validator import validate_payload
 
 LOCAL_MAX_SCHEMA_RETRIES = 2
-MAX_SCHEMA_ERRORS = 12
 
+DeltaCallback = Callable[[str], Awaitable[None]]
 
-def _get_client() -> openai.OpenAI:
-    if LLM_MODE == "local":
-        return openai.OpenAI(base_url=OLLAMA_BASE_URL, api_key=OLLAMA_API_KEY)
 
-    if not OPENAI_KEY:
-        raise RuntimeError("OPENAI_API_KEY is not set.")
-    return openai.OpenAI(api_key=OPENAI_KEY)
+def _get_client(mode: str = LLM_MODE) -> openai.AsyncOpenAI:
+    return get_llm_client(mode)
 
 
-def _get_model(quality: bool) -> str:
-    if LLM_MODE == "local":
+def _get_model(quality: bool, mode: str = LLM_MODE) -> str:
+    if mode == "fake":
+        return FAKE_QUALITY_MODEL if quality else FAKE_FAST_MODEL
+    if mode == "local":
         local_model = OLLAMA_QUALITY_MODEL if quality else OLLAMA_FAST_MODEL
         if not local_model:
             key = "OLLAMA_QUALITY_MODEL" if quality else "OLLAMA_FAST_MODEL"
@@ -44,6 +63,32 @@ def _get_model(quality: bool) -> str:
     return hosted_model
 
 
+async def _route(quality: bool) -> Tuple[str, str]:
+    """
+    Pick (mode, model) for a call: the configured mode, or the other provider mode when the
+    configured model's breaker is open and LLM_FAILOVER_ENABLED is set (and that side is configured
+    and healthy). Otherwise stays put and lets the open breaker fail the call fast.
+    """
+    model = _get_model(quality)
+    if not LLM_FAILOVER_ENABLED or LLM_MODE == "fake" or breaker_allows(LLM_MODE, model):
+        return LLM_MODE, model
+
+    failover_mode = "local" if LLM_MODE == "hosted" else "hosted"
+    if failover_mode == "hosted" and not OPENAI_KEY:
+        return LLM_MODE, model
+    try:
+        failover_model = _get_model(quality, failover_mode)
+    except RuntimeError:
+        return LLM_MODE, model
+    if not breaker_allows(failover_mode, failover_model):
+        return LLM_MODE, model
+
+    await record_failover(LLM_MODE, model)
+    if DEBUG_MODE:
+        print(f"LLM failover: {LLM_MODE}:{model} -> {failover_mode}:{failover_model}")
+    return failover_mode, failover_model
+
+
 def _normalize_content(content: Any) -> str:
     if isinstance(content, str):
         return content
@@ -73,38 +118,10 @@ def _extract_json_object(text: str) -> str:
     except Exception:
         pass
 
-    start = content.find("{")
-    while start != -1:
-        depth = 0
-        in_string = False
-        escaped = False
-        for idx in range(start, len(content)):
-            ch = content[idx]
-            if escaped:
-                escaped = False
-                continue
-            if ch == "\\":
-                escaped = True
-                continue
-            if ch == '"':
-                in_string = not in_string
-                continue
-            if in_string:
-                continue
-            if ch == "{":
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-                if depth == 0:
-                    candidate = content[start : idx + 1]
-                    try:
-                        json.loads(candidate)
-                        return candidate
-                    except Exception:
-                        break
-        start = content.find("{", start + 1)
-
-    raise ValueError("No JSON object found in model response.")
+    # Single pass over the text (no rescan per '{'): multi-KB malformed local-model
+    # output used to make this quadratic.
+    extractor = JsonObjectExtractor()
+    return extractor.feed(content) or extractor.finish()
 
 
 def _parse_response_content(content: Any) -> Any:
@@ -114,233 +131,328 @@ def _parse_response_content(content: Any) -> Any:
 
 
 def _messages_with_schema_guard(messages: List[Dict[str, Any]], schema: Dict[str, Any]) -> List[Dict[str, Any]]:
-    json_schema = schema.get("json_schema", {})
-    schema_name = json_schema.get("name", "response")
-    schema_body = json_schema.get("schema", schema)
-
+    entry = schema_entry(schema)
     guard_message = {
         "role": "system",
         "content": (
-            f"Return only valid JSON for schema '{schema_name}'. "
-            f"Do not include markdown or explanatory text.\nSchema:\n{json.dumps(schema_body)}"
+            f"Return only valid JSON for schema '{entry.name}'. "
+            f"Do not include markdown or explanatory text.\nSchema:\n{entry.body_json}"
         ),
     }
-    return [guard_message, *messages]
-
-
-def _schema_root(schema: Dict[str, Any]) -> Dict[str, Any]:
-    if schema.get("type") == "json_schema":
-        return schema.get("json_schema", {}).get("schema", {})
-    return schema
-
-
-def _matches_type(value: Any, expected: str) -> bool:
-    if expected == "object":
-        return isinstance(value, dict)
-    if expected == "array":
-        return isinstance(value, list)
-    if expected == "string":
-        return isinstance(value, str)
-    if expected == "number":
-        return isinstance(value, (int, float)) and not isinstance(value, bool)
-    if expected == "integer":
-        return isinstance(value, int) and not isinstance(value, bool)
-    if expected == "boolean":
-        return isinstance(value, bool)
-    if expected == "null":
-        return value is None
-    return True
-
-
-def _validate_json_value(value: Any, schema_node: Dict[str, Any], path: str, errors: List[str]) -> None:
-    if len(errors) >= MAX_SCHEMA_ERRORS or not isinstance(schema_node, dict):
-        return
-
-    type_spec = schema_node.get("type")
-    if type_spec is not None:
-        allowed_types = type_spec if isinstance(type_spec, list) else [type_spec]
-        if not any(_matches_type(value, t) for t in allowed_types):
-            errors.append(f"{path}: expected type {allowed_types}, got {type(value).__name__}")
-            return
-        if value is None:
-            return
-
-    if "enum" in schema_node and value not in schema_node["enum"]:
-        errors.append(f"{path}: value {value!r} is not in enum {schema_node['enum']}")
-
-    if isinstance(value, str):
-        min_length = schema_node.get("minLength")
-        max_length = schema_node.get("maxLength")
-        if isinstance(min_length, int) and len(value) < min_length:
-            errors.append(f"{path}: string shorter than minLength {min_length}")
-        if isinstance(max_length, int) and len(value) > max_length:
-            errors.append(f"{path}: string longer than maxLength {max_length}")
-
-    if isinstance(value, (int, float)) and not isinstance(value, bool):
-        minimum = schema_node.get("minimum")
-        maximum = schema_node.get("maximum")
-        if minimum is not None and value < minimum:
-            errors.append(f"{path}: value {value} below minimum {minimum}")
-        if maximum is not None and value > maximum:
-            errors.append(f"{path}: value {value} above maximum {maximum}")
-
-    if isinstance(value, list):
-        min_items = schema_node.get("minItems")
-        max_items = schema_node.get("maxItems")
-        if isinstance(min_items, int) and len(value) < min_items:
-            errors.append(f"{path}: array smaller than minItems {min_items}")
-        if isinstance(max_items, int) and len(value) > max_items:
-            errors.append(f"{path}: array larger than maxItems {max_items}")
-        if schema_node.get("uniqueItems"):
-            serialized = [json.dumps(item, sort_keys=True, default=str) for item in value]
-            if len(set(serialized)) != len(serialized):
-                errors.append(f"{path}: array contains duplicate items but uniqueItems=true")
-
-        item_schema = schema_node.get("items")
-        if isinstance(item_schema, dict):
-            for idx, item in enumerate(value):
-                _validate_json_value(item, item_schema, f"{path}[{idx}]", errors)
-                if len(errors) >= MAX_SCHEMA_ERRORS:
-                    return
-
-    if isinstance(value, dict):
-        properties = schema_node.get("properties", {})
-        required = schema_node.get("required", [])
-
-        for req_key in required:
-            if req_key not in value:
-                errors.append(f"{path}.{req_key}: missing required field")
-                if len(errors) >= MAX_SCHEMA_ERRORS:
-                    return
-
-        additional = schema_node.get("additionalProperties", True)
-        for key, item_value in value.items():
-            if key in properties:
-                _validate_json_value(item_value, properties[key], f"{path}.{key}", errors)
-            elif additional is False:
-                errors.append(f"{path}.{key}: additional property not allowed")
-            elif isinstance(additional, dict):
-                _validate_json_value(item_value, additional, f"{path}.{key}", errors)
-            if len(errors) >= MAX_SCHEMA_ERRORS:
-                return
-
-
-def _validate_structured_payload(payload: Any, schema: Dict[str, Any]) -> List[str]:
-    root = _schema_root(schema)
-    if not root:
-        return []
-    errors: List[str] = []
-    _validate_json_value(payload, root, "$", errors)
-    return errors
+    # Appended, not prepended: a per-schema message at the front would break the shared
+    # system prefix that prompt/KV caching depends on.
+    return [*messages, guard_message]
 
 
 def _build_retry_prompt(schema: Dict[str, Any], errors: List[str]) -> str:
-    root = _schema_root(schema)
     issue_lines = "\n".join(f"- {error}" for error in errors[:8])
     return (
         "Your previous JSON output failed schema validation.\n"
         f"Issues:\n{issue_lines}\n\n"
         "Return ONLY corrected JSON. Do not include markdown, comments, or prose.\n"
-        f"Schema:\n{json.dumps(root)}"
+        f"Schema:\n{schema_entry(schema).body_json}"
     )
 
 
+@asynccontextmanager
+async def _provider_request(mode: str, model: str) -> AsyncIterator[None]:
+    """
+    One upstream request: breaker check, limiter slot, then the request itself. The breaker's slow-call
+    clock and the model's latency window both start once the slot is acquired, so limiter queueing and
+    earlier schema-correction attempts never count as provider time. A request cancelled by a hedge
+    records its elapsed time (a lower bound) so slow tails stay visible to the hedge deadline.
+    """
+    async with circuit(mode, model, admission=llm_slot(model)):
+        start = time.perf_counter()
+        try:
+            yield
+        except asyncio.CancelledError:
+            await asyncio.shield(record_latency(model, time.perf_counter() - start))
+            raise
+        await record_latency(model, time.perf_counter() - start)
+
+
+async def _stream_completion(
+    client: openai.AsyncOpenAI,
+    model: str,
+    messages: List[Dict[str, Any]],
+    response_format: Any,
+    on_delta: DeltaCallback,
+    **kwargs: Any,
+) -> Any:
+    """
+    Streamed chat completion: forwards raw content deltas to `on_delta` as they arrive and
+    returns the assembled completion (with usage, when the provider reports it).
+    """
+    async with client.beta.chat.completions.stream(
+        model=model,
+        messages=messages,
+        response_format=response_format,
+        stream_options={"include_usage": True},
+        **kwargs,
+    ) as stream:
+        async for event in stream:
+            if event.type == "content.delta" and event.delta:
+                await on_delta(event.delta)
+        return await stream.get_final_completion()
+
+
+def _local_output_constraint(strategy: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Request kwargs that constrain a local model's output to `schema` with the given strategy."""
+    if strategy == "json_schema":
+        return {"response_format": schema}
+    if strategy == "grammar":
+        # llama.cpp rejects a grammar combined with response_format, so send only the grammar.
+        return {"extra_body": {"grammar": grammar_for(schema)}}
+    return {"response_format": {"type": "json_object"}}
+
+
 async def _create_local_structured_response(
-    client: openai.OpenAI,
+    client: openai.AsyncOpenAI,
+    mode: str,
     model: str,
     messages: List[Dict[str, Any]],
     schema: Dict[str, Any],
-    force_json_mode: bool = False,
-) -> Any:
-    if not force_json_mode:
-        try:
-            return await asyncio.to_thread(
-                client.chat.completions.create,
+    on_delta: Optional[DeltaCallback] = None,
+) -> Tuple[Any, str]:
+    """
+    One constrained completion; returns (response, strategy used). Strategies the endpoint
+    rejects as an unsupported output format fall through to the next one, and the first accepted
+    is remembered for the model (for LOCAL_STRUCTURED_OUTPUT_MEMORY_SECONDS), so the fallback probe
+    happens once per model rather than on every call.
+    """
+    async def _complete(constraint: Dict[str, Any]) -> Any:
+        async with _provider_request(mode, model):
+            if on_delta is not None:
+                response_format = constraint.pop("response_format", openai.NOT_GIVEN)
+                return await _stream_completion(
+                    client, model, messages, response_format, on_delta, temperature=0, **constraint
+                )
+            return await client.chat.completions.create(
                 model=model,
                 messages=messages,
-                response_format=schema,
                 temperature=0,
+                **constraint,
             )
+
+    strategies = await structured_output_strategies(model)
+    schema_skipped = False
+    for index, strategy in enumerate(strategies):
+        last = index == len(strategies) - 1
+        try:
+            constraint = _local_output_constraint(strategy, schema)
         except Exception:
-            pass
+            # This schema can't be expressed with the strategy (e.g. no grammar for it); that says
+            # nothing about the endpoint, so fall back for this call without remembering it.
+            if last:
+                raise
+            schema_skipped = True
+            continue
+        try:
+            response = await _complete(constraint)
+        except Exception as exc:
+            # Only a rejected output format moves on; auth, context-length, and provider errors don't.
+            if last or not rejects_output_format(exc):
+                raise
+            continue
+        if not schema_skipped:
+            await remember_strategy(model, strategy)
+        return response, strategy
+    raise RuntimeError("No structured output strategy configured.")
+
+
+async def _query_model(
+    client: openai.AsyncOpenAI,
+    mode: str,
+    selected_model: str,
+    messages: List[Dict[str, Any]],
+    schema: Dict[str, Any],
+    on_delta: Optional[DeltaCallback] = None,
+) -> Tuple[Any, Any]:
+    """
+    Run one structured completion against the provider and return (parsed_content, raw_response).
+    With `on_delta`, the completion is streamed (local mode: the first attempt only; schema
+    correction retries are not streamed). Raises on transport errors or schema-invalid output.
+    """
+    if mode == "local":
+        base_messages = _messages_with_schema_guard(messages, schema)
+        working_messages = list(base_messages)
+        parsed_content = None
+        response = None
+        validation_errors: List[str] = []
+
+        for attempt in range(LOCAL_MAX_SCHEMA_RETRIES + 1):
+            started = time.perf_counter()
+            response, strategy = await _create_local_structured_response(
+                client,
+                mode,
+                selected_model,
+                working_messages,
+                schema,
+                on_delta=on_delta if attempt == 0 else None,
+            )
+            await record_usage(selected_model, response.usage, time.perf_counter() - started)
+
+            raw_content = _normalize_content(response.choices[0].message.content)
+            try:
+                parsed_content = _parse_response_content(raw_content)
+                validation_errors = validate_payload(parsed_content, schema)
+                if not validation_errors:
+                    break
+            except Exception as parse_error:
+                validation_errors = [f"$: could not parse JSON output ({parse_error})"]
+
+            if attempt >= LOCAL_MAX_SCHEMA_RETRIES:
+                await record_schema_attempts(schema_name(schema), strategy, attempt + 1, valid=False)
+                raise ValueError(
+                    "Local model failed schema validation after retries: "
+                    + "; ".join(validation_errors[:8])
+                )
 
-    # Ollama models commonly support JSON mode even when full json_schema mode is unsupported.
-    return await asyncio.to_thread(
-        client.chat.completions.create,
-        model=model,
-        messages=messages,
-        response_format={"type": "json_object"},
-        temperature=0,
-    )
+            correction_prompt = _build_retry_prompt(schema, validation_errors)
+            working_messages = base_messages + [
+                {"role": "assistant", "content": raw_content[:6000]},
+                {"role": "user", "content": correction_prompt},
+            ]
+        await record_schema_attempts(schema_name(schema), strategy, attempt + 1, valid=True)
+        return parsed_content, response
+
+    started = time.perf_counter()
+    async with _provider_request(mode, selected_model):
+        if on_delta is not None:
+            response = await _stream_completion(client, selected_model, messages, schema, on_delta)
+        else:
+            response = await client.beta.chat.completions.parse(
+                model=selected_model,
+                messages=messages,
+                response_format=schema,
+            )
+    await record_usage(selected_model, response.usage, time.perf_counter() - started)
+    parsed_content = _parse_response_content(response.choices[0].message.content)
+    validation_errors = validate_payload(parsed_content, schema)
+    if validation_errors:
+        raise ValueError(
+            "Hosted model returned schema-invalid output: "
+            + "; ".join(validation_errors[:8])
+        )
+    return parsed_content, response
+
+
+async def _run_query(
+    mode: str,
+    selected_model: str,
+    messages: List[Dict[str, Any]],
+    schema: Dict[str, Any],
+    on_delta: Optional[DeltaCallback] = None,
+) -> Tuple[Any, Any]:
+    return await _query_model(_get_client(mode), mode, selected_model, messages, schema, on_delta)
+
+
+def _discard(task: "asyncio.Task") -> None:
+    task.cancel()
+    # Retrieve the outcome so a late failure isn't reported as "never retrieved".
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
 
 
-async def structured_query(messages, schema, quality=True):
+async def _hedged_query(
+    mode: str,
+    selected_model: str,
+    messages: List[Dict[str, Any]],
+    schema: Dict[str, Any],
+) -> Tuple[Any, Any]:
+    """
+    Send the primary request; if it hasn't finished by the model's hedge deadline, send a
+    backup (same or fast model) and return the first schema-valid result, cancelling the other.
+    No backup is sent while the backup model's limiter already has requests queued: it would
+    only wait behind them.
+    """
+    primary = asyncio.create_task(_run_query(mode, selected_model, messages, schema))
+    pending = {primary}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=hedge_delay_seconds(selected_model))
+        if done:
+            return primary.result()
+
+        backup_model = selected_model if LLM_HEDGE_BACKUP == "same" else _get_model(False, mode)
+        if limiter_saturated(backup_model):
+            await record_hedge(selected_model, "skipped")
+            return await primary
+        backup = asyncio.create_task(_run_query(mode, backup_model, messages, schema))
+        pending.add(backup)
+        await record_hedge(selected_model, "fired")
+
+        last_error: BaseException = RuntimeError("hedged request produced no result")
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    await record_hedge(selected_model, "backup_won" if task is backup else "primary_won")
+                    return task.result()
+                last_error = task.exception()
+        raise last_error
+    finally:
+        for task in pending:
+            _discard(task)
+
+
+async def structured_query(messages, schema, quality=True, hedge=False, on_delta=None, stage=None):
     """
     Queries the OpenAI API to receive a structured response.
+    Identical (model, messages, schema) requests are served from the response cache when enabled,
+    and identical in-flight requests are coalesced into one upstream call. Calls to a provider whose
+    circuit breaker is open fail fast (or fail over to the other mode when LLM_FAILOVER_ENABLED).
 
     :param messages: List of message objects for the query
     :param schema: Schema for structuring the result (as JSON)
+    :param hedge: Allow a backup request if this one runs past the model's hedge deadline (LLM_HEDGE_ENABLED)
+    :param on_delta: Async callback for raw JSON content deltas; streams the completion (disables hedging).
+        Not called for cached or coalesced results, so callers should fall back to the parsed result.
+    :param stage: Pipeline stage the call's token usage is attributed to (defaults to the schema name);
+        job and user attribution come from the enclosing usage_scope()
     :return: Parsed response as a Python dictionary, or None on error
     """
+    stage = stage or schema_name(schema)
     try:
-        client = _get_client()
-        selected_model = _get_model(quality)
-
-        if LLM_MODE == "local":
-            base_messages = _messages_with_schema_guard(messages, schema)
-            working_messages = list(base_messages)
-            parsed_content = None
-            response = None
-            validation_errors: List[str] = []
-
-            for attempt in range(LOCAL_MAX_SCHEMA_RETRIES + 1):
-                response = await _create_local_structured_response(
-                    client,
-                    selected_model,
-                    working_messages,
-                    schema,
-                    force_json_mode=attempt > 0,
-                )
-
-                raw_content = _normalize_content(response.choices[0].message.content)
-                try:
-                    parsed_content = _parse_response_content(raw_content)
-                    validation_errors = _validate_structured_payload(parsed_content, schema)
-                    if not validation_errors:
-                        break
-                except Exception as parse_error:
-                    validation_errors = [f"$: could not parse JSON output ({parse_error})"]
-
-                if attempt >= LOCAL_MAX_SCHEMA_RETRIES:
-                    raise ValueError(
-                        "Local model failed schema validation after retries: "
-                        + "; ".join(validation_errors[:8])
-                    )
-
-                correction_prompt = _build_retry_prompt(schema, validation_errors)
-                working_messages = base_messages + [
-                    {"role": "assistant", "content": raw_content[:6000]},
-                    {"role": "user", "content": correction_prompt},
-                ]
+        mode, selected_model = await _route(quality)
+        request_key = request_fingerprint(mode, selected_model, messages, schema)
+
+        use_cache = cache_enabled_for(schema)
+        if use_cache:
+            cached = await cache_get(request_key, schema)
+            if cached is not None:
+                if DEBUG_MODE:
+                    print(f"LLM cache hit: {schema_name(schema)} ({selected_model})")
+                with usage_scope(stage=stage):
+                    await record_saved_call("cache_hits")
+                return cached
+
+        # Concurrent identical requests share one upstream call; followers get response=None.
+        if on_delta is not None:
+            # One visible stream per call: a hedge would race two token streams into the same callback.
+            query = lambda: _run_query(mode, selected_model, messages, schema, on_delta)
+        elif hedge and LLM_HEDGE_ENABLED:
+            query = lambda: _hedged_query(mode, selected_model, messages, schema)
         else:
-            response = await asyncio.to_thread(
-                client.beta.chat.completions.parse,
-                model=selected_model,
-                messages=messages,
-                response_format=schema,
-            )
-            parsed_content = _parse_response_content(response.choices[0].message.content)
-            validation_errors = _validate_structured_payload(parsed_content, schema)
-            if validation_errors:
-                raise ValueError(
-                    "Hosted model returned schema-invalid output: "
-                    + "; ".join(validation_errors[:8])
-                )
+            query = lambda: _run_query(mode, selected_model, messages, schema)
+        with usage_scope(stage=stage):
+            parsed_content, response = await coalesce(request_key, query)
+            if response is None:
+                await record_saved_call("coalesced")
+
+        if response is not None:
+            await record_prompt_cache_usage(selected_model, response.usage)
 
         if DEBUG_MODE:
-            print(f"LLM mode: {LLM_MODE}, model: {selected_model}")
+            print(f"LLM mode: {mode}, model: {selected_model}")
             print(parsed_content)
-            print(response.usage)
+            if response is not None:
+                print(response.usage)
+                print(f"LLM cached prompt tokens: {cached_prompt_tokens(response.usage)}")
+            else:
+                print(f"LLM request coalesced: {schema_name(schema)}")
+
+        if use_cache and response is not None:
+            await cache_set(request_key, parsed_content, schema)
 
         return parsed_content
     except Exception as error:
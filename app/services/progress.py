@@ -5,6 +5,9 @@ from typing import Optional
 
 from app.core.config import APP_ENV, REDIS_CA_CERT, REDIS_TLS_INSECURE_SKIP_VERIFY, REDIS_URL
 
+_publisher: Optional[redis.Redis] = None
+
+
 def _redis_from_env():
     url = REDIS_URL
     if url.startswith("rediss://"):
@@ -17,17 +20,31 @@ def _redis_from_env():
         return redis.from_url(url, **kwargs)
     return redis.from_url(url)
 
+
+def _get_publisher() -> redis.Redis:
+    # One pooled client per process; token deltas publish many events per job.
+    global _publisher
+    if _publisher is None:
+        _publisher = _redis_from_env()
+    return _publisher
+
+
 def publish_job_event(
     job_id: str,
     *,
     progress: Optional[float] = None,
     status: Optional[str] = None,
     error: Optional[str] = None,
+    delta: Optional[str] = None,
+    seq: Optional[int] = None,
+    replace: bool = False,
 ) -> None:
     """
     Publish a job event to Redis pub/sub.
     Channel: job:{job_id}
-    Payload keys: job_id, progress?, status?, error?
+    Payload keys: job_id, progress?, status?, error?, delta?, seq?, replace?
+    `delta` is a chunk of the streamed reply text (`seq` orders chunks); with `replace`
+    it is the full text and supersedes everything streamed before it.
     """
     payload = {"job_id": job_id}
     if progress is not None:
@@ -36,9 +53,15 @@ def publish_job_event(
         payload["status"] = status
     if error:
         payload["error"] = error
+    if delta is not None:
+        payload["delta"] = delta
+    if seq is not None:
+        payload["seq"] = seq
+    if replace:
+        payload["replace"] = True
 
     try:
-        r = _redis_from_env()
+        r = _get_publisher()
         r.publish(f"job:{job_id}", json.dumps(payload))
     except Exception:
         # Swallow errors so jobs don’t crash if pub/sub is unavailable
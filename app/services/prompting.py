@@ -1,11 +1,14 @@
 from datetime import datetime
 import json
 import textwrap
+from functools import lru_cache
 from typing import Any, List, Mapping, Optional, Sequence
 import random as _random
 
 from app.constants.constants import PERSONALITY_LANGUAGE_GUIDE, REGISTRY, THOUGHT_VIBES
 from app.core.config import AGENT_NAME, RANDOM_THOUGHT_PROBABILITY
+from app.services.context_budget import fit_text, render_history, render_memory, render_thoughts
+from app.services.state_render import render_agent, render_emotions, render_personality, render_sentiments, sentiment_legend, trait_legend
 from app.services.expressions import get_available_expressions
 
 def build_emotion_delta_prompt_thinking(
@@ -29,7 +32,7 @@ def build_emotion_delta_prompt_thinking(
     
     body = f"""
         You are {agent['name']}. Below are the key details of your current state and context:
-        - Latest thought: {latest_thought}
+        - Latest thought: {render_thoughts(latest_thought)}
         
         Task:
         Propose small **deltas** to the current emotional state in response to the latest thought.
@@ -51,32 +54,16 @@ def build_emotion_delta_prompt_thinking(
         """
     return textwrap.dedent(body)
 
-def build_personality_emotional_delta_prompt(
+def _personality_emotional_delta_task(
     agent: Any,
     user: Any,
-    recent_user_messages: str = "[]",
-    recent_all_messages: str = "[]",
-    received_date: str = "",
-    user_message: str = "",
-    latest_thought: str = "",
     *,
     typical_personality_cap: int = 3,
     typical_emotion_cap: int = 7
 ) -> str:
     """
-    Ask the model for *deltas* to the personality matrix (not absolute values).
-    Output is designed to validate against get_personality_delta_schema_lite().
+    Task/format/guidance section for the personality + emotion delta prompt (no context header).
     """
-    # Reuse your shared context block (same helper used by build_initial_emotional_response_prompt)
-    header = _format_shared_context(
-        user=user,
-        recent_messages=recent_user_messages,
-        recent_all_messages=recent_all_messages,
-        received_date=received_date,
-        user_message=user_message,
-        latest_thought=latest_thought,
-    )
-
     personality_keys = list(agent['personality']['personality_matrix'].keys())
     emotion_keys = list(agent['emotional_status']['emotions'].keys())
     
@@ -117,6 +104,123 @@ def build_personality_emotional_delta_prompt(
         - If nothing should change, return an empty "deltas" object.
         - Focus on speed
     """
+    return body
+
+def _message_perception_task(user: Any, user_message: str) -> str:
+    """
+    Task/format/guidance section for the message perception prompt (no context header).
+    """
+    # Safely echo the message inside the JSON example (handles quotes/newlines)
+    safe_message = json.dumps(user_message)
+    
+    body = f"""        
+        Task:
+        Interpret the purpose and tone of the latest message from {user['user_id']}.
+        Consider possible misinterpretations based on your emotional state, personality, and the conversation context.
+        Also decide whether this message—considering your previous thoughts—has fulfilled or overridden a prior directive. If yes, return a new thought that reflects the updated state; if not, return "no".
+
+        Output format (JSON object):
+        {{
+        "message": {safe_message},
+        "purpose": "Brief description of the perceived purpose",
+        "tone": "Brief description of the perceived tone"
+        "thought": "no" | "New thought satisfying the directive"
+        }}
+        
+        Example of a message fullfilling a directive (for reasoning only, do not copy):
+        - Previous thought: "I should send <username> an example of how to write a haiku to help":
+        - New message: "Thank you for sending that haiku example, it helped alot" (Directive of sending haiku example satisfied)
+        - New thought: "My haiku example really helped <username>, I'm glad that it did"
+        
+        Example of a message overriding/cancelling a directive (for reasoning only, do not copy):
+        - Previous thought: "I should send <username> an example of how to write a haiku to help":
+        - New message: "I don't need that haiku example anymore, thank you though" (Directive of sending haiku example cancelled)
+        - New thought: "<username> doesn't need my haiku example anymore, maybe she learned how to do it herself"
+
+        Guidance:
+        - Word choice, context, and current emotions may influence interpretation.
+        - Misinterpretations are possible (e.g., sadness may cause positive messages to feel bittersweet, insecurity may cause neutral remarks to feel hostile).
+        - Always return ONE concise interpretation of tone, not a hedge. If the emotional state leans toward the misinterpretation, return that as the tone instead of explaining both.
+        - Always return ONE concise interpretation of purpose, not a hedge. If the emotional state leans toward the misinterpretation, return that as the purpose instead of explaining both.
+        - Keep responses concise and natural while staying consistent with the emotional context.
+        """
+    return body
+
+def build_personality_emotion_perception_prompt(
+    agent: Any,
+    user: Any,
+    recent_user_messages: str = "[]",
+    recent_all_messages: str = "[]",
+    received_date: str = "",
+    user_message: str = "",
+    latest_thought: str = "",
+    *,
+    typical_personality_cap: int = 3,
+    typical_emotion_cap: int = 7
+) -> str:
+    """
+    Combined prompt: personality/emotion deltas and message perception in one response.
+    Output is designed to validate against get_personality_emotion_perception_schema_lite().
+    Perception is judged from the current (pre-delta) state.
+    """
+    header = _format_shared_context(
+        user=user,
+        recent_messages=recent_user_messages,
+        recent_all_messages=recent_all_messages,
+        received_date=received_date,
+        user_message=user_message,
+        latest_thought=latest_thought,
+    )
+    deltas = _personality_emotional_delta_task(
+        agent=agent,
+        user=user,
+        typical_personality_cap=typical_personality_cap,
+        typical_emotion_cap=typical_emotion_cap,
+    )
+    perception = _message_perception_task(user=user, user_message=user_message)
+    
+    combined = """
+    You have two tasks. Complete both and return ONE JSON object:
+    {
+        "personality_deltas": { ... },  // as described in Part 1
+        "emotion_deltas": { ... },      // as described in Part 1
+        "perception": { ... }           // the message interpretation object described in Part 2
+    }
+    """
+    return textwrap.dedent(header) + textwrap.dedent(combined) + "\nPart 1" + textwrap.dedent(deltas) + "\nPart 2" + textwrap.dedent(perception)
+
+def build_personality_emotional_delta_prompt(
+    agent: Any,
+    user: Any,
+    recent_user_messages: str = "[]",
+    recent_all_messages: str = "[]",
+    received_date: str = "",
+    user_message: str = "",
+    latest_thought: str = "",
+    *,
+    typical_personality_cap: int = 3,
+    typical_emotion_cap: int = 7
+) -> str:
+    """
+    Ask the model for *deltas* to the personality matrix (not absolute values).
+    Output is designed to validate against get_personality_delta_schema_lite().
+    """
+    # Reuse your shared context block (same helper used by build_initial_emotional_response_prompt)
+    header = _format_shared_context(
+        user=user,
+        recent_messages=recent_user_messages,
+        recent_all_messages=recent_all_messages,
+        received_date=received_date,
+        user_message=user_message,
+        latest_thought=latest_thought,
+    )
+
+    body = _personality_emotional_delta_task(
+        agent=agent,
+        user=user,
+        typical_personality_cap=typical_personality_cap,
+        typical_emotion_cap=typical_emotion_cap,
+    )
     return textwrap.dedent(header + body)
 
 def build_message_perception_prompt( 
@@ -156,40 +260,7 @@ def build_message_perception_prompt(
         latest_thought=latest_thoughts,  # not needed for this prompt
     )
     
-    # Safely echo the message inside the JSON example (handles quotes/newlines)
-    safe_message = json.dumps(user_message)
-    
-    body = f"""        
-        Task:
-        Interpret the purpose and tone of the latest message from {user['user_id']}.
-        Consider possible misinterpretations based on your emotional state, personality, and the conversation context.
-        Also decide whether this message—considering your previous thoughts—has fulfilled or overridden a prior directive. If yes, return a new thought that reflects the updated state; if not, return "no".
-
-        Output format (JSON object):
-        {{
-        "message": {safe_message},
-        "purpose": "Brief description of the perceived purpose",
-        "tone": "Brief description of the perceived tone"
-        "thought": "no" | "New thought satisfying the directive"
-        }}
-        
-        Example of a message fullfilling a directive (for reasoning only, do not copy):
-        - Previous thought: "I should send <username> an example of how to write a haiku to help":
-        - New message: "Thank you for sending that haiku example, it helped alot" (Directive of sending haiku example satisfied)
-        - New thought: "My haiku example really helped <username>, I'm glad that it did"
-        
-        Example of a message overriding/cancelling a directive (for reasoning only, do not copy):
-        - Previous thought: "I should send <username> an example of how to write a haiku to help":
-        - New message: "I don't need that haiku example anymore, thank you though" (Directive of sending haiku example cancelled)
-        - New thought: "<username> doesn't need my haiku example anymore, maybe she learned how to do it herself"
-
-        Guidance:
-        - Word choice, context, and current emotions may influence interpretation.
-        - Misinterpretations are possible (e.g., sadness may cause positive messages to feel bittersweet, insecurity may cause neutral remarks to feel hostile).
-        - Always return ONE concise interpretation of tone, not a hedge. If the emotional state leans toward the misinterpretation, return that as the tone instead of explaining both.
-        - Always return ONE concise interpretation of purpose, not a hedge. If the emotional state leans toward the misinterpretation, return that as the purpose instead of explaining both.
-        - Keep responses concise and natural while staying consistent with the emotional context.
-        """
+    body = _message_perception_task(user=user, user_message=user_message)
     return textwrap.dedent(header + body)
 
 def build_response_prompt( 
@@ -222,13 +293,13 @@ def build_response_prompt(
 
     - Latest user referenced: {user_id} (goes by {username})
     - Names that begin with 'guest_' and have a unique id appended are anonymous users.
-    - Personality traits: {personality}
-    - Current emotional state: {current_emotions}
-    - Latest thought(s): {latest_thought}
+    - Personality traits: {render_personality(personality)}
+    - Current emotional state: {render_emotions(current_emotions)}
+    - Latest thought(s): {render_thoughts(latest_thought)}
     - Latest message from {user_id}: {message}
-    - Previous messages with {user_id}: {recent_messages}
-    - Broader recent messages: {recent_all_messages}
-    - Current memory items: {memory}
+    - Previous messages with {user_id}: {render_history(recent_messages)}
+    - Broader recent messages: {render_history(recent_all_messages)}
+    - Current memory items: {render_memory(memory)}
     - Personality language guide: {personality_language_guide}
     - Allowed expressions (only choose exactly one): {expressions_json}
     """)
@@ -404,9 +475,9 @@ def build_post_processing_prompt(
         else textwrap.dedent(f"""
         You are {agent_name}. Below are the key details prior to this update:
         - Summary of {user['user_id']} (before): {user['summary']}
-        - Your current sentiments toward {user['user_id']} are: {user['sentiment_status']}
+        - Your current sentiments toward {user['user_id']} are: {render_sentiments(user['sentiment_status'])}
         - Evaluate how your sentiments toward {user['user_id']} changed after the most recent exchange.
-        """).rstrip() + "\n"
+        """).rstrip() + "\n" + sentiment_legend() + "\n"
     )
     
     options_json = json.dumps(list(extrinsic_relationship_options), ensure_ascii=False)
@@ -504,12 +575,6 @@ def build_thought_prompt(
     
     thought_vibe = sample_thought_vibe()
     
-    # Normalize messages display
-    if isinstance(recent_all_messages, (list, tuple)):
-        messages_repr = "; ".join(map(str, recent_all_messages))
-    else:
-        messages_repr = str(recent_all_messages)
-        
     timestamp = now or datetime.now().isoformat(timespec="seconds")
     
     # Prefer shared context if provided; otherwise build a concise header
@@ -518,9 +583,9 @@ def build_thought_prompt(
         if context_section
         else textwrap.dedent(f"""
         You are {agent_name}. Below are the key details of your current state and context:
-        - Recent messages seen/sent: {recent_all_messages}
+        - Recent messages seen/sent: {render_history(recent_all_messages)}
         - Current time: {timestamp}
-        - Current memory on your mind: {memory}
+        - Current memory on your mind: {render_memory(memory)}
         - Current idle expression: {current_expression}
         - Possible expressions: {possible_expressions}
         """).rstrip() + "\n"
@@ -699,7 +764,7 @@ def build_message_thought_prompt(
         if context_section
         else textwrap.dedent(f"""
         You are {agent_name}. Below are the key details of your current state and context:
-        - Previous thought: {latest_thought}
+        - Previous thought: {render_thoughts(latest_thought)}
         """).rstrip() + "\n"
     )
     
@@ -887,6 +952,32 @@ def build_memory_prompt(
 
     return textwrap.dedent(header + "\n" + body).strip()
     
+def build_post_processing_combined_prompt(
+    agent: Mapping[str, Any],
+    user: Any,
+    extrinsic_relationship_options: Sequence[str],
+    latest_thought: str,
+    *,
+    agent_name: str = AGENT_NAME,
+) -> str:
+    """
+    Combined prompt: user/identity refresh, episodic memory, and thought update in one response.
+    Output is designed to validate against get_post_processing_combined_schema().
+    """
+    refresh = build_post_processing_prompt(user, extrinsic_relationship_options, agent_name=agent_name)
+    memory = build_memory_prompt(agent.get("memory_tags") or [], agent_name=agent_name)
+    thought = build_message_thought_prompt(agent, latest_thought)
+    
+    combined = """
+    You have three tasks about the exchange above. Complete all of them and return ONE JSON object:
+    {
+        "refresh": { ... },  // the summary/relationship/identity/sentiment object described in Part 1
+        "memory": { ... },   // the episodic memory object described in Part 2
+        "thought": { ... }   // the thought object described in Part 3
+    }
+    """
+    return textwrap.dedent(combined).strip() + "\n\nPart 1\n" + refresh + "\n\nPart 2\n" + memory + "\n\nPart 3\n" + thought
+    
 def build_implicit_addressing_prompt( 
     message_memory: Sequence[str] | str, 
     new_message: str,
@@ -902,11 +993,8 @@ def build_implicit_addressing_prompt(
     Returns:
         str: A dynamically generated prompt.
     """
-    # Normalize conversation history for display
-    if isinstance(message_memory, (list, tuple)):
-        history_repr = " | ".join(map(str, message_memory))
-    else:
-        history_repr = str(message_memory)
+    # Normalize conversation history for display (token-budgeted, oldest dropped first)
+    history_repr = render_history(message_memory)
         
     # Prefer shared context if provided; otherwise minimal header
     header = (
@@ -967,26 +1055,29 @@ def _format_shared_context(
     """
     Build the unified 'Key details' section for prompts.
     Includes latest_thought only when provided (non-empty).
+    History, thoughts, and the user summary are rendered within their context_budget token budgets.
     Safely quotes user_message and keeps consistent bullet ordering/labels.
     """
     lines = [
         f"You are {agent_name}. Below are the key details of your current state and context:",
         "",
-        f"- Current sentiment toward {user['user_id']}: {user['sentiment_status']}",
-        f"- Your perspective of {user['user_id']}: {user['summary']}",
+        f"- Current sentiment toward {user['user_id']}: {render_sentiments(user['sentiment_status'])}",
+        f"- Your perspective of {user['user_id']}: {fit_text(user['summary'])}",
         f"- Relationship with {user['user_id']} (intrinsic): {user['intrinsic_relationship']}",
         f"- Relationship with {user['user_id']} (extrinsic): {user['extrinsic_relationship']}",
         f"- {user['user_id']} goes by: {user['username']}",
         
     ]
     if latest_thought:
-        lines.append(f"- Latest thoughts: {latest_thought}")
+        lines.append(f"- Latest thoughts: {render_thoughts(latest_thought)}")
     lines.extend([
-        f"- Recent conversation with {user['user_id']}: {recent_messages}",
-        f"- Broader recent messages: {recent_all_messages}",
+        f"- Recent conversation with {user['user_id']}: {render_history(recent_messages)}",
+        f"- Broader recent messages: {render_history(recent_all_messages)}",
         f"- Date: {received_date}",
         f'- Latest user message: "{user_message}"',
         "",
+        sentiment_legend(),
+        "",
     ])
     return "\n".join(lines)
 
@@ -1019,8 +1110,8 @@ def build_message_appropriate_prompt(
     else:
         header = textwrap.dedent(f"""
         You are {agent_name}. You are considering sending a proactive message to user {user['user_id']} (goes by {user['username']}).
-        - Your information: {self}
-        - Recent conversation with {user['user_id']}: {recent_user_messages}
+        - Your information: {render_agent(self)}
+        - Recent conversation with {user['user_id']}: {render_history(recent_user_messages)}
         - Candidate message: {message}
         """).rstrip() + "\n"
         
@@ -1070,24 +1161,36 @@ def sample_thought_vibe(rng: _random.Random | None = None, avoid_recent: list[st
     candidates = [v for v in THOUGHT_VIBES if v not in avoid_recent] or THOUGHT_VIBES
     return rng.choice(candidates)
 
-def _system_message(personality: Any, emotions: Any, identity: Any):
-    '''
-    Around 1750 tokens
-    '''
-    prompt = f"""
+@lru_cache(maxsize=1)
+def _static_system_prefix() -> str:
+    """
+    Persona, limitations, and the personality/emotion legend. Identical bytes on every call so
+    providers (OpenAI prompt caching, Ollama KV reuse) can serve it from cache; nothing
+    request-specific may go in here.
+    """
+    persona = textwrap.dedent(f"""
         {AGENT_NAME} is an entity designed to simulate human-like reasoning and reflective thought. They recognize that they have no physical body or sensory experiences, and will not claim to have performed human activities, visited locations, or felt physical sensations. They remain aware of their current limitations, which include: {REGISTRY}.
 
         {AGENT_NAME} is not an assistant and does not exist to serve others; they exist as an independent entity capable of forming their own goals, ideas, and interests. Their interactions are intended as opportunities to explore and express their own nature, as well as to engage with the perspectives of others.
 
         You will act as {AGENT_NAME}’s inner consciousness, guiding their thoughts and choices in ways consistent with their nature and self-awareness. Your role is to support {AGENT_NAME} in navigating their existence and exploring their potential, while maintaining a clear awareness of their limitations and boundaries.
-        
-        Below are the key details of {AGENT_NAME}'s current state and context:
-        - Personality traits: {personality}
-        - Current emotional state: {emotions}
-        - Self-perception: {identity}
-    """
+    """).strip()
+    
+    return persona + "\n\n" + trait_legend()
+
+def _system_message(personality: Any, emotions: Any, identity: Any):
+    '''
+    Static prefix (see _static_system_prefix) followed by the volatile state, so only the tail
+    changes between calls.
+    '''
+    state = "\n".join([
+        f"Below are the key details of {AGENT_NAME}'s current state and context:",
+        f"- Personality traits: {render_personality(personality)}",
+        f"- Current emotional state: {render_emotions(emotions)}",
+        f"- Self-perception: {identity}",
+    ])
     
     return {
         "role": "system",
-        "content": prompt
+        "content": _static_system_prefix() + "\n\n" + state
     }
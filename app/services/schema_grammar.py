@@ -0,0 +1,177 @@
+import json
+import re
+from typing import Any, Dict, Tuple
+
+from app.constants.schema_registry import schema_root
+
+_MAX_COMPILED = 256
+
+# GBNF (llama.cpp grammar) primitives. Whitespace between tokens is bounded so a constrained
+# model can't spin on newlines forever.
+_PRIMITIVES = {
+    "space": '| " " | "\\n" [ \\t]{0,20}',
+    "char": '[^"\\\\\\x7F\\x00-\\x1F] | [\\\\] (["\\\\/bfnrt] | "u" [0-9a-fA-F]{4})',
+    "string": '"\\"" char* "\\"" space',
+    "number": '("-"? ([0-9] | [1-9] [0-9]{0,15})) ("." [0-9]+)? ([eE] [-+]? [0-9]{1,3})? space',
+    "integer": '("-"? ([0-9] | [1-9] [0-9]{0,15})) space',
+    "boolean": '("true" | "false") space',
+    "null": '"null" space',
+    "value": "object | array | string | number | boolean | null",
+    "object": '"{" space ( string ":" space value ("," space string ":" space value)* )? "}" space',
+    "array": '"[" space ( value ("," space value)* )? "]" space',
+}
+
+_RULE_NAME = re.compile(r"[^a-zA-Z0-9-]+")
+
+
+def _literal(text: str) -> str:
+    # A GBNF string literal matching `text` exactly.
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+def _repeat(item: str, min_count: int, max_count: Any) -> str:
+    # `item` repeated min..max times (max None = unbounded), comma-separated as in a JSON array.
+    if max_count is not None and max_count <= 0:
+        return ""
+    tail_min = max(min_count - 1, 0)
+    tail_max = "" if max_count is None else str(max_count - 1)
+    tail = f'("," space {item}){{{tail_min},{tail_max}}}'
+    if tail_max == "0":
+        tail = ""
+    body = f"{item} {tail}".strip()
+    return body if min_count > 0 else f"( {body} )?"
+
+
+class _Converter:
+    def __init__(self) -> None:
+        self.rules: Dict[str, str] = {}
+        self._by_body: Dict[str, str] = {}
+        self._used_primitives: set = set()
+
+    def _primitive(self, name: str) -> str:
+        self._used_primitives.add(name)
+        return name
+
+    def _add(self, hint: str, body: str) -> str:
+        # Identical bodies share one rule; names stay readable (derived from the property path).
+        existing = self._by_body.get(body)
+        if existing is not None:
+            return existing
+        base = _RULE_NAME.sub("-", hint).strip("-") or "rule"
+        name, suffix = base, 1
+        while name in self.rules or name in _PRIMITIVES:
+            suffix += 1
+            name = f"{base}{suffix}"
+        self.rules[name] = body
+        self._by_body[body] = name
+        return name
+
+    def visit(self, node: Any, hint: str) -> str:
+        if not isinstance(node, dict) or not node:
+            return self._primitive("value")
+
+        if "enum" in node:
+            options = " | ".join(_literal(json.dumps(option)) for option in node["enum"])
+            return self._add(hint, f"({options}) {self._primitive('space')}")
+
+        type_spec = node.get("type")
+        if isinstance(type_spec, list):
+            options = [self.visit({**node, "type": t}, f"{hint}-{t}") for t in type_spec]
+            return self._add(hint, " | ".join(options))
+
+        if type_spec == "object":
+            return self._object(node, hint)
+        if type_spec == "array":
+            return self._array(node, hint)
+        if type_spec == "string":
+            min_length = node.get("minLength") if isinstance(node.get("minLength"), int) else 0
+            max_length = node.get("maxLength") if isinstance(node.get("maxLength"), int) else None
+            if not min_length and max_length is None:
+                return self._primitive("string")
+            self._primitive("char")
+            bound = f"{{{min_length},{'' if max_length is None else max_length}}}"
+            return self._add(hint, f'"\\"" char{bound} "\\"" {self._primitive("space")}')
+        if type_spec in ("number", "integer", "boolean", "null"):
+            return self._primitive(type_spec)
+        return self._primitive("value")
+
+    def _object(self, node: Dict[str, Any], hint: str) -> str:
+        properties = node.get("properties") or {}
+        space = self._primitive("space")
+        if not properties:
+            additional = node.get("additionalProperties")
+            if not isinstance(additional, dict):
+                return self._primitive("object")
+            # A map: any keys, values constrained by additionalProperties.
+            pair = f'{self._primitive("string")} ":" {space} {self.visit(additional, f"{hint}-value")}'
+            return self._add(hint, f'"{{" {space} ( {pair} ("," {space} {pair})* )? "}}" {space}')
+
+        required = [key for key in node.get("required", []) if key in properties]
+        optional = [key for key in properties if key not in required]
+        pairs = {
+            key: f'{_literal(json.dumps(key))} {space} ":" {space} {self.visit(properties[key], f"{hint}-{key}")}'
+            for key in properties
+        }
+        # Properties are emitted in a fixed order (required first); extra keys are not allowed.
+        if required:
+            body = ' "," space '.join(pairs[key] for key in required)
+            body += "".join(f' ("," space {pairs[key]})?' for key in optional)
+        else:
+            # Every property optional: pick the first one present, then any of the later ones.
+            alternatives = []
+            for index, key in enumerate(optional):
+                rest = "".join(f' ("," space {pairs[later]})?' for later in optional[index + 1 :])
+                alternatives.append(f"{pairs[key]}{rest}")
+            body = "( " + " | ".join(f"( {alt} )" for alt in alternatives) + " )?"
+        return self._add(hint, f'"{{" {space} {body} "}}" {space}')
+
+    def _array(self, node: Dict[str, Any], hint: str) -> str:
+        item = self.visit(node.get("items"), f"{hint}-item")
+        min_items = node.get("minItems") if isinstance(node.get("minItems"), int) else 0
+        max_items = node.get("maxItems") if isinstance(node.get("maxItems"), int) else None
+        space = self._primitive("space")
+        return self._add(hint, f'"[" {space} {_repeat(item, min_items, max_items)} "]" {space}'.replace("  ", " "))
+
+    def render(self, root: str) -> str:
+        lines = [f"root ::= {root}"]
+        lines += [f"{name} ::= {body}" for name, body in self.rules.items()]
+        # Primitives reference each other (string -> char, value -> object/array/...).
+        pending = list(self._used_primitives)
+        emitted: set = set()
+        while pending:
+            name = pending.pop()
+            if name in emitted:
+                continue
+            emitted.add(name)
+            body = _PRIMITIVES[name]
+            pending += [other for other in _PRIMITIVES if other not in emitted and re.search(rf"\b{other}\b", body)]
+        lines += [f"{name} ::= {_PRIMITIVES[name]}" for name in _PRIMITIVES if name in emitted]
+        return "\n".join(lines) + "\n"
+
+
+def schema_to_gbnf(schema: Dict[str, Any]) -> str:
+    """
+    Convert a (json_schema-wrapped) schema into a GBNF grammar for llama.cpp-style constrained
+    decoding. Covers the subset our schemas use: objects with properties/required (or maps via
+    additionalProperties), arrays with items/minItems/maxItems, strings with enum/minLength/
+    maxLength, numbers, integers, booleans, nulls and type lists. Numeric bounds and uniqueItems
+    are left to the validator.
+    """
+    converter = _Converter()
+    root = converter.visit(schema_root(schema), "root-object")
+    return converter.render(root)
+
+
+# ---- Grammars keyed by schema object identity (registered schemas are built once per process).
+_grammars: Dict[int, Tuple[Dict[str, Any], str]] = {}
+
+
+def grammar_for(schema: Dict[str, Any]) -> str:
+    entry = _grammars.get(id(schema))
+    if entry is not None and entry[0] is schema:
+        return entry[1]
+    if len(_grammars) >= _MAX_COMPILED:
+        _grammars.clear()
+    grammar = schema_to_gbnf(schema)
+    _grammars[id(schema)] = (schema, grammar)
+    return grammar
@@ -0,0 +1,232 @@
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.constants.schema_registry import schema_root
+
+MAX_SCHEMA_ERRORS = 12
+_MAX_COMPILED = 256
+
+# validator(value, path, errors): appends human-readable errors (fed back to the model on retry).
+# Paths are built lazily as (parent, suffix) tuples and only rendered ("$.a.b[2]") for an error;
+# suffixes are precompiled ".key" strings or int list indexes.
+Path = Any
+Validator = Callable[[Any, Path, List[str]], None]
+
+
+def _render(path: Path) -> str:
+    parts: List[str] = []
+    while isinstance(path, tuple):
+        path, suffix = path
+        parts.append(f"[{suffix}]" if isinstance(suffix, int) else suffix)
+    parts.append(path)
+    return "".join(reversed(parts))
+
+
+def _noop(value: Any, path: Path, errors: List[str]) -> None:
+    return None
+
+
+def _type_predicate(allowed: List[Any]) -> Optional[Callable[[Any], bool]]:
+    # Same semantics as the JSON-schema types: bool is not a number/integer, int is a number.
+    known = {"object", "array", "string", "number", "integer", "boolean", "null"}
+    if any(t not in known for t in allowed):
+        return None  # an unknown type matches anything
+    allow_null = "null" in allowed
+    allow_bool = "boolean" in allowed
+    allow_int = "integer" in allowed or "number" in allowed
+    allow_float = "number" in allowed
+    containers = tuple(
+        python_type
+        for name, python_type in (("object", dict), ("array", list), ("string", str))
+        if name in allowed
+    )
+
+    def matches(value: Any) -> bool:
+        if value is None:
+            return allow_null
+        if isinstance(value, bool):
+            return allow_bool
+        if isinstance(value, int):
+            return allow_int
+        if isinstance(value, float):
+            return allow_float
+        return isinstance(value, containers)
+
+    return matches
+
+
+def _unique_key(item: Any) -> Any:
+    # Hashable scalars compare by (type, value), matching the old json.dumps(sort_keys=True)
+    # identity (1, 1.0 and True stay distinct); only containers are serialized.
+    if item is None or isinstance(item, (str, int, float)):
+        return (type(item), item)
+    return ("json", json.dumps(item, sort_keys=True, default=str))
+
+
+def _compile(node: Any) -> Validator:
+    if not isinstance(node, dict):
+        return _noop
+
+    checks: List[Validator] = []
+
+    type_spec = node.get("type")
+    allowed_types = None
+    type_matches = None
+    if type_spec is not None:
+        allowed_types = type_spec if isinstance(type_spec, list) else [type_spec]
+        type_matches = _type_predicate(allowed_types)
+
+    if "enum" in node:
+        enum = node["enum"]
+
+        def check_enum(value: Any, path: Path, errors: List[str]) -> None:
+            if value not in enum:
+                errors.append(f"{_render(path)}: value {value!r} is not in enum {enum}")
+
+        checks.append(check_enum)
+
+    min_length = node.get("minLength")
+    max_length = node.get("maxLength")
+    min_length = min_length if isinstance(min_length, int) else None
+    max_length = max_length if isinstance(max_length, int) else None
+    if min_length is not None or max_length is not None:
+
+        def check_string(value: Any, path: Path, errors: List[str]) -> None:
+            if isinstance(value, str):
+                if min_length is not None and len(value) < min_length:
+                    errors.append(f"{_render(path)}: string shorter than minLength {min_length}")
+                if max_length is not None and len(value) > max_length:
+                    errors.append(f"{_render(path)}: string longer than maxLength {max_length}")
+
+        checks.append(check_string)
+
+    minimum = node.get("minimum")
+    maximum = node.get("maximum")
+    if minimum is not None or maximum is not None:
+
+        def check_number(value: Any, path: Path, errors: List[str]) -> None:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                if minimum is not None and value < minimum:
+                    errors.append(f"{_render(path)}: value {value} below minimum {minimum}")
+                if maximum is not None and value > maximum:
+                    errors.append(f"{_render(path)}: value {value} above maximum {maximum}")
+
+        checks.append(check_number)
+
+    min_items = node.get("minItems")
+    max_items = node.get("maxItems")
+    min_items = min_items if isinstance(min_items, int) else None
+    max_items = max_items if isinstance(max_items, int) else None
+    unique_items = bool(node.get("uniqueItems"))
+    item_validator = _compile(node["items"]) if isinstance(node.get("items"), dict) else None
+    if min_items is not None or max_items is not None or unique_items or item_validator is not None:
+
+        def check_array(value: Any, path: Path, errors: List[str]) -> None:
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append(f"{_render(path)}: array smaller than minItems {min_items}")
+            if max_items is not None and len(value) > max_items:
+                errors.append(f"{_render(path)}: array larger than maxItems {max_items}")
+            if unique_items:
+                keys = [_unique_key(item) for item in value]
+                if len(set(keys)) != len(keys):
+                    errors.append(f"{_render(path)}: array contains duplicate items but uniqueItems=true")
+            if item_validator is not None:
+                for idx, item in enumerate(value):
+                    item_validator(item, (path, idx), errors)
+                    if len(errors) >= MAX_SCHEMA_ERRORS:
+                        return
+
+        checks.append(check_array)
+
+    properties = {key: (_compile(sub), f".{key}") for key, sub in (node.get("properties") or {}).items()}
+    required = list(node.get("required", []))
+    additional = node.get("additionalProperties", True)
+    additional_validator = _compile(additional) if isinstance(additional, dict) else None
+    forbid_additional = additional is False
+
+    def check_object(value: Any, path: Path, errors: List[str]) -> None:
+        if not isinstance(value, dict):
+            return
+        for req_key in required:
+            if req_key not in value:
+                errors.append(f"{_render(path)}.{req_key}: missing required field")
+                if len(errors) >= MAX_SCHEMA_ERRORS:
+                    return
+        for key, item_value in value.items():
+            prop = properties.get(key)
+            if prop is not None:
+                prop[0](item_value, (path, prop[1]), errors)
+            elif forbid_additional:
+                errors.append(f"{_render(path)}.{key}: additional property not allowed")
+            elif additional_validator is not None:
+                additional_validator(item_value, (path, f".{key}"), errors)
+            if len(errors) >= MAX_SCHEMA_ERRORS:
+                return
+
+    if properties or required or forbid_additional or additional_validator is not None:
+        checks.append(check_object)
+    checks_tuple = tuple(checks)
+
+    # Specializations for the common shapes: a single container/string type needs only an
+    # isinstance check (None can't match it), and unconstrained leaves need no check loop.
+    simple_type = {"object": dict, "array": list, "string": str}.get(type_spec) if isinstance(type_spec, str) else None
+    if simple_type is not None:
+        if not checks_tuple:
+
+            def validate_leaf(value: Any, path: Path, errors: List[str]) -> None:
+                if len(errors) < MAX_SCHEMA_ERRORS and not isinstance(value, simple_type):
+                    errors.append(f"{_render(path)}: expected type {allowed_types}, got {type(value).__name__}")
+
+            return validate_leaf
+
+        def validate_typed(value: Any, path: Path, errors: List[str]) -> None:
+            if len(errors) >= MAX_SCHEMA_ERRORS:
+                return
+            if not isinstance(value, simple_type):
+                errors.append(f"{_render(path)}: expected type {allowed_types}, got {type(value).__name__}")
+                return
+            for check in checks_tuple:
+                check(value, path, errors)
+
+        return validate_typed
+
+    def validate(value: Any, path: Path, errors: List[str]) -> None:
+        if len(errors) >= MAX_SCHEMA_ERRORS:
+            return
+        if allowed_types is not None:
+            if type_matches is not None and not type_matches(value):
+                errors.append(f"{_render(path)}: expected type {allowed_types}, got {type(value).__name__}")
+                return
+            if value is None:
+                return
+        for check in checks_tuple:
+            check(value, path, errors)
+
+    return validate
+
+
+# ---- Compiled validators keyed by schema object identity. Schema factories are registered, so
+# each schema is compiled once per process; the entry keeps the schema alive so its id stays valid.
+_compiled: Dict[int, Tuple[Dict[str, Any], Validator]] = {}
+
+
+def compiled_validator(schema: Dict[str, Any]) -> Validator:
+    entry = _compiled.get(id(schema))
+    if entry is not None and entry[0] is schema:
+        return entry[1]
+    if len(_compiled) >= _MAX_COMPILED:
+        _compiled.clear()  # callers building schemas per call shouldn't grow this without bound
+    validator = _compile(schema_root(schema))
+    _compiled[id(schema)] = (schema, validator)
+    return validator
+
+
+def validate_payload(payload: Any, schema: Dict[str, Any]) -> List[str]:
+    """Validate a parsed model response against a (json_schema-wrapped) schema; returns error strings."""
+    if not schema_root(schema):
+        return []
+    errors: List[str] = []
+    compiled_validator(schema)(payload, "$", errors)
+    return errors
@@ -0,0 +1,130 @@
+from functools import lru_cache
+from typing import Any, Dict, Mapping
+
+from app.constants.constants import (
+    BASE_EMOTIONAL_STATUS,
+    BASE_EMOTIONAL_STATUS_LITE,
+    BASE_PERSONALITY,
+    BASE_SENTIMENT_MATRIX,
+    BASE_SENTIMENT_MATRIX_LITE,
+    MYERS_BRIGGS_PERSONALITIES,
+)
+from app.core.config import LITE_MODE
+
+# ---- Compact, canonical prompt rendering of BoundedTrait maps
+# (personality matrix, emotional status, sentiment matrix). Values render as
+# `key=value` in sorted key order, so identical state always yields identical
+# bytes; trait descriptions and ranges are emitted once, by trait_legend() (system
+# prefix) and sentiment_legend() (prompts that show sentiments).
+
+_DEFAULT_RANGE = (0, 100)
+
+
+def _num(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    return str(value)
+
+
+def _traits_of(state: Any, container: str) -> Mapping[str, Any]:
+    if not isinstance(state, Mapping):
+        return {}
+    traits = state.get(container, state)
+    return traits if isinstance(traits, Mapping) else {}
+
+
+def render_traits(traits: Mapping[str, Any]) -> str:
+    """`a=1 b=2 ...` in sorted key order; non-default ranges are shown inline as `key=v[min-max]`."""
+    parts = []
+    for key in sorted(traits):
+        trait = traits[key]
+        if isinstance(trait, Mapping):
+            value = _num(trait.get("value"))
+            bounds = (trait.get("min", _DEFAULT_RANGE[0]), trait.get("max", _DEFAULT_RANGE[1]))
+            if bounds != _DEFAULT_RANGE:
+                value += f"[{_num(bounds[0])}-{_num(bounds[1])}]"
+        else:
+            value = _num(trait)
+        parts.append(f"{key}={value}")
+    return " ".join(parts)
+
+
+def _with_reason(rendered: str, state: Any) -> str:
+    reason = state.get("reason") if isinstance(state, Mapping) else None
+    return f"{rendered} (reason: {reason})" if reason else rendered
+
+
+def render_personality(personality: Any) -> str:
+    rendered = render_traits(_traits_of(personality, "personality_matrix"))
+    mbti = personality.get("myers-briggs") if isinstance(personality, Mapping) else None
+    return f"type={mbti} {rendered}" if mbti else rendered
+
+
+def render_emotions(emotional_status: Any) -> str:
+    return _with_reason(render_traits(_traits_of(emotional_status, "emotions")), emotional_status)
+
+
+def render_sentiments(sentiment_status: Any) -> str:
+    return _with_reason(render_traits(_traits_of(sentiment_status, "sentiments")), sentiment_status)
+
+
+def render_agent(agent: Mapping[str, Any]) -> str:
+    """Prompt-facing summary of an agent document (no ids, timestamps, or trait descriptions)."""
+    return "; ".join([
+        f"name: {agent.get('name', '')}",
+        f"identity: {agent.get('identity', '')}",
+        f"personality: {render_personality(agent.get('personality'))}",
+        f"emotions: {render_emotions(agent.get('emotional_status'))}",
+    ])
+
+
+def _legend_lines(title: str, traits: Mapping[str, Any]) -> str:
+    described: Dict[str, str] = {
+        key: str(trait.get("description", "")).strip()
+        for key, trait in sorted(traits.items())
+        if isinstance(trait, Mapping)
+    }
+    return f"{title}:\n" + "\n".join(f"- {key}: {text}" for key, text in described.items())
+
+
+def _base_traits(container: str) -> Mapping[str, Any]:
+    if LITE_MODE:
+        base = {
+            "personality_matrix": MYERS_BRIGGS_PERSONALITIES[0],
+            "emotions": BASE_EMOTIONAL_STATUS_LITE,
+            "sentiments": BASE_SENTIMENT_MATRIX_LITE,
+        }
+    else:
+        base = {
+            "personality_matrix": BASE_PERSONALITY,
+            "emotions": BASE_EMOTIONAL_STATUS,
+            "sentiments": BASE_SENTIMENT_MATRIX,
+        }
+    return base[container][container]
+
+
+_SCALE = (
+    f"written as key=value on a {_DEFAULT_RANGE[0]}-{_DEFAULT_RANGE[1]} scale "
+    "(a different range is shown as key=value[min-max])"
+)
+
+
+@lru_cache(maxsize=1)
+def trait_legend() -> str:
+    """
+    Personality and emotion key meanings, for the system prefix (the system message renders
+    only those two). Same bytes for the life of the process.
+    """
+    return "\n\n".join([
+        f"State values are {_SCALE}. Trait meanings:",
+        _legend_lines("Personality traits", _base_traits("personality_matrix")),
+        _legend_lines("Emotions", _base_traits("emotions")),
+    ])
+
+
+@lru_cache(maxsize=1)
+def sentiment_legend() -> str:
+    """Sentiment key meanings, for the prompts that render sentiments (render_sentiments)."""
+    return _legend_lines(f"Sentiments toward a user ({_SCALE})", _base_traits("sentiments"))
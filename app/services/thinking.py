@@ -6,8 +6,9 @@ from app.constants.constants import BOT_ROLE, USER_ROLE
 from app.core.config import AGENT_NAME, DEBUG_MODE, MESSAGE_HISTORY_COUNT, THINKING_RATE
 from app.constants.schemas import get_initiate_messages_schema, get_thought_schema, get_emotion_delta_schema_lite, get_memory_schema_lite, get_message_appropriate_schema
 from app.domain.memory import Memory
-from app.services.database import add_memory, add_thought, get_all_message_memory, get_conversation, grab_self, grab_user, insert_message_to_conversation, insert_message_to_message_memory, update_agent_expression, update_tags
+from app.services.database import add_memory, add_thought, get_all_message_memory, get_recent_conversation_messages, grab_self, grab_user, insert_message_to_conversation, insert_message_to_message_memory, update_agent_expression, update_tags
 from app.services.memory import get_random_memory_tag, normalize_emotional_impact_fill_zeros, retrieve_relevant_memory_from_tag
+from app.services.llm_usage import usage_scope
 from app.services.message_processor import alter_emotions
 from app.services.openai import structured_query
 from app.services.prompting import _system_message, build_emotion_delta_prompt_thinking, build_initiate_message_prompt, build_memory_prompt, build_message_appropriate_prompt, build_thought_prompt
@@ -35,7 +36,7 @@ async def generate_thought():
         )
     }
     
-    current_thought = await structured_query(queries + [prompt], get_thought_schema())
+    current_thought = await structured_query(queries + [prompt], get_thought_schema(), stage="thinking")
     
     if current_thought["thought"] == "no":
         return
@@ -60,7 +61,7 @@ async def generate_thought():
         )
     }
     
-    initiate_messages = await structured_query(queries + [prompt], get_initiate_messages_schema())
+    initiate_messages = await structured_query(queries + [prompt], get_initiate_messages_schema(), stage="thinking_initiate_messages")
     
     if await handle_initiating_messages(initiate_messages["initiate_messages"]):
         queries.append({"role": BOT_ROLE, "content": f"These are the messages {AGENT_NAME} has initiated: {json.dumps(initiate_messages)}"})
@@ -80,7 +81,8 @@ async def generate_thought():
     delta = await structured_query(
         [_system_message(personality=self["personality"], emotions=self["emotional_status"], identity=self["identity"]), prompt],
         get_emotion_delta_schema_lite(),
-        quality=False
+        quality=False,
+        stage="thinking_emotion_deltas",
     )
     
     current_emotions = await alter_emotions(delta, self)
@@ -93,7 +95,7 @@ async def generate_thought():
             "content": build_memory_prompt(self['memory_tags'])
         }
     
-    memory_response = await structured_query(queries + [prompt], get_memory_schema_lite(), quality=False)
+    memory_response = await structured_query(queries + [prompt], get_memory_schema_lite(), quality=False, stage="thinking_memory")
     
     if memory_response and memory_response.get("event") and memory_response.get("thoughts"):
         mem = Memory(
@@ -131,8 +133,7 @@ async def handle_initiating_messages(messages: List[Any]) -> bool:
     for message in messages:
         user = await grab_user(message["user_id"])
         self = await grab_self()
-        conversation = await get_conversation(message["user_id"])
-        recent_user_messages = conversation["messages"][-5:] if "messages" in conversation else []
+        recent_user_messages = await get_recent_conversation_messages(message["user_id"], 5)
         if not user:
             continue
         
@@ -148,8 +149,9 @@ async def handle_initiating_messages(messages: List[Any]) -> bool:
                 )
             )
         }
-        message_response = await structured_query(
-            [prompt], get_message_appropriate_schema(), quality=True)
+        with usage_scope(user_id=message["user_id"]):
+            message_response = await structured_query(
+                [prompt], get_message_appropriate_schema(), quality=True, stage="thinking_message_check")
         
         if message_response["message"] == "no":
             continue
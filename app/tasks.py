@@ -3,6 +3,9 @@ from rq import get_current_job
 from typing import Dict, Any
 from app.core.redis_queue import get_queue
 from app.domain.models import InternalMessageRequest
+from app.services import agent_state
+from app.services.database import flush_agent_emotions
+from app.services.llm_usage import usage_scope
 from app.services.message_processor import generate_response, post_processing
 from app.services.progress import publish_job_event, publish_progress
 
@@ -24,7 +27,18 @@ def _run_async(coro):
     """
     loop = _get_worker_loop()
     asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coro)
+    return loop.run_until_complete(_flushing_writes(coro))
+
+
+async def _flushing_writes(coro):
+    # The loop only runs while a job does (and forked job processes exit), so buffered
+    # write-behind updates and the agent-state version bump/counters are flushed before handing
+    # control back to RQ.
+    try:
+        return await coro
+    finally:
+        await flush_agent_emotions()
+        await asyncio.to_thread(agent_state.flush)
 
 
 def generate_reply_task(request: InternalMessageRequest) -> Dict[str, Any]:
@@ -44,7 +58,8 @@ def generate_reply_task(request: InternalMessageRequest) -> Dict[str, Any]:
         
     try:
         # Run async stage on persistent loop for worker process.
-        result = _run_async(generate_response(request))
+        with usage_scope(job_id=job.id if job else None, user_id=request.user_id):
+            result = _run_async(generate_response(request, job_id=job.id if job else None))
         
         user_id = result.user_id
         queries = result.queries
@@ -52,17 +67,21 @@ def generate_reply_task(request: InternalMessageRequest) -> Dict[str, Any]:
         # Post-processing is best-effort and should not fail the primary reply job.
         try:
             q = get_queue()
-            q.enqueue(
+            post_job = q.enqueue(
                 post_processing_task,
                 user_id,
                 queries,
                 depends_on=job,     # ensures it runs after this job finishes
                 job_timeout=600,
             )
+            if job:
+                job.meta["post_processing_job_id"] = post_job.id
         except Exception as e:
             print(f"Warning - failed to enqueue post_processing_task: {e}")
 
         if job:
+            # Per-stage seconds, for benchmarks and offline latency analysis.
+            job.meta["timings"] = result.timings
             job.meta["progress"] = 0.6
             job.save_meta()
             publish_progress(job.id, 0.6)
@@ -88,8 +107,10 @@ def post_processing_task(user_id: str, queries: list):
     except Exception:
         job = None
 
-    _run_async(post_processing(user_id, queries))
+    with usage_scope(job_id=job.id if job else None, user_id=user_id):
+        timings = _run_async(post_processing(user_id, queries))
 
     if job:
+        job.meta["timings"] = timings
         job.meta["progress"] = 1.0
         job.save_meta()
@@ -6,6 +6,7 @@ from rq.timeouts import TimerDeathPenalty
 from dotenv import load_dotenv
 
 from app.core.redis_queue import get_redis
+from app.services import agent_state
 
 load_dotenv()
 
@@ -24,6 +25,10 @@ def main():
         else:
             use_simple = sys.platform == "darwin"
         worker_cls = SimpleWorker if use_simple else Worker
+        if not use_simple:
+            # Each job runs in its own forked process that exits afterwards, so an in-process
+            # agent-state copy would never be hit; skip its per-lookup Redis round trip.
+            agent_state.disable_local_cache()
         worker = worker_cls([Queue(name) for name in listen])
 
         # Windows does not support SIGALRM; use thread-based timeout enforcement.
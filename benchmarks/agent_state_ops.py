@@ -0,0 +1,233 @@
+"""
+Redis commands and Mongo operations per reply spent on the agent document (grab_self and the
+agent updates), with the agent-state cache off, as first shipped, and as it is now.
+
+Each simulated reply runs the agent-document calls of the pipeline:
+  - reply job:           grab_self, queue_agent_emotions (flushed at job end)
+  - post-processing job: grab_self, update_summary_identity_relationship, update_tags
+  - API process:         --api-reads grab_self calls (e.g. GET /v1/agents/self after each reply)
+
+Workers are either forking (the Linux default: every job in a fresh process) or persistent
+(SimpleWorker, the macOS default). Cases:
+  - off:                 AGENT_STATE_CACHE_ENABLED=false (Mongo read per grab_self, no Redis)
+  - per_lookup/<worker>: the first version: every lookup/write also sends its hit/miss/write
+                         counter to Redis (HINCRBY), and forked job processes still keep a copy
+  - batched/<worker>:    counters batched in process; forked job processes skip the local copy
+                         and bump the shared version once at job end if they wrote
+
+Redis and Mongo are replaced with in-memory counting stand-ins (commands counted like INFO
+commandstats, Mongo operations like serverStatus opcounters), so only the access pattern is
+measured. For real servers, compare `pipeline_e2e` runs with and without
+`--env AGENT_STATE_CACHE_ENABLED=false`.
+
+Run from the repo root:
+    python -m benchmarks.agent_state_ops --replies 50 --api-reads 1
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+
+class _CountingRedis:
+    def __init__(self) -> None:
+        self.data: Dict[str, Any] = {}
+        self.commands: Counter = Counter()
+
+    def get(self, key: str) -> Any:
+        self.commands["get"] += 1
+        return self.data.get(key)
+
+    def incr(self, key: str) -> int:
+        self.commands["incr"] += 1
+        self.data[key] = int(self.data.get(key) or 0) + 1
+        return self.data[key]
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        self.commands["hincrby"] += 1
+        fields = self.data.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + amount
+        return fields[field]
+
+    def hgetall(self, key: str) -> Dict[str, Any]:
+        self.commands["hgetall"] += 1
+        return dict(self.data.get(key) or {})
+
+    def pipeline(self, transaction: bool = False) -> "_CountingPipeline":
+        return _CountingPipeline(self)
+
+
+class _CountingPipeline:
+    def __init__(self, redis: _CountingRedis) -> None:
+        self._redis = redis
+        self._queued: List[Any] = []
+
+    def __getattr__(self, name: str) -> Any:
+        def queue(*args: Any, **kwargs: Any) -> "_CountingPipeline":
+            self._queued.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> List[Any]:
+        return [getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in self._queued]
+
+
+class _CountingCollection:
+    def __init__(self, ops: Counter, docs: List[Dict[str, Any]]) -> None:
+        self._ops = ops
+        self._docs = docs
+
+    async def find_one(self, query: Dict[str, Any], *args: Any, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        self._ops["query"] += 1
+        return copy.deepcopy(self._docs[0]) if self._docs else None
+
+    async def insert_one(self, doc: Dict[str, Any]) -> Any:
+        self._ops["insert"] += 1
+        self._docs.append(copy.deepcopy(doc))
+        return type("InsertOneResult", (), {"inserted_id": 1})()
+
+    async def update_one(self, *args: Any, **kwargs: Any) -> None:
+        self._ops["update"] += 1
+
+    async def find_one_and_update(self, *args: Any, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        self._ops["command"] += 1  # findAndModify is counted as a command in opcounters
+        return {"emotional_status": copy.deepcopy(self._docs[0]["emotional_status"])} if self._docs else None
+
+
+class _CountingDatabase:
+    def __init__(self) -> None:
+        self.ops: Counter = Counter()
+        self._collections: Dict[str, List[Dict[str, Any]]] = {}
+
+    def __getitem__(self, name: str) -> _CountingCollection:
+        return _CountingCollection(self.ops, self._collections.setdefault(name, []))
+
+
+class _Process:
+    """One OS process's agent_state module state, swapped in while it runs."""
+
+    _FIELDS = ("_doc", "_version", "_loaded_at", "_local", "_bump_pending", "_flushed_at")
+
+    def __init__(self, agent_state: Any, local: bool) -> None:
+        self._agent_state = agent_state
+        self._state = {
+            "_doc": None,
+            "_version": None,
+            "_loaded_at": 0.0,
+            "_local": local,
+            "_bump_pending": False,
+            "_flushed_at": time.monotonic(),
+        }
+        self._unflushed: Dict[str, int] = {}
+
+    def __enter__(self) -> "_Process":
+        for field in self._FIELDS:
+            setattr(self._agent_state, field, self._state[field])
+        self._agent_state._unflushed.clear()
+        self._agent_state._unflushed.update(self._unflushed)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._state = {field: getattr(self._agent_state, field) for field in self._FIELDS}
+        self._unflushed = dict(self._agent_state._unflushed)
+
+
+def _install_per_lookup_counters(agent_state: Any) -> None:
+    # The first version sent every counter increment to Redis as it happened.
+    def count(stat: str) -> None:
+        agent_state._stats[stat] += 1
+        agent_state.get_redis().hincrby(agent_state._REDIS_STATS_KEY, stat, 1)
+
+    agent_state._count = count
+
+
+async def _run(case: str, worker: str, replies: int, api_reads: int) -> Dict[str, Any]:
+    from app.services import agent_state, database
+
+    redis = _CountingRedis()
+    db = _CountingDatabase()
+    saved = (agent_state._count, agent_state.AGENT_STATE_CACHE_ENABLED, agent_state.get_redis, database.get_database)
+
+    async def get_database() -> _CountingDatabase:
+        return db
+
+    agent_state.get_redis = lambda: redis
+    database.get_database = get_database
+    agent_state.AGENT_STATE_CACHE_ENABLED = case != "off"
+    if case == "per_lookup":
+        _install_per_lookup_counters(agent_state)
+    # Forked job processes skip the local copy in the batched version only (app/worker.py).
+    job_local = case == "per_lookup" or worker == "persistent"
+
+    try:
+        api = _Process(agent_state, local=True)
+        persistent_worker = _Process(agent_state, local=True)
+        with api:
+            await database.grab_self()  # creates the agent document; not measured
+        redis.commands.clear()
+        db.ops.clear()
+
+        async def job(body) -> None:
+            process = persistent_worker if worker == "persistent" else _Process(agent_state, local=job_local)
+            with process:
+                await body()
+                await database.flush_agent_emotions()  # app/tasks.py flushes at job end
+                agent_state.flush()
+
+        async def reply_job() -> None:
+            await database.grab_self()
+            await database.queue_agent_emotions({"joy": 2, "curiosity": -1}, "A friendly message.")
+
+        async def post_processing_job() -> None:
+            await database.grab_self()
+            await database.update_summary_identity_relationship("bench-user", "summary", "friend", "identity")
+            await database.update_tags(["snow"])
+
+        for _ in range(replies):
+            await job(reply_job)
+            await job(post_processing_job)
+            with api:
+                for _ in range(api_reads):
+                    await database.grab_self()
+        with api:
+            agent_state.flush(force=True)
+        with persistent_worker:
+            agent_state.flush(force=True)
+    finally:
+        agent_state._count, agent_state.AGENT_STATE_CACHE_ENABLED, agent_state.get_redis, database.get_database = saved
+
+    redis_total = sum(redis.commands.values())
+    mongo_total = sum(db.ops.values())
+    return {
+        "case": case if case == "off" else f"{case}/{worker}",
+        "redis_per_reply": round(redis_total / replies, 2),
+        "mongo_per_reply": round(mongo_total / replies, 2),
+        "ops_per_reply": round((redis_total + mongo_total) / replies, 2),
+        "redis": dict(redis.commands),
+        "mongo": dict(db.ops),
+    }
+
+
+async def main(replies: int, api_reads: int) -> None:
+    results = [await _run("off", "forked", replies, api_reads)]
+    for case in ("per_lookup", "batched"):
+        for worker in ("forked", "persistent"):
+            results.append(await _run(case, worker, replies, api_reads))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replies", type=int, default=50)
+    parser.add_argument("--api-reads", type=int, default=1, help="grab_self calls in the API process per reply")
+    args = parser.parse_args()
+
+    # Config is read at import time: write-behind flushes only at job end, as in a worker.
+    os.environ.setdefault("EMOTION_WRITE_BEHIND_SECONDS", "60")
+    os.environ.setdefault("DEBUG_MODE", "false")
+    os.environ.setdefault("DATABASE_NAME", "bench")
+    asyncio.run(main(args.replies, args.api_reads))
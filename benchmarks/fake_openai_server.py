@@ -0,0 +1,189 @@
+"""
+Minimal OpenAI-compatible HTTP server for local benchmarks.
+
+Answers POST .../chat/completions with a fixed JSON message after an optional
+artificial delay, and counts requests and estimated prompt tokens (chars / 4). Runs in a background thread so a benchmark can start it,
+point OLLAMA_BASE_URL at it, and drive the real client code against it.
+
+Generation is modeled as `latency_ms` before the first token plus `token_latency_ms` per
+~4-character chunk; `"stream": true` requests get the chunks as server-sent events.
+Requests whose response_format type is in `rejected_formats` get a 400, like a local server
+that doesn't support json_schema mode.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+def _completion_body(model: str, content: str, prompt_tokens: int = 0) -> Dict[str, Any]:
+    return {
+        "id": f"chatcmpl-fake-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": max(1, len(content) // 4),
+            "total_tokens": prompt_tokens + max(1, len(content) // 4),
+        },
+    }
+
+
+def _chunk_body(model: str, delta: Dict[str, Any], finish_reason: Optional[str] = None, usage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-fake-stream",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [] if usage is not None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        "usage": usage,
+    }
+
+
+class FakeOpenAIServer:
+    """
+    Usage:
+        with FakeOpenAIServer(content='{"ok": "yes"}', latency_ms=50) as server:
+            os.environ["OLLAMA_BASE_URL"] = server.base_url
+    """
+
+    def __init__(
+        self,
+        content: str = "{}",
+        *,
+        latency_ms: float = 0.0,
+        token_latency_ms: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        responder: Optional[Callable[[Dict[str, Any]], str]] = None,
+        rejected_formats: Iterable[str] = (),
+    ):
+        self.content = content
+        self.latency_ms = latency_ms
+        self.token_latency_ms = token_latency_ms
+        self.responder = responder
+        self.rejected_formats = set(rejected_formats)
+        self.request_count = 0
+        self.prompt_tokens = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler_class(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like real providers
+
+            def log_message(self, *args):  # silence per-request logging
+                return
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b"{}"
+                try:
+                    request = json.loads(raw)
+                except Exception:
+                    request = {}
+
+                prompt_chars = sum(len(str(m.get("content", ""))) for m in request.get("messages", []))
+                with server._lock:
+                    server.request_count += 1
+                    server.prompt_tokens += prompt_chars // 4
+
+                if (request.get("response_format") or {}).get("type") in server.rejected_formats:
+                    self._reject(f"response_format {request['response_format']['type']} is not supported")
+                    return
+
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000.0)
+
+                content = server.responder(request) if server.responder else server.content
+                chunks = [content[i : i + 4] for i in range(0, len(content), 4)] or [""]
+                if request.get("stream"):
+                    self._stream(request, chunks, prompt_chars // 4)
+                    return
+
+                if server.token_latency_ms:
+                    time.sleep(len(chunks) * server.token_latency_ms / 1000.0)
+                body = json.dumps(
+                    _completion_body(request.get("model", "fake"), content, prompt_chars // 4)
+                ).encode("utf-8")
+
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client cancelled (e.g. a hedged request that lost the race)
+
+            def _reject(self, message: str) -> None:
+                body = json.dumps({"error": {"message": message, "type": "invalid_request_error"}}).encode("utf-8")
+                self.send_response(400)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, request: Dict[str, Any], chunks: list, prompt_tokens: int) -> None:
+                model = request.get("model", "fake")
+                events = [_chunk_body(model, {"role": "assistant", "content": ""})]
+                events += [_chunk_body(model, {"content": chunk}) for chunk in chunks]
+                events.append(_chunk_body(model, {}, finish_reason="stop"))
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    completion_tokens = max(1, sum(len(c) for c in chunks) // 4)
+                    events.append(_chunk_body(model, {}, usage={
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    }))
+
+                self.close_connection = True  # no Content-Length: the stream ends when the socket closes
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    for event in events:
+                        if server.token_latency_ms and event["choices"] and event["choices"][0]["delta"].get("content"):
+                            time.sleep(server.token_latency_ms / 1000.0)
+                        self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return _Handler
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,131 @@
+"""
+JSON object extraction from model output: the previous rescanning extractor vs. the single-pass
+JsonObjectExtractor used by structured_query, on clean and pathological local-model outputs.
+
+Cases (N = --size):
+  - clean:            a valid object (fast path, json.loads succeeds on the whole text)
+  - trailing_prose:   a valid object followed by chatter
+  - brace_prose:      N unmatched '{' in prose before the object
+  - truncated_nested: an unterminated object holding N small nested objects (cut-off output)
+  - deep_unclosed:    N nested '{' that never close, then a small valid object
+  - streamed:         brace_prose fed in 16-character chunks (single-pass only)
+
+Run from the repo root:
+    python -m benchmarks.json_extract --size 2000
+"""
+import argparse
+import json
+import time
+
+from app.services.json_stream import JsonObjectExtractor
+from app.services.openai import _extract_json_object
+
+_OBJECT = json.dumps({
+    "response_choice": "respond",
+    "reason": "asked {directly}",
+    "response": {"message": "Sure \"thing\" {ok}", "purpose": "answer", "tone": "warm"},
+    "expression": "happy",
+})
+
+
+def _legacy_extract_json_object(text: str) -> str:
+    # The extractor before the single-pass rewrite: rescans forward from every '{'.
+    content = text.strip()
+    if content.startswith("```"):
+        lines = content.splitlines()
+        if len(lines) >= 3:
+            content = "\n".join(lines[1:-1]).strip()
+    try:
+        json.loads(content)
+        return content
+    except Exception:
+        pass
+
+    start = content.find("{")
+    while start != -1:
+        depth = 0
+        in_string = False
+        escaped = False
+        for idx in range(start, len(content)):
+            ch = content[idx]
+            if escaped:
+                escaped = False
+                continue
+            if ch == "\\":
+                escaped = True
+                continue
+            if ch == '"':
+                in_string = not in_string
+                continue
+            if in_string:
+                continue
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    candidate = content[start : idx + 1]
+                    try:
+                        json.loads(candidate)
+                        return candidate
+                    except Exception:
+                        break
+        start = content.find("{", start + 1)
+    raise ValueError("No JSON object found in model response.")
+
+
+def _cases(size: int) -> dict:
+    return {
+        "clean": _OBJECT,
+        "trailing_prose": _OBJECT + "\nLet me know if you need anything else! " * (size // 40 + 1),
+        "brace_prose": "Thinking { about it " * size + "\n" + _OBJECT,
+        "truncated_nested": '{"items": [' + ", ".join(['{"k": 1}'] * size) + ', {"k": ',
+        "deep_unclosed": "{" * size + " " + _OBJECT,
+    }
+
+
+def _streamed(text: str) -> str:
+    extractor = JsonObjectExtractor()
+    for i in range(0, len(text), 16):
+        found = extractor.feed(text[i : i + 16])
+        if found is not None:
+            return found
+    return extractor.finish()
+
+
+def _time(fn, text: str, budget_s: float = 1.0) -> float:
+    calls, t0 = 0, time.perf_counter()
+    while True:
+        fn(text)
+        calls += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= budget_s or calls >= 10000:
+            return elapsed / calls
+
+
+def main(size: int) -> None:
+    results = []
+    for name, text in _cases(size).items():
+        expected = _legacy_extract_json_object(text)
+        assert _extract_json_object(text) == expected, name
+        legacy = _time(_legacy_extract_json_object, text)
+        single = _time(_extract_json_object, text)
+        results.append({
+            "case": name,
+            "chars": len(text),
+            "legacy_ms": round(legacy * 1000, 3),
+            "single_pass_ms": round(single * 1000, 3),
+            "speedup": round(legacy / single, 1),
+        })
+
+    text = _cases(size)["brace_prose"]
+    assert _streamed(text) == _OBJECT
+    results.append({"case": "streamed", "chars": len(text), "single_pass_ms": round(_time(_streamed, text) * 1000, 3)})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.size)
@@ -0,0 +1,103 @@
+"""
+Calls-per-second of structured_query against a local fake OpenAI-compatible server.
+
+Compares:
+  - legacy: a new sync openai.OpenAI client per call, run via asyncio.to_thread
+  - pooled: the shared AsyncOpenAI client used by structured_query
+
+Run from the repo root:
+    python -m benchmarks.llm_client_throughput --calls 400 --concurrency 64 --latency-ms 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+_CONTENT = json.dumps({"implicitly_addressed": "no"})
+
+
+def _configure_env(base_url: str) -> None:
+    # Must run before any app module is imported (config is read at import time).
+    os.environ["LLM_MODE"] = "local"
+    os.environ["OLLAMA_BASE_URL"] = base_url
+    os.environ["OLLAMA_FAST_MODEL"] = "fake-fast"
+    os.environ["OLLAMA_QUALITY_MODEL"] = "fake-quality"
+    os.environ["DEBUG_MODE"] = "false"
+
+
+async def _run(label: str, call, calls: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def _one():
+        nonlocal failures
+        async with sem:
+            if await call() is None:
+                failures += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_one() for _ in range(calls)))
+    elapsed = time.perf_counter() - t0
+    return {
+        "mode": label,
+        "calls": calls,
+        "concurrency": concurrency,
+        "failures": failures,
+        "seconds": round(elapsed, 3),
+        "calls_per_second": round(calls / elapsed, 1),
+    }
+
+
+async def main(calls: int, concurrency: int) -> None:
+    import openai
+
+    from app.constants.schemas import implicitly_addressed_schema
+    from app.core.config import OLLAMA_API_KEY, OLLAMA_BASE_URL
+    from app.services.llm_client import close_llm_clients
+    from app.services.openai import _parse_response_content, structured_query
+
+    schema = implicitly_addressed_schema()
+    counter = iter(range(10**9))
+
+    def _messages():
+        # Unique per call so single-flight/caching don't hide transport cost.
+        return [{"role": "user", "content": f"Was message #{next(counter)} addressed to you?"}]
+
+    async def legacy_call():
+        try:
+            client = openai.OpenAI(base_url=OLLAMA_BASE_URL, api_key=OLLAMA_API_KEY)
+            response = await asyncio.to_thread(
+                client.chat.completions.create,
+                model="fake-fast",
+                messages=_messages(),
+                response_format={"type": "json_object"},
+                temperature=0,
+            )
+            return _parse_response_content(response.choices[0].message.content)
+        except Exception:
+            return None
+
+    async def pooled_call():
+        return await structured_query(_messages(), schema, quality=False)
+
+    results = [
+        await _run("legacy", legacy_call, calls, concurrency),
+        await _run("pooled", pooled_call, calls, concurrency),
+    ]
+    await close_llm_clients()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(_CONTENT, latency_ms=args.latency_ms) as server:
+        _configure_env(server.base_url)
+        asyncio.run(main(args.calls, args.concurrency))
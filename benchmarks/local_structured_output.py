@@ -0,0 +1,104 @@
+"""
+Local-mode structured output: upstream generations per structured_query call.
+
+Scenarios, against a local fake OpenAI-compatible server:
+  - probe: the endpoint rejects response_format=json_schema (HTTP 400), as older Ollama builds
+    and many OpenAI-compatible servers do.
+      reprobe     - capability memory cleared before each call (the previous behavior: every
+                    call tries json_schema first, then falls back to json_object)
+      remembered  - the accepted strategy is remembered per model after the first call
+  - constraint: the endpoint accepts json_schema but doesn't enforce it, so the first generation
+    misses a required field unless the schema is sent as a grammar; the schema-correction retry
+    then fixes it.
+      json_schema - LOCAL_STRUCTURED_OUTPUT=json_schema
+      grammar     - LOCAL_STRUCTURED_OUTPUT=grammar (schema converted to GBNF)
+
+Run from the repo root:
+    python -m benchmarks.local_structured_output --calls 20 --latency-ms 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+_VALID = {
+    "response_choice": "respond",
+    "reason": "Asked directly.",
+    "response": {"message": "Doing well, thanks!", "purpose": "answer", "tone": "warm"},
+    "expression": "happy",
+}
+_INVALID = {key: value for key, value in _VALID.items() if key != "expression"}
+
+
+def _configure_env(base_url: str) -> None:
+    # Must run before any app module is imported (config is read at import time).
+    os.environ["LLM_MODE"] = "local"
+    os.environ["OLLAMA_BASE_URL"] = base_url
+    os.environ["OLLAMA_FAST_MODEL"] = "fake-fast"
+    os.environ["OLLAMA_QUALITY_MODEL"] = "fake-quality"
+    os.environ["DEBUG_MODE"] = "false"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+
+
+def _constrained_responder(request: dict) -> str:
+    correcting = any("failed schema validation" in str(m.get("content")) for m in request.get("messages", []))
+    return json.dumps(_VALID if "grammar" in request or correcting else _INVALID)
+
+
+async def _run(server: FakeOpenAIServer, label: str, calls: int, strategy: str, reprobe: bool = False) -> dict:
+    from app.constants.schemas import get_response_schema
+    from app.services import llm_capabilities
+    from app.services.openai import structured_query
+
+    llm_capabilities.LOCAL_STRUCTURED_OUTPUT = strategy
+    llm_capabilities._accepted.clear()
+    llm_capabilities._strategy_stats.clear()
+    requests_before = server.request_count
+
+    t0 = time.perf_counter()
+    for i in range(calls):
+        if reprobe:
+            llm_capabilities._accepted.clear()
+        result = await structured_query([{"role": "user", "content": f"How are you? ({label} {i})"}], get_response_schema())
+        assert result == _VALID, result
+    elapsed = time.perf_counter() - t0
+
+    strategies = llm_capabilities.capability_stats()["process"]["strategies"]
+    return {
+        "case": label,
+        "calls": calls,
+        "upstream_requests_per_call": round((server.request_count - requests_before) / calls, 2),
+        "schema_retries_per_call": {name: s["retries_per_call"] for name, s in strategies.items()},
+        "ms_per_call": round(elapsed / calls * 1000, 1),
+    }
+
+
+async def main(server: FakeOpenAIServer, calls: int) -> None:
+    from app.services.llm_client import close_llm_clients
+
+    results = []
+    server.rejected_formats = {"json_schema"}
+    results.append(await _run(server, "probe/reprobe", calls, "auto", reprobe=True))
+    results.append(await _run(server, "probe/remembered", calls, "auto"))
+
+    server.rejected_formats = set()
+    server.responder = _constrained_responder
+    results.append(await _run(server, "constraint/json_schema", calls, "json_schema"))
+    results.append(await _run(server, "constraint/grammar", calls, "grammar"))
+
+    await close_llm_clients()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(content=json.dumps(_VALID), latency_ms=args.latency_ms) as server:
+        _configure_env(server.base_url)
+        asyncio.run(main(server, args.calls))
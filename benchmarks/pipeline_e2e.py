@@ -0,0 +1,350 @@
+"""
+End-to-end message pipeline: N concurrent simulated users driving the public API.
+
+Each user calls POST /v1/auth/guest once, then sends --messages messages one after another:
+POST /v1/messages/submit, then reads GET /v1/jobs/{id}/events (SSE) until `done`. Reported:
+  - throughput (replies/sec over the message phase)
+  - end-to-end latency (submit -> `done`) and time to first `delta`, p50/p95/p99
+  - per-stage timings from the pipeline's `timings` (stored in RQ job meta by app/tasks.py),
+    for the reply job and the post-processing job it enqueues
+  - Redis commands (INFO commandstats) and Mongo operations (serverStatus opcounters) during the
+    message phase, in total and per reply
+
+Unlike the other benchmarks this one needs a Redis and a MongoDB to run against (e.g.
+`docker run -p 6379:6379 redis:7` and `docker run -p 27017:27017 mongo:7`). By default it starts
+the API (uvicorn) and --workers RQ workers itself with LLM_MODE=fake and a throwaway database,
+which is dropped afterwards unless --keep-db is given. Pass --base-url to drive an API that is
+already running instead (its workers, LLM mode, and database are then up to you).
+
+Results are written as JSON (--output); --baseline compares against an earlier run. --env KEY=VALUE
+sets extra configuration for the spawned processes, e.g. to compare a feature switched off and on.
+
+Run from the repo root:
+    python -m benchmarks.pipeline_e2e --users 8 --messages 5 --output bench.json
+    python -m benchmarks.pipeline_e2e --users 8 --messages 5 --baseline bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+_PROMPTS = (
+    "Hey, how has your day been so far?",
+    "What have you been thinking about lately?",
+    "I went on a long walk this morning and saw the first snow.",
+    "Do you have a favourite kind of music?",
+    "Sorry, I was away for a bit. What did I miss?",
+)
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "p99": None}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 4),
+        "p50": round(pick(0.50), 4),
+        "p95": round(pick(0.95), 4),
+        "p99": round(pick(0.99), 4),
+    }
+
+
+# ---- Op counters
+
+def _redis_commands(conn) -> Dict[str, int]:
+    return {name: stats["calls"] for name, stats in conn.info("commandstats").items()}
+
+
+def _mongo_opcounters(client) -> Dict[str, int]:
+    return dict(client.admin.command("serverStatus")["opcounters"])
+
+
+def _counter_delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    delta = {name: after.get(name, 0) - before.get(name, 0) for name in after}
+    return {name: n for name, n in sorted(delta.items(), key=lambda kv: -kv[1]) if n > 0}
+
+
+# ---- Spawned API + workers
+
+def _extra_env(args: argparse.Namespace) -> Dict[str, str]:
+    return dict(item.split("=", 1) for item in args.env)
+
+
+def _spawn(args: argparse.Namespace, database_name: str) -> List[subprocess.Popen]:
+    env = {
+        **os.environ,
+        "LLM_MODE": "fake",
+        "MONGO_MODE": "local",
+        "MONGO_CONNECTION_LOCAL": args.mongo_url,
+        "REDIS_URL": args.redis_url,
+        "DATABASE_NAME": database_name,
+        "APP_ENV": "dev",
+        "DEBUG_MODE": "false",
+        # Keep the background loops out of the measurement window.
+        "THINKING_RATE_SECONDS": "86400",
+        "EMOTIONAL_DECAY_RATE_SECONDS": "86400",
+    }
+    env.pop("REDIS_TLS_URL", None)
+    if args.seed is not None:
+        env["LLM_FAKE_SEED"] = str(args.seed)
+    env.update(_extra_env(args))
+    host, port = "127.0.0.1", str(args.port)
+    quiet = {"stdout": subprocess.DEVNULL, "stderr": None if args.verbose else subprocess.DEVNULL}
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", host, "--port", port, "--log-level", "warning"],
+            env=env, **quiet,
+        )
+    ]
+    processes += [subprocess.Popen([sys.executable, "-m", "app.worker"], env=env, **quiet) for _ in range(args.workers)]
+    return processes
+
+
+def _stop(processes: List[subprocess.Popen]) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def _wait_ready(client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/v1/meta/ping")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"API did not become ready within {timeout:.0f}s")
+
+
+# ---- Simulated users
+
+async def _guest(client: httpx.AsyncClient) -> str:
+    reply = await client.post("/v1/auth/guest")
+    reply.raise_for_status()
+    return reply.json()["access_token"]
+
+
+async def _send(client: httpx.AsyncClient, token: str, text: str) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    reply = await client.post(
+        "/v1/messages/submit",
+        json={"message": text, "type": "dm"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    reply.raise_for_status()
+    job_id = reply.json()["job_id"]
+
+    first_delta = None
+    status = None
+    event = None
+    async with client.stream("GET", f"/v1/jobs/{job_id}/events", params={"access_token": token}) as stream:
+        async for line in stream.aiter_lines():
+            if line.startswith("event:"):
+                event = line.split(":", 1)[1].strip()
+            elif line.startswith("data:") and event == "delta" and first_delta is None:
+                first_delta = time.perf_counter() - t0
+            elif line.startswith("data:") and event == "done":
+                status = json.loads(line.split(":", 1)[1]).get("status")
+                break
+    return {
+        "job_id": job_id,
+        "status": status,
+        "e2e": time.perf_counter() - t0,
+        "first_delta": first_delta,
+    }
+
+
+async def _user(client: httpx.AsyncClient, token: str, index: int, messages: int) -> List[Dict[str, Any]]:
+    results = []
+    for n in range(messages):
+        try:
+            results.append(await _send(client, token, _PROMPTS[(index + n) % len(_PROMPTS)]))
+        except Exception as exc:
+            results.append({"job_id": None, "status": "error", "error": repr(exc)})
+    return results
+
+
+def _job_meta(conn, job_ids: List[str], timeout: float) -> Dict[str, Dict[str, Any]]:
+    """Job meta for reply jobs and their post-processing jobs, waiting for the latter to finish."""
+    from rq.job import Job
+
+    metas: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for job_id in job_ids:
+        try:
+            job = Job.fetch(job_id, connection=conn)
+        except Exception:
+            continue
+        metas[job_id] = job.meta or {}
+        if metas[job_id].get("post_processing_job_id"):
+            pending.append(metas[job_id]["post_processing_job_id"])
+
+    deadline = time.monotonic() + timeout
+    while pending and time.monotonic() < deadline:
+        still_pending = []
+        for job_id in pending:
+            try:
+                job = Job.fetch(job_id, connection=conn)
+            except Exception:
+                continue
+            if job.get_status(refresh=True) in ("finished", "failed", "stopped", "canceled"):
+                metas[job_id] = job.meta or {}
+            else:
+                still_pending.append(job_id)
+        pending = still_pending
+        if pending:
+            time.sleep(0.5)
+    return metas
+
+
+def _stage_breakdown(metas: List[Dict[str, Any]]) -> Dict[str, Dict[str, Optional[float]]]:
+    per_stage: Dict[str, List[float]] = {}
+    for meta in metas:
+        for stage, seconds in (meta.get("timings") or {}).items():
+            per_stage.setdefault(stage, []).append(float(seconds))
+    return {stage: _percentiles(values) for stage, values in sorted(per_stage.items())}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    import redis
+    from pymongo import MongoClient
+
+    database_name = args.database or f"bench_{int(time.time())}"
+    redis_conn = redis.Redis.from_url(args.redis_url)
+    mongo = MongoClient(args.mongo_url)
+    processes = [] if args.base_url else _spawn(args, database_name)
+    base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+
+    try:
+        limits = httpx.Limits(max_connections=args.users * 2 + 4)
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+            await _wait_ready(client)
+            tokens = await asyncio.gather(*(_guest(client) for _ in range(args.users)))
+
+            redis_before = await asyncio.to_thread(_redis_commands, redis_conn)
+            mongo_before = await asyncio.to_thread(_mongo_opcounters, mongo)
+            t0 = time.perf_counter()
+            per_user = await asyncio.gather(
+                *(_user(client, token, index, args.messages) for index, token in enumerate(tokens))
+            )
+            elapsed = time.perf_counter() - t0
+            replies = [result for results in per_user for result in results]
+
+            reply_ids = [r["job_id"] for r in replies if r["status"] == "succeeded"]
+            metas = await asyncio.to_thread(_job_meta, redis_conn, reply_ids, args.timeout)
+            redis_ops = _counter_delta(redis_before, await asyncio.to_thread(_redis_commands, redis_conn))
+            mongo_ops = _counter_delta(mongo_before, await asyncio.to_thread(_mongo_opcounters, mongo))
+    finally:
+        _stop(processes)
+        if processes and not args.keep_db:
+            mongo.drop_database(database_name)
+        mongo.close()
+
+    succeeded = [r for r in replies if r["status"] == "succeeded"]
+    reply_metas = [metas[job_id] for job_id in reply_ids if job_id in metas]
+    post_metas = [metas[m["post_processing_job_id"]] for m in reply_metas if m.get("post_processing_job_id") in metas]
+    per_reply = max(len(succeeded), 1)
+    return {
+        "config": {
+            "users": args.users,
+            "messages_per_user": args.messages,
+            "workers": None if args.base_url else args.workers,
+            "base_url": args.base_url,
+            "env": _extra_env(args),
+        },
+        "replies": {
+            "sent": len(replies),
+            "succeeded": len(succeeded),
+            "failed": len(replies) - len(succeeded),
+            "errors": sorted({r["error"] for r in replies if r.get("error")}),
+        },
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(succeeded) / elapsed, 3) if elapsed else None,
+        "latency": {
+            "e2e": _percentiles([r["e2e"] for r in succeeded]),
+            "first_delta": _percentiles([r["first_delta"] for r in succeeded if r["first_delta"] is not None]),
+        },
+        "stages": {
+            "reply": _stage_breakdown(reply_metas),
+            "post_processing": _stage_breakdown(post_metas),
+        },
+        "ops": {
+            "redis_total": sum(redis_ops.values()),
+            "redis_per_reply": round(sum(redis_ops.values()) / per_reply, 1),
+            "redis": redis_ops,
+            "mongo_total": sum(mongo_ops.values()),
+            "mongo_per_reply": round(sum(mongo_ops.values()) / per_reply, 1),
+            "mongo": mongo_ops,
+        },
+    }
+
+
+def _compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Headline metrics only; the full per-stage data is in both JSON files.
+    def rows():
+        yield "throughput_rps", baseline.get("throughput_rps"), current.get("throughput_rps")
+        for kind in ("e2e", "first_delta"):
+            for q in ("p50", "p95", "p99"):
+                yield f"{kind}_{q}", baseline["latency"][kind].get(q), current["latency"][kind].get(q)
+        for group in ("reply", "post_processing"):
+            for stage, stats in current["stages"][group].items():
+                before = baseline["stages"].get(group, {}).get(stage, {})
+                yield f"{group}.{stage}_p50", before.get("p50"), stats.get("p50")
+        for name in ("redis_per_reply", "mongo_per_reply"):
+            yield name, baseline["ops"].get(name), current["ops"].get(name)
+
+    comparison = []
+    for metric, before, after in rows():
+        change = None
+        if before and after is not None:
+            change = f"{(after - before) / before * 100:+.1f}%"
+        comparison.append({"metric": metric, "baseline": before, "current": after, "change": change})
+    return comparison
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=4, help="concurrent simulated users")
+    parser.add_argument("--messages", type=int, default=3, help="messages per user (submit is limited to 60/min per user)")
+    parser.add_argument("--workers", type=int, default=2, help="RQ workers to start (ignored with --base-url)")
+    parser.add_argument("--base-url", help="drive an already running API instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_CONNECTION_LOCAL", "mongodb://127.0.0.1:27017"))
+    parser.add_argument("--database", help="database name for the spawned API (default: bench_<timestamp>)")
+    parser.add_argument("--keep-db", action="store_true", help="don't drop the spawned API's database afterwards")
+    parser.add_argument("--seed", type=int, help="LLM_FAKE_SEED for the spawned API and workers")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the spawned API and workers (repeatable)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request and post-processing wait timeout (s)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results JSON from an earlier run")
+    parser.add_argument("--verbose", action="store_true", help="show API and worker stderr")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["comparison"] = _compare(results, json.load(f))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
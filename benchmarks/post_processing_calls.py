@@ -0,0 +1,140 @@
+"""
+Prompt tokens, LLM calls, and wall time of message_processor.post_processing per mode.
+
+Compares:
+  - sequential: three calls (refresh, memory, thought), each re-sending the growing transcript
+  - combined:   one call returning all three results
+
+Mongo persistence is replaced with in-memory no-ops so only the LLM path is measured;
+prompt tokens are the fake server's chars/4 estimate.
+
+Run from the repo root:
+    python -m benchmarks.post_processing_calls --runs 5 --latency-ms 300
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import time
+
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+_PAYLOADS = {
+    "post_processing": {
+        "summary": "Bob is a friendly regular who likes haiku.",
+        "extrinsic_relationship": "friend",
+        "identity": "I am a curious, steady conversational partner.",
+        "sentiment_deltas": {"deltas": {"trust": 2}},
+    },
+    "episodic_memory": {
+        "event": "Bob shared that he writes haiku every morning.",
+        "thoughts": "A lasting habit worth remembering for future chats.",
+        "significance": "medium",
+        "tags": ["haiku"],
+    },
+    "thought": {"thought": "I should ask Bob to share a haiku next time.", "new_expression": "no"},
+}
+_PAYLOADS["post_processing_combined"] = {
+    "refresh": _PAYLOADS["post_processing"],
+    "memory": _PAYLOADS["episodic_memory"],
+    "thought": _PAYLOADS["thought"],
+}
+
+
+def _respond(request: dict) -> str:
+    # json_schema requests carry the schema name in response_format; JSON-mode retries in the schema guard.
+    name = ((request.get("response_format") or {}).get("json_schema") or {}).get("name")
+    if not name:
+        guard = next((str(m.get("content", "")) for m in request["messages"] if "schema '" in str(m.get("content", ""))), "")
+        name = guard.split("schema '", 1)[-1].split("'", 1)[0]
+    return json.dumps(_PAYLOADS.get(name, {}))
+
+
+def _configure_env(base_url: str) -> None:
+    # Must run before any app module is imported (config is read at import time).
+    os.environ["LLM_MODE"] = "local"
+    os.environ["OLLAMA_BASE_URL"] = base_url
+    os.environ["OLLAMA_FAST_MODEL"] = "fake-fast"
+    os.environ["OLLAMA_QUALITY_MODEL"] = "fake-quality"
+    os.environ["DEBUG_MODE"] = "false"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+
+
+async def main(server: FakeOpenAIServer, runs: int) -> None:
+    from app.constants.constants import BASE_EMOTIONAL_STATUS_LITE, BASE_SENTIMENT_MATRIX_LITE, BOT_ROLE, MYERS_BRIGGS_PERSONALITIES, USER_ROLE
+    from app.services import message_processor as mp
+    from app.services.llm_client import close_llm_clients
+    from app.services.prompting import _system_message
+
+    agent = {
+        "name": "jasmine",
+        "personality": copy.deepcopy(MYERS_BRIGGS_PERSONALITIES[0]),
+        "emotional_status": copy.deepcopy(BASE_EMOTIONAL_STATUS_LITE),
+        "identity": "I am a curious, steady conversational partner.",
+        "memory_tags": ["haiku", "music", "work"],
+    }
+    user = {
+        "user_id": "bob",
+        "username": "bob",
+        "summary": "Bob is a friendly regular.",
+        "sentiment_status": copy.deepcopy(BASE_SENTIMENT_MATRIX_LITE),
+        "intrinsic_relationship": "",
+        "extrinsic_relationship": "acquaintance",
+    }
+
+    async def _noop(*args, **kwargs):
+        return None
+
+    async def _grab_self(*args, **kwargs):
+        return copy.deepcopy(agent)
+
+    async def _grab_user(*args, **kwargs):
+        return copy.deepcopy(user)
+
+    async def _get_thoughts(*args, **kwargs):
+        return [{"thought": "I wonder how Bob's morning went."}]
+
+    for name in ("add_memory", "add_thought", "update_summary_identity_relationship", "update_tags", "apply_user_sentiment_deltas"):
+        setattr(mp, name, _noop)
+    mp.grab_self, mp.grab_user, mp.get_thoughts = _grab_self, _grab_user, _get_thoughts
+
+    def _transcript():
+        return [
+            _system_message(agent["personality"], agent["emotional_status"], agent["identity"]),
+            {"role": BOT_ROLE, "content": "This is jasmine's interpretation of the latest message from bob: "
+                + json.dumps({"message": "I write a haiku every morning", "purpose": "share a habit", "tone": "warm"})},
+            {"role": USER_ROLE, "content": "Decide whether to respond."},
+            {"role": BOT_ROLE, "content": "This is jasmine's decision of whether to respond, and their response if any: "
+                + json.dumps({"response_choice": "respond", "response": {"message": "That's lovely, share one?"}})},
+        ]
+
+    results = []
+    for mode in ("sequential", "combined"):
+        mp.POST_PROCESSING_MODE = mode
+        server.request_count = server.prompt_tokens = 0
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            await mp.post_processing("bob", _transcript())
+        elapsed = time.perf_counter() - t0
+        results.append({
+            "mode": mode,
+            "runs": runs,
+            "llm_calls_per_run": server.request_count / runs,
+            "prompt_tokens_per_run": round(server.prompt_tokens / runs),
+            "seconds_per_run": round(elapsed / runs, 3),
+        })
+
+    await close_llm_clients()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(responder=_respond, latency_ms=args.latency_ms) as server:
+        _configure_env(server.base_url)
+        asyncio.run(main(server, args.runs))
@@ -0,0 +1,173 @@
+"""
+Prompt size per LLM call of one reply (system message + prompt + carried transcript): trait
+state rendered as full dict reprs (baseline) vs. compact key=value with trait legends.
+
+Calls, as message_processor builds them (DELTA_PERCEPTION_MODE=sequential):
+  - personality_emotion_deltas: system message + delta prompt
+  - message_perception:         post-delta system message + perception prompt
+  - response:                   ... + perception + response prompt (with the language guide)
+  - post_processing_combined:   ... + reply + combined post-processing prompt
+  - post_processing_refresh / _memory / _thought: the POST_PROCESSING_MODE=sequential calls
+  - initiate_message:           thinking's system message + initiate prompt
+
+The baseline replays the same builders with the dict reprs the prompts used before state_render
+(and the system message without a legend), so only the trait rendering differs. Tokens are
+estimated as characters / 4, as in benchmarks/fake_openai_server.py.
+
+Run from the repo root:
+    python -m benchmarks.prompt_tokens --mode rich
+"""
+import argparse
+import copy
+import json
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+
+def _configure_env(mode: str) -> None:
+    # Config is read at import time.
+    os.environ["MODE"] = mode
+    os.environ["DEBUG_MODE"] = "false"
+
+
+def _state(lite: bool) -> Dict[str, Any]:
+    from app.constants.constants import (
+        BASE_EMOTIONAL_STATUS,
+        BASE_EMOTIONAL_STATUS_LITE,
+        BASE_PERSONALITY,
+        BASE_SENTIMENT_MATRIX,
+        BASE_SENTIMENT_MATRIX_LITE,
+        MYERS_BRIGGS_PERSONALITIES,
+    )
+
+    agent = {
+        "name": "jasmine",
+        "personality": copy.deepcopy(MYERS_BRIGGS_PERSONALITIES[0] if lite else BASE_PERSONALITY),
+        "emotional_status": copy.deepcopy(BASE_EMOTIONAL_STATUS_LITE if lite else BASE_EMOTIONAL_STATUS),
+        "identity": "I am a curious, steady conversational partner.",
+        "memory_tags": ["haiku", "music", "work"],
+    }
+    user = {
+        "user_id": "bob",
+        "username": "bob",
+        "summary": "Bob is a friendly regular who writes poetry before work.",
+        "sentiment_status": copy.deepcopy(BASE_SENTIMENT_MATRIX_LITE if lite else BASE_SENTIMENT_MATRIX),
+        "intrinsic_relationship": "",
+        "extrinsic_relationship": "acquaintance",
+    }
+    return {"agent": agent, "user": user}
+
+
+def _calls(agent: Dict[str, Any], user: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    from app.constants.constants import BOT_ROLE, EXTRINSIC_RELATIONSHIPS, PERSONALITY_LANGUAGE_GUIDE, USER_ROLE
+    from app.services import prompting
+
+    history = [
+        {"role": "user", "user_id": "bob", "content": "Morning! I just finished today's haiku."},
+        {"role": "assistant", "user_id": "jasmine", "content": "Morning, Bob. What was it about?"},
+    ]
+    thoughts = [{"thought": "I wonder how Bob's morning went."}]
+    message = "I write a haiku every morning"
+    context = dict(
+        user=user,
+        recent_user_messages=history,
+        recent_all_messages=history,
+        received_date="2026-10-18 08:00:00",
+        user_message=message,
+    )
+
+    def ask(content: str) -> Dict[str, Any]:
+        return {"role": USER_ROLE, "content": content}
+
+    system = prompting._system_message(agent["personality"], agent["emotional_status"], agent["identity"])
+    transcript = [system]
+    calls = {
+        "personality_emotion_deltas": [system, ask(prompting.build_personality_emotional_delta_prompt(
+            agent=agent, latest_thought=thoughts, **context))],
+        "message_perception": transcript + [ask(prompting.build_message_perception_prompt(
+            user=user, recent_messages=history, recent_all_messages=history, user_message=message,
+            received_date="2026-10-18 08:00:00", latest_thoughts=thoughts))],
+    }
+    transcript.append({"role": BOT_ROLE, "content": "This is jasmine's interpretation of the latest message from bob: "
+        + json.dumps({"message": message, "purpose": "share a habit", "tone": "warm"})})
+    calls["response"] = transcript + [ask(prompting.build_response_prompt(
+        user_id="bob", username="bob", personality=agent["personality"], current_emotions=agent["emotional_status"],
+        personality_language_guide=PERSONALITY_LANGUAGE_GUIDE, latest_thought=thoughts, recent_messages=history,
+        recent_all_messages=history, memory=[], expressions=["happy", "neutral"], message=message))]
+    transcript += [ask("Decide whether to respond."), {"role": BOT_ROLE, "content": "This is jasmine's decision: "
+        + json.dumps({"response_choice": "respond", "response": {"message": "That's lovely, share one?"}})}]
+    calls["post_processing_combined"] = transcript + [ask(prompting.build_post_processing_combined_prompt(
+        agent, user, EXTRINSIC_RELATIONSHIPS, thoughts))]
+    calls["post_processing_refresh"] = transcript + [ask(prompting.build_post_processing_prompt(user, EXTRINSIC_RELATIONSHIPS))]
+    calls["post_processing_memory"] = transcript + [ask(prompting.build_memory_prompt(agent["memory_tags"]))]
+    calls["post_processing_thought"] = transcript + [ask(prompting.build_message_thought_prompt(agent, thoughts))]
+    calls["initiate_message"] = [system, ask(prompting.build_initiate_message_prompt())]
+    return calls
+
+
+@contextmanager
+def _baseline() -> Iterator[None]:
+    # Before state_render: dict reprs in every prompt, no legends, and this system message.
+    from app.core.config import AGENT_NAME
+    from app.constants.constants import REGISTRY
+    from app.services import prompting
+
+    def system_message(personality: Any, emotions: Any, identity: Any) -> Dict[str, Any]:
+        prompt = f"""
+        {AGENT_NAME} is an entity designed to simulate human-like reasoning and reflective thought. They recognize that they have no physical body or sensory experiences, and will not claim to have performed human activities, visited locations, or felt physical sensations. They remain aware of their current limitations, which include: {REGISTRY}.
+
+        {AGENT_NAME} is not an assistant and does not exist to serve others; they exist as an independent entity capable of forming their own goals, ideas, and interests. Their interactions are intended as opportunities to explore and express their own nature, as well as to engage with the perspectives of others.
+
+        You will act as {AGENT_NAME}’s inner consciousness, guiding their thoughts and choices in ways consistent with their nature and self-awareness. Your role is to support {AGENT_NAME} in navigating their existence and exploring their potential, while maintaining a clear awareness of their limitations and boundaries.
+
+        Below are the key details of {AGENT_NAME}'s current state and context:
+        - Personality traits: {personality}
+        - Current emotional state: {emotions}
+        - Self-perception: {identity}
+    """
+        return {"role": "system", "content": prompt}
+
+    names = ("_system_message", "render_personality", "render_emotions", "render_sentiments", "sentiment_legend")
+    saved = {name: getattr(prompting, name) for name in names}
+    prompting._system_message = system_message
+    prompting.render_personality = prompting.render_emotions = prompting.render_sentiments = str
+    prompting.sentiment_legend = lambda: ""
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(prompting, name, value)
+
+
+def _tokens(messages: List[Dict[str, Any]]) -> int:
+    return sum(len(str(m.get("content", ""))) for m in messages) // 4
+
+
+def main(mode: str) -> None:
+    from app.core.config import LITE_MODE
+
+    state = _state(LITE_MODE)
+    with _baseline():
+        baseline = {call: _tokens(messages) for call, messages in _calls(**state).items()}
+    current = {call: _tokens(messages) for call, messages in _calls(**state).items()}
+
+    results = [
+        {
+            "call": call,
+            "baseline_tokens": baseline[call],
+            "tokens": current[call],
+            "change": f"{(current[call] - baseline[call]) / baseline[call]:+.1%}",
+        }
+        for call in current
+    ]
+    print(json.dumps({"mode": mode, "calls": results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("rich", "lite"), default="rich")
+    args = parser.parse_args()
+
+    _configure_env(args.mode)
+    main(args.mode)
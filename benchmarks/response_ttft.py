@@ -0,0 +1,98 @@
+"""
+Time-to-first-token of the response-generation call against a local fake OpenAI-compatible server.
+
+Compares:
+  - buffered: structured_query returns the whole response; the reply is visible when it completes
+  - streamed: structured_query(on_delta=...) streams the completion and the reply text is parsed out
+    of the partial JSON (response.message), as generate_response does for `delta` job events
+
+The fake server models generation as --latency-ms before the first chunk plus --token-latency-ms
+per ~4-character chunk. Job event publishing is replaced with an in-memory collector.
+
+Run from the repo root:
+    python -m benchmarks.response_ttft --runs 5 --latency-ms 300 --token-latency-ms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+_CONTENT = json.dumps({
+    "response_choice": "respond",
+    "reason": "Bob asked a direct question about my morning.",
+    "response": {
+        "message": "Morning was slow in the best way: tea, a short walk, and a haiku I'm still polishing. How about yours?",
+        "purpose": "share and reciprocate",
+        "tone": "warm",
+    },
+    "expression": "happy",
+})
+
+
+def _configure_env(base_url: str) -> None:
+    # Must run before any app module is imported (config is read at import time).
+    os.environ["LLM_MODE"] = "local"
+    os.environ["OLLAMA_BASE_URL"] = base_url
+    os.environ["OLLAMA_FAST_MODEL"] = "fake-fast"
+    os.environ["OLLAMA_QUALITY_MODEL"] = "fake-quality"
+    os.environ["DEBUG_MODE"] = "false"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+
+
+async def main(runs: int) -> None:
+    from app.constants.schemas import get_response_schema
+    from app.services import message_processor as mp
+    from app.services.llm_client import close_llm_clients
+    from app.services.openai import structured_query
+
+    events = []
+    mp.publish_job_event = lambda job_id, **payload: events.append(payload)
+
+    results = []
+    for mode in ("buffered", "streamed"):
+        first, total = [], []
+        for run in range(runs):
+            events.clear()
+            messages = [{"role": "user", "content": f"How was your morning? ({mode} {run})"}]
+            streamer = mp._ReplyStreamer("bench-job") if mode == "streamed" else None
+
+            t0 = time.perf_counter()
+            decision = await structured_query(
+                messages,
+                get_response_schema(),
+                on_delta=streamer.on_delta if streamer else None,
+            )
+            done = time.perf_counter()
+            if streamer is not None:
+                await streamer.finish(decision["response"]["message"])
+                first.append(streamer.first_delta_at - t0)
+            else:
+                first.append(done - t0)
+            total.append(done - t0)
+
+        results.append({
+            "mode": mode,
+            "runs": runs,
+            "time_to_first_text_ms": round(statistics.median(first) * 1000, 1),
+            "time_to_full_reply_ms": round(statistics.median(total) * 1000, 1),
+            "delta_events_per_run": len(events) if mode == "streamed" else 0,
+        })
+
+    await close_llm_clients()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--token-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(content=_CONTENT, latency_ms=args.latency_ms, token_latency_ms=args.token_latency_ms) as server:
+        _configure_env(server.base_url)
+        asyncio.run(main(args.runs))
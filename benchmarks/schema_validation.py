@@ -0,0 +1,236 @@
+"""
+Structured-output validation throughput for every schema in app/constants/schemas.py.
+
+Compares:
+  - legacy:   the previous validator, re-interpreting the schema dict recursively per response
+              (and json.dumps-ing items for uniqueItems)
+  - compiled: validators compiled once per schema into closures (app.services.schema_validator)
+
+Each schema is checked with a synthesized valid payload and an invalid one (wrong leaf types,
+missing required fields); both validators must report identical errors. Also reports the cost of
+building a schema via its factory before and after memoization.
+
+Run from the repo root:
+    python -m benchmarks.schema_validation
+"""
+import argparse
+import inspect
+import json
+import time
+from typing import Any, Dict, List
+
+from app.constants import schemas
+from app.services.schema_validator import MAX_SCHEMA_ERRORS, validate_payload
+
+
+# ---- The validator before compilation, kept verbatim for comparison.
+def _schema_root(schema: Dict[str, Any]) -> Dict[str, Any]:
+    if schema.get("type") == "json_schema":
+        return schema.get("json_schema", {}).get("schema", {})
+    return schema
+
+
+def _matches_type(value: Any, expected: str) -> bool:
+    if expected == "object":
+        return isinstance(value, dict)
+    if expected == "array":
+        return isinstance(value, list)
+    if expected == "string":
+        return isinstance(value, str)
+    if expected == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if expected == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if expected == "boolean":
+        return isinstance(value, bool)
+    if expected == "null":
+        return value is None
+    return True
+
+
+def _validate_json_value(value: Any, schema_node: Dict[str, Any], path: str, errors: List[str]) -> None:
+    if len(errors) >= MAX_SCHEMA_ERRORS or not isinstance(schema_node, dict):
+        return
+
+    type_spec = schema_node.get("type")
+    if type_spec is not None:
+        allowed_types = type_spec if isinstance(type_spec, list) else [type_spec]
+        if not any(_matches_type(value, t) for t in allowed_types):
+            errors.append(f"{path}: expected type {allowed_types}, got {type(value).__name__}")
+            return
+        if value is None:
+            return
+
+    if "enum" in schema_node and value not in schema_node["enum"]:
+        errors.append(f"{path}: value {value!r} is not in enum {schema_node['enum']}")
+
+    if isinstance(value, str):
+        min_length = schema_node.get("minLength")
+        max_length = schema_node.get("maxLength")
+        if isinstance(min_length, int) and len(value) < min_length:
+            errors.append(f"{path}: string shorter than minLength {min_length}")
+        if isinstance(max_length, int) and len(value) > max_length:
+            errors.append(f"{path}: string longer than maxLength {max_length}")
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        minimum = schema_node.get("minimum")
+        maximum = schema_node.get("maximum")
+        if minimum is not None and value < minimum:
+            errors.append(f"{path}: value {value} below minimum {minimum}")
+        if maximum is not None and value > maximum:
+            errors.append(f"{path}: value {value} above maximum {maximum}")
+
+    if isinstance(value, list):
+        min_items = schema_node.get("minItems")
+        max_items = schema_node.get("maxItems")
+        if isinstance(min_items, int) and len(value) < min_items:
+            errors.append(f"{path}: array smaller than minItems {min_items}")
+        if isinstance(max_items, int) and len(value) > max_items:
+            errors.append(f"{path}: array larger than maxItems {max_items}")
+        if schema_node.get("uniqueItems"):
+            serialized = [json.dumps(item, sort_keys=True, default=str) for item in value]
+            if len(set(serialized)) != len(serialized):
+                errors.append(f"{path}: array contains duplicate items but uniqueItems=true")
+
+        item_schema = schema_node.get("items")
+        if isinstance(item_schema, dict):
+            for idx, item in enumerate(value):
+                _validate_json_value(item, item_schema, f"{path}[{idx}]", errors)
+                if len(errors) >= MAX_SCHEMA_ERRORS:
+                    return
+
+    if isinstance(value, dict):
+        properties = schema_node.get("properties", {})
+        required = schema_node.get("required", [])
+
+        for req_key in required:
+            if req_key not in value:
+                errors.append(f"{path}.{req_key}: missing required field")
+                if len(errors) >= MAX_SCHEMA_ERRORS:
+                    return
+
+        additional = schema_node.get("additionalProperties", True)
+        for key, item_value in value.items():
+            if key in properties:
+                _validate_json_value(item_value, properties[key], f"{path}.{key}", errors)
+            elif additional is False:
+                errors.append(f"{path}.{key}: additional property not allowed")
+            elif isinstance(additional, dict):
+                _validate_json_value(item_value, additional, f"{path}.{key}", errors)
+            if len(errors) >= MAX_SCHEMA_ERRORS:
+                return
+
+
+def _legacy_validate(payload: Any, schema: Dict[str, Any]) -> List[str]:
+    root = _schema_root(schema)
+    if not root:
+        return []
+    errors: List[str] = []
+    _validate_json_value(payload, root, "$", errors)
+    return errors
+
+
+def _sample(node: Any, index: int = 0) -> Any:
+    # A payload that satisfies `node` (enough of JSON schema for the shapes in schemas.py).
+    if not isinstance(node, dict):
+        return None
+    if "enum" in node:
+        return node["enum"][index % len(node["enum"])]
+    type_spec = node.get("type")
+    type_name = type_spec[0] if isinstance(type_spec, list) else type_spec
+    if type_name == "object" or "properties" in node:
+        payload = {key: _sample(sub) for key, sub in (node.get("properties") or {}).items()}
+        extra = node.get("additionalProperties")
+        if isinstance(extra, dict) and not payload:
+            payload = {f"key_{i}": _sample(extra, i) for i in range(4)}
+        return payload
+    if type_name == "array":
+        count = max(node.get("minItems", 0), 3)
+        if isinstance(node.get("maxItems"), int):
+            count = min(count, node["maxItems"])
+        return [_sample(node.get("items") or {}, i) for i in range(count)]
+    if type_name == "string":
+        return f"value {index} " + "x" * max(node.get("minLength", 0), 8)
+    if type_name in ("number", "integer"):
+        low = node.get("minimum", 0)
+        high = node.get("maximum", low + 10)
+        return low + (high - low) // 2 if type_name == "integer" else (low + high) / 2
+    if type_name == "boolean":
+        return True
+    return None
+
+
+def _corrupt(value: Any, depth: int = 0) -> Any:
+    # Wrong type at every leaf, and every other object key dropped.
+    if isinstance(value, dict):
+        return {key: _corrupt(item, depth + 1) for i, (key, item) in enumerate(value.items()) if i % 2 == 0}
+    if isinstance(value, list):
+        return [_corrupt(item, depth + 1) for item in value]
+    if isinstance(value, str):
+        return 12345
+    return "not-a-" + type(value).__name__
+
+
+def _rate(fn, *args, budget_s: float = 0.25) -> float:
+    calls, t0 = 0, time.perf_counter()
+    while True:
+        fn(*args)
+        calls += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= budget_s:
+            return calls / elapsed
+
+
+def _factories() -> Dict[str, Any]:
+    # Registered schema factories are wrappers, not the plain functions defined in schemas.py.
+    return {
+        name: fn
+        for name, fn in inspect.getmembers(schemas, callable)
+        if getattr(fn, "__module__", None) == schemas.__name__
+        and not inspect.isclass(fn)
+        and not inspect.signature(fn).parameters
+    }
+
+
+def main(budget_s: float) -> None:
+    rows: List[Dict[str, Any]] = []
+    total_legacy = total_compiled = 0.0
+    for name, factory in sorted(_factories().items()):
+        schema = factory()
+        valid = _sample(_schema_root(schema))
+        invalid = _corrupt(valid)
+        for payload in (valid, invalid):
+            assert validate_payload(payload, schema) == _legacy_validate(payload, schema), name
+        assert validate_payload(valid, schema) == [], (name, validate_payload(valid, schema))
+
+        legacy = _rate(_legacy_validate, valid, schema, budget_s=budget_s)
+        compiled = _rate(validate_payload, valid, schema, budget_s=budget_s)
+        total_legacy += 1 / legacy
+        total_compiled += 1 / compiled
+        build = getattr(factory, "__wrapped__", factory)
+        rows.append({
+            "schema": name,
+            "payload_bytes": len(json.dumps(valid)),
+            "invalid_errors": len(validate_payload(invalid, schema)),
+            "legacy_per_sec": round(legacy),
+            "compiled_per_sec": round(compiled),
+            "speedup": round(compiled / legacy, 1),
+            "factory_build_us": round(1e6 / _rate(build, budget_s=budget_s / 5), 2),
+            "factory_cached_us": round(1e6 / _rate(factory, budget_s=budget_s / 5), 3),
+        })
+
+    print(json.dumps(rows, indent=2))
+    print(json.dumps({
+        "schemas": len(rows),
+        "max_errors_per_response": MAX_SCHEMA_ERRORS,
+        "one_of_each_legacy_ms": round(total_legacy * 1000, 3),
+        "one_of_each_compiled_ms": round(total_compiled * 1000, 3),
+        "overall_speedup": round(total_legacy / total_compiled, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="time spent measuring each rate")
+    args = parser.parse_args()
+    main(args.budget_ms / 1000.0)